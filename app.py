@@ -1,6 +1,14 @@
+import atexit
+import io
+import time
 import streamlit as st
 import pandas as pd
 from model import ClaimsAnalyzer
+from cache import ResultCache
+from dedup import DuplicateIndex
+from jobs import JobManager, job_id_for
+from metrics import MetricsRegistry
+from store import ORDERINGS, ClaimStore
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -11,10 +19,70 @@ st.set_page_config(
     layout="wide"
 )
 
+DUPLICATE_INDEX_PATH = 'claims_duplicate_index.npz'
+# Single claims save the duplicate index at most this often; batches and shutdown always do
+DUPLICATE_INDEX_SAVE_SECONDS = 60
+STORE_PATH = 'claims_store.sqlite'
+
 # Initialize analyzer
 @st.cache_resource
 def load_analyzer():
-    return ClaimsAnalyzer()
+    # Near-duplicates of claims seen in earlier sessions are flagged as fraud indicators
+    duplicate_index = DuplicateIndex.open(DUPLICATE_INDEX_PATH)
+    atexit.register(duplicate_index.save)
+    # Results are cached by claim text, so re-runs of the same claims are instant
+    # Lazy sentiment: the model only runs when the severity decision or the UI needs it
+    return ClaimsAnalyzer(
+        cache=ResultCache(max_entries=50000),
+        metrics=MetricsRegistry(),
+        sentiment_mode='lazy',
+        duplicate_index=duplicate_index,
+    )
+
+# Seconds between refreshes while a batch job is running
+JOB_POLL_SECONDS = 1.0
+
+@st.cache_resource
+def load_job_manager():
+    # Shared across reruns and sessions, so a running batch survives widget clicks
+    return JobManager(load_analyzer(), chunk_size=64)
+
+@st.cache_data
+def load_claims_csv(data):
+    return pd.read_csv(io.BytesIO(data))
+
+@st.cache_resource
+def load_store():
+    # Every finished batch is saved here for the search view
+    return ClaimStore(STORE_PATH)
+
+@st.cache_data
+def store_job_results(job_id):
+    # Runs once per finished job; re-storing the same claim ids would only replace them
+    job = load_job_manager().get(job_id)
+    return load_store().insert_table(job.table, job.texts)
+
+@st.cache_data
+def export_results(job_id, output_format):
+    # Only called for finished jobs, so the bytes never go stale
+    return load_job_manager().get(job_id).table.to_bytes(output_format)
+
+def show_timings():
+    """Render the stage timings of the last analysis in an expander"""
+    timings = analyzer.last_timings
+    with st.expander("Timings"):
+        if timings is None:
+            st.caption("Result served from cache - no models were run.")
+            return
+        stage_ms = {
+            stage: seconds * 1000 for stage, seconds in timings.items()
+            if stage not in ('input_chars', 'batch_size')
+        }
+        st.bar_chart(pd.Series(stage_ms, name="ms"))
+        st.caption(
+            f"Total {sum(stage_ms.values()):.1f} ms for {timings['input_chars']} characters "
+            f"(batch size {timings['batch_size']})"
+        )
 
 try:
     analyzer = load_analyzer()
@@ -39,7 +107,7 @@ This NLP system automatically analyzes insurance claim descriptions to:
 st.sidebar.header("Analysis Options")
 analysis_mode = st.sidebar.radio(
     "Select Mode:",
-    ["Single Claim Analysis", "Batch Analysis", "Sample Claims Demo"]
+    ["Single Claim Analysis", "Batch Analysis", "Search Stored Claims", "Sample Claims Demo"]
 )
 
 st.sidebar.markdown("---")
@@ -51,6 +119,11 @@ st.sidebar.markdown("""
 - Workload estimation
 """)
 
+cache_stats = analyzer.cache.stats()
+st.sidebar.caption(
+    f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+)
+
 # Main content based on mode
 if analysis_mode == "Single Claim Analysis":
     st.header("Analyze Individual Claim")
@@ -66,6 +139,7 @@ if analysis_mode == "Single Claim Analysis":
             with st.spinner("Analyzing claim..."):
                 try:
                     results = analyzer.analyze_claim(claim_text)
+                    analyzer.duplicate_index.save(min_interval=DUPLICATE_INDEX_SAVE_SECONDS)
                     
                     # Display results in columns
                     col1, col2, col3 = st.columns(3)
@@ -148,6 +222,8 @@ if analysis_mode == "Single Claim Analysis":
                         }
                     ))
                     st.plotly_chart(fig, use_container_width=True)
+                    
+                    show_timings()
                 
                 except Exception as e:
                     st.error(f"Error analyzing claim: {e}")
@@ -161,75 +237,108 @@ elif analysis_mode == "Batch Analysis":
     
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            data = uploaded_file.getvalue()
+            df = load_claims_csv(data)
             
             if 'description' in df.columns:
                 st.success(f"Loaded {len(df)} claims")
                 
+                # Same file + same analyzer rules -> same job, so reruns reuse its results
+                job_manager = load_job_manager()
+                job_id = job_id_for(data, analyzer.version)
+                
                 if st.button("Analyze All Claims", type="primary"):
-                    with st.spinner("Analyzing claims..."):
-                        results_list = []
-                        
-                        progress_bar = st.progress(0)
-                        for idx, row in df.iterrows():
-                            results = analyzer.analyze_claim(row['description'])
-                            results['claim_id'] = row.get('claim_id', f'CLM{idx+1:03d}')
-                            results_list.append(results)
-                            progress_bar.progress((idx + 1) / len(df))
-                        
-                        # Create results dataframe
-                        results_df = pd.DataFrame([
-                            {
-                                'Claim ID': r['claim_id'],
-                                'Severity': r['severity'],
-                                'Confidence': f"{r['severity_confidence']:.1%}",
-                                'Fraud Risk': r['fraud_risk'],
-                                'Summary': r['summary']
-                            }
-                            for r in results_list
-                        ])
+                    if 'claim_id' in df.columns:
+                        claim_ids = df['claim_id'].tolist()
+                    else:
+                        claim_ids = [f'CLM{idx+1:03d}' for idx in range(len(df))]
+                    # Named after the upload, so its CLM ids don't collide with earlier files
+                    job_manager.submit(job_id, claim_ids, df['description'].tolist(),
+                                       source=f'{uploaded_file.name}#{job_id[:8]}')
+                
+                job = job_manager.get(job_id)
+                if job is not None:
+                    table = job.snapshot()
+                    
+                    if job.status == 'failed':
+                        st.error(f"Batch analysis failed: {job.error}")
+                    elif not job.done:
+                        st.progress(job.progress)
+                        st.caption(f"Analyzed {table.num_rows} of {job.total} claims...")
+                    
+                    if table.num_rows:
+                        # Display columns straight from the Arrow table
+                        results_df = table.select(
+                            ['claim_id', 'severity', 'severity_confidence', 'fraud_risk', 'summary']
+                        ).to_pandas()
+                        results_df['severity_confidence'] *= 100
+                        results_df.columns = ['Claim ID', 'Severity', 'Confidence', 'Fraud Risk', 'Summary']
                         
                         st.subheader("Analysis Results")
-                        st.dataframe(results_df, use_container_width=True)
+                        st.dataframe(
+                            results_df,
+                            use_container_width=True,
+                            column_config={'Confidence': st.column_config.NumberColumn(format="%.1f%%")},
+                        )
+                    
+                    if job.status == 'done':
+                        # No-op unless new claims were indexed since the last save
+                        analyzer.duplicate_index.save()
+                        stored = store_job_results(job_id)
+                        st.caption(f"Finished in {job.finished - job.started:.1f}s; "
+                                   f"{stored} claims saved for search")
                         
-                        # Visualizations - FIXED VERSION
+                        # Visualizations from group-bys over the categorical columns
                         col1, col2 = st.columns(2)
                         
                         with col1:
-                            # Fixed: Create proper DataFrame for severity distribution
-                            severity_data = [r['severity'] for r in results_list]
-                            severity_df = pd.DataFrame({'Severity': severity_data})
-                            severity_counts = severity_df['Severity'].value_counts()
-                            
+                            severity_counts = job.table.group_counts('severity')
                             fig1 = px.pie(
-                                values=severity_counts.values, 
-                                names=severity_counts.index,
+                                severity_counts,
+                                values='count',
+                                names='severity',
                                 title="Severity Distribution"
                             )
                             st.plotly_chart(fig1, use_container_width=True)
                         
                         with col2:
-                            # Fixed: Create proper DataFrame for fraud distribution
-                            fraud_data = [r['fraud_risk'] for r in results_list]
-                            fraud_df = pd.DataFrame({'Fraud Risk': fraud_data})
-                            fraud_counts = fraud_df['Fraud Risk'].value_counts()
-                            
+                            fraud_counts = job.table.group_counts('fraud_risk')
                             fig2 = px.bar(
-                                x=fraud_counts.index, 
-                                y=fraud_counts.values,
+                                fraud_counts,
+                                x='fraud_risk',
+                                y='count',
                                 title="Fraud Risk Distribution",
-                                labels={'x': 'Risk Level', 'y': 'Count'}
+                                labels={'fraud_risk': 'Risk Level', 'count': 'Count'}
                             )
                             st.plotly_chart(fig2, use_container_width=True)
                         
-                        # Download results
-                        csv = results_df.to_csv(index=False)
-                        st.download_button(
-                            label="Download Results CSV",
-                            data=csv,
-                            file_name="claims_analysis_results.csv",
-                            mime="text/csv"
-                        )
+                        # Download results, including entities and fraud indicators
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.download_button(
+                                label="Download Results CSV",
+                                data=export_results(job_id, 'csv'),
+                                file_name="claims_analysis_results.csv",
+                                mime="text/csv"
+                            )
+                        with col2:
+                            st.download_button(
+                                label="Download Parquet",
+                                data=export_results(job_id, 'parquet'),
+                                file_name="claims_analysis_results.parquet",
+                                mime="application/vnd.apache.parquet"
+                            )
+                        with col3:
+                            st.download_button(
+                                label="Download Arrow",
+                                data=export_results(job_id, 'arrow'),
+                                file_name="claims_analysis_results.arrow",
+                                mime="application/vnd.apache.arrow.file"
+                            )
+                    elif not job.done:
+                        # Poll the background job; the page stays usable between refreshes
+                        time.sleep(JOB_POLL_SECONDS)
+                        st.rerun()
             else:
                 st.error("CSV must contain a 'description' column")
         except Exception as e:
@@ -237,6 +346,59 @@ elif analysis_mode == "Batch Analysis":
             import traceback
             st.code(traceback.format_exc())
 
+elif analysis_mode == "Search Stored Claims":
+    st.header("Search Stored Claims")
+    
+    store = load_store()
+    if not len(store):
+        st.info("No claims stored yet. Results of every finished batch analysis are saved here.")
+    else:
+        text = st.text_input("Description contains (all words)", placeholder="e.g. airbags highway")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            severity = st.multiselect("Severity", ['High', 'Medium', 'Low'])
+            location = st.selectbox("Location", [''] + store.facets('locations'))
+        with col2:
+            fraud_risk = st.multiselect("Fraud Risk", ['High', 'Medium', 'Low'])
+            vehicle_make = st.selectbox("Vehicle make", [''] + store.facets('vehicle_make'))
+        with col3:
+            min_fraud_score = st.number_input("Minimum fraud score", min_value=0, value=0, step=1)
+            order_by = st.selectbox("Order by", list(ORDERINGS))
+        
+        filters = dict(
+            text=text,
+            severity=severity,
+            fraud_risk=fraud_risk,
+            min_fraud_score=min_fraud_score or None,
+            location=location or None,
+            vehicle_make=vehicle_make or None,
+        )
+        start = time.perf_counter()
+        matches = store.search(limit=200, order_by=order_by, **filters)
+        total = store.count(**filters)
+        st.caption(f"{total} of {len(store)} stored claims match "
+                   f"({(time.perf_counter() - start) * 1000:.0f} ms); showing up to 200")
+        
+        if not matches.empty:
+            display_df = matches[['claim_id', 'severity', 'severity_confidence', 'fraud_risk',
+                                  'fraud_score', 'summary']].copy()
+            display_df['severity_confidence'] *= 100
+            display_df.columns = ['Claim ID', 'Severity', 'Confidence', 'Fraud Risk', 'Fraud Score', 'Summary']
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                column_config={'Confidence': st.column_config.NumberColumn(format="%.1f%%")},
+            )
+            
+            selected = st.selectbox("Claim details", matches['claim_id'].tolist())
+            record = store.get(selected)
+            st.text_area("Full claim description:", record['description'], height=100, disabled=True)
+            for key in ('locations', 'dates', 'money', 'organizations', 'vehicles'):
+                if record[key]:
+                    st.markdown(f"**{key.title()}:** {', '.join(record[key])}")
+            for indicator in record['fraud_indicators']:
+                st.warning(indicator)
+
 else:  # Sample Claims Demo
     st.header("Sample Claims Demo")
     
@@ -292,6 +454,8 @@ else:  # Sample Claims Demo
                         st.subheader("Fraud Indicators")
                         for indicator in results['fraud_indicators']:
                             st.warning(indicator)
+                    
+                    show_timings()
                 
                 except Exception as e:
                     st.error(f"Error: {e}")
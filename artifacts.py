@@ -0,0 +1,166 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+
+# Everything the analysis stages read from a Doc besides the tokens: entities
+# (with the vehicle make|model kb ids) and sentence boundaries
+DOC_ATTRS = ('ENT_IOB', 'ENT_TYPE', 'ENT_KB_ID', 'SENT_START')
+# Keeps each IN (...) lookup well below SQLite's variable limit
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY, doc BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS sentiments (key TEXT PRIMARY KEY, label TEXT NOT NULL, score REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS windows (key TEXT PRIMARY KEY, entities TEXT NOT NULL, summary TEXT NOT NULL);
+"""
+
+
+def artifact_key(text, version):
+    """Address of a stage output for the exact claim text under a model version
+
+    Unlike cache.cache_key the text is not normalized: token offsets, and so
+    the entity and sentence text, depend on the original whitespace.
+    """
+    digest = hashlib.sha256()
+    digest.update(version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def doc_to_bytes(doc):
+    """Compact serialization of the parts of a Doc the analyzer uses
+
+    The layout of spacy.tokens.DocBin (token attribute arrays plus the
+    strings they reference), without its per-call msgpack overhead, which
+    dominates when every claim is stored separately. Tokens are stored as
+    character offsets into the claim text, which the caller supplies again
+    on load.
+    """
+    import numpy as np
+    offsets = np.array([[token.idx, len(token)] for token in doc], dtype=np.int32).reshape(-1, 2)
+    values = doc.to_array(list(DOC_ATTRS)).reshape(-1, len(DOC_ATTRS)).astype(np.uint64)
+    strings = '\0'.join(
+        {doc.vocab.strings[value] for value in np.unique(values[:, 1:3]) if value}
+    ).encode('utf-8')
+    header = np.array([len(doc), len(strings)], dtype=np.int64)
+    return zlib.compress(header.tobytes() + offsets.tobytes() + values.tobytes() + strings, 1)
+
+
+def doc_from_bytes(data, vocab, text):
+    """Rebuild a Doc for text from doc_to_bytes output"""
+    import numpy as np
+    from spacy.tokens import Doc
+    data = zlib.decompress(data)
+    count, strings_size = np.frombuffer(data, dtype=np.int64, count=2)
+    position = 16
+    offsets = np.frombuffer(data, dtype=np.int32, count=count * 2, offset=position).reshape(-1, 2)
+    position += offsets.nbytes
+    values = np.frombuffer(data, dtype=np.uint64, count=count * len(DOC_ATTRS), offset=position)
+    position += values.nbytes
+    if strings_size:
+        for string in data[position:position + strings_size].decode('utf-8').split('\0'):
+            vocab.strings.add(string)
+
+    starts, ends = offsets[:, 0].tolist(), offsets.sum(axis=1).tolist()
+    words = [text[start:end] for start, end in zip(starts, ends)]
+    # A single trailing space is token whitespace; any other gap is a token of its own
+    spaces = [end < following for end, following in zip(ends, starts[1:] + [len(text)])]
+    doc = Doc(vocab, words=words, spaces=spaces)
+    if count:
+        doc.from_array(list(DOC_ATTRS), values.reshape(-1, len(DOC_ATTRS)))
+    return doc
+
+
+class ArtifactStore:
+    """SQLite store of per-claim model outputs: spaCy Docs and sentiment
+
+    Long claims, which are never parsed as one Doc, keep the entities and
+    summary gathered from their windows instead.
+
+    Keys combine the claim text with the version of the model that produced
+    the artifact (see artifact_key), not the analyzer version, so keyword and
+    threshold changes keep every artifact valid while a new spaCy pipeline or
+    sentiment model simply stops hitting the old ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = {'docs': 0, 'sentiments': 0, 'windows': 0}
+        self.misses = {'docs': 0, 'sentiments': 0, 'windows': 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def _lookup(self, table, columns, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, {columns} FROM {table} WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update((row[0], row[1:]) for row in rows)
+            self.hits[table] += sum(key in found for key in keys)
+            self.misses[table] += sum(key not in found for key in keys)
+        return found
+
+    def get_docs(self, keys, texts, vocab):
+        """{key: Doc} for the keys that are stored; texts are the claims the keys belong to"""
+        found = self._lookup('docs', 'doc', keys)
+        texts = dict(zip(keys, texts))
+        return {key: doc_from_bytes(data, vocab, texts[key]) for key, (data,) in found.items()}
+
+    def put_docs(self, keys, docs):
+        rows = [(key, doc_to_bytes(doc)) for key, doc in zip(keys, docs)]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO docs (key, doc) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def get_sentiments(self, keys):
+        """{key: {'label', 'score'}} for the keys that are stored"""
+        found = self._lookup('sentiments', 'label, score', keys)
+        return {key: {'label': label, 'score': score} for key, (label, score) in found.items()}
+
+    def put_sentiments(self, keys, sentiments):
+        rows = [(key, sentiment['label'], float(sentiment['score'])) for key, sentiment in zip(keys, sentiments)]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO sentiments (key, label, score) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def get_windows(self, keys):
+        """{key: (entities, summary)} for the keys that are stored, entities as {kind: [values]}"""
+        found = self._lookup('windows', 'entities, summary', keys)
+        return {key: (json.loads(entities), summary) for key, (entities, summary) in found.items()}
+
+    def put_windows(self, keys, windows):
+        rows = [
+            (key, json.dumps({kind: list(values) for kind, values in entities.items()}), summary)
+            for key, (entities, summary) in zip(keys, windows)
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO windows (key, entities, summary) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def counts(self):
+        with self._lock:
+            return {
+                table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('docs', 'sentiments', 'windows')
+            }
+
+    def stats(self):
+        with self._lock:
+            return {'hits': dict(self.hits), 'misses': dict(self.misses)}
@@ -0,0 +1,450 @@
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import model
+from model import DEFAULT_NLP_PROFILE, LONG_DOCUMENT_CHARS, NLP_PROFILES, ClaimContext, ClaimsAnalyzer
+from generate_sample_data import VEHICLES, generate_long_claim
+from sentiment import DEFAULT_SENTIMENT_BACKEND, SENTIMENT_BACKENDS, naive_batches, padded_tokens
+
+DATASETS = [
+    'claims_small_100.csv',
+    'claims_medium_500.csv',
+    'claims_large_1000.csv',
+    'claims_xlarge_2000.csv',
+]
+STAGES = ['spacy_ner', 'sentiment', 'keyword_rules', 'entities', 'summary']
+
+# Synthetic claim sizes for the long-document benchmark
+LONG_DOCUMENT_KB = [50, 100, 250, 500]
+
+# Metrics where a larger value is a regression; everything else regresses when it shrinks.
+# A nested metric such as 'stage_ms_per_claim.sentiment' follows its top-level name.
+LOWER_IS_BETTER = {'p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb', 'stage_ms_per_claim'}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed(stage_times, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    stage_times[stage] += time.perf_counter() - start
+    return result
+
+
+def benchmark_texts(texts, analyzer=None, batch_size=32):
+    """Benchmark one list of claim texts and return a metrics dict"""
+    analyzer = analyzer or ClaimsAnalyzer()
+    stage_times = dict.fromkeys(STAGES, 0.0)
+    latencies = []
+
+    # Per-claim path, driving each stage by hand so it can be timed on its own
+    start_all = time.perf_counter()
+    for text in texts:
+        start = time.perf_counter()
+        # The analyzer's own context, so its sentiment backend and long-claim
+        # windowing apply; a long claim is parsed in windows by the entities stage
+        context = analyzer._context(text)
+        if not context.is_long:
+            _timed(stage_times, 'spacy_ner', lambda: context.doc)
+        _timed(stage_times, 'sentiment', lambda: context.sentiment)
+        _timed(stage_times, 'keyword_rules', analyzer.classify_severity, context)
+        _timed(stage_times, 'keyword_rules', analyzer.detect_fraud_indicators, context)
+        _timed(stage_times, 'entities', analyzer.extract_entities, context)
+        _timed(stage_times, 'summary', analyzer.generate_summary, context)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - start_all
+
+    # Batched path through analyze_claims
+    start = time.perf_counter()
+    for _ in analyzer.analyze_claims(texts, batch_size=batch_size):
+        pass
+    batch_elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'claims': len(texts),
+        'claims_per_sec': len(texts) / elapsed,
+        'batch_claims_per_sec': len(texts) / batch_elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'peak_rss_mb': peak_rss_mb(),
+        'stage_ms_per_claim': {
+            stage: seconds * 1000 / len(texts) for stage, seconds in stage_times.items()
+        },
+    }
+
+
+def run_benchmarks(datasets=DATASETS, limit=None, batch_size=32, analyzer=None):
+    """Benchmark every dataset and return a JSON-serializable report"""
+    analyzer = analyzer or ClaimsAnalyzer()
+
+    # Pay model loading up front so it doesn't land in the first dataset's numbers
+    start = time.perf_counter()
+    analyzer.warmup()
+    warmup_seconds = time.perf_counter() - start
+
+    results = {}
+    for path in datasets:
+        texts = pd.read_csv(path)['description'].tolist()
+        if limit:
+            texts = texts[:limit]
+        results[os.path.basename(path)] = benchmark_texts(texts, analyzer, batch_size)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'analyzer_version': analyzer.version,
+        'nlp_profile': analyzer.nlp_profile,
+        'batch_size': batch_size,
+        'warmup_seconds': warmup_seconds,
+        'datasets': results,
+    }
+
+
+def _flat_metrics(metrics, prefix=''):
+    """Float metrics of a dataset as {dotted name: value}, nested dicts included"""
+    flat = {}
+    for name, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(_flat_metrics(value, f'{prefix}{name}.'))
+        elif isinstance(value, float):
+            flat[prefix + name] = value
+    return flat
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """List the metrics in current that regressed by more than threshold"""
+    regressions = []
+    for dataset, metrics in current['datasets'].items():
+        previous = baseline['datasets'].get(dataset)
+        if previous is None:
+            continue
+        previous = _flat_metrics(previous)
+        for metric, value in _flat_metrics(metrics).items():
+            old = previous.get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            if metric.split('.', 1)[0] not in LOWER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append({
+                    'dataset': dataset,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': value,
+                    'change': change,
+                })
+    return regressions
+
+
+def triage_stats(texts, analyzer=None):
+    """How many sentiment model calls lazy triage skips; needs no models"""
+    analyzer = analyzer or ClaimsAnalyzer(sentiment_mode='lazy')
+    start = time.perf_counter()
+    required = int(analyzer.evaluate_rules(texts, indicators=False)['sentiment_required'].sum())
+    seconds = time.perf_counter() - start
+    return {
+        'claims': len(texts),
+        'model_calls': required,
+        'skipped': len(texts) - required,
+        'skipped_fraction': (len(texts) - required) / len(texts) if texts else 0.0,
+        'rules_seconds': seconds,
+    }
+
+
+# The regex extract_entities used before vehicles were recognized inside the spaCy pipeline
+LEGACY_VEHICLE_PATTERN = r'\b(19|20)\d{2}\s+[A-Z][a-z]+\s+[A-Z][a-z-]+\b'
+
+
+def _match_scores(expected, predicted):
+    true_positive = false_positive = false_negative = 0
+    for want, got in zip(expected, predicted):
+        want, got = Counter(want), Counter(got)
+        true_positive += sum((want & got).values())
+        false_positive += sum((got - want).values())
+        false_negative += sum((want - got).values())
+    return {
+        'precision': true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0,
+        'recall': true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0,
+    }
+
+
+def vehicle_accuracy(texts, analyzer=None, batch_size=32):
+    """Vehicle extraction precision/recall against the generator's vehicle list
+
+    Scores the spaCy vehicle recognizer and, for comparison, the legacy regex.
+    Only needs the spaCy pipeline, not the sentiment model.
+    """
+    analyzer = analyzer or ClaimsAnalyzer()
+    expected = [[vehicle for vehicle in VEHICLES if vehicle in text] for text in texts]
+    docs = model.models.get(model.nlp_key(analyzer.nlp_profile)).pipe(texts, batch_size=batch_size)
+    predicted = [
+        analyzer.extract_entities(ClaimContext(text, doc=doc))['vehicles']
+        for text, doc in zip(texts, docs)
+    ]
+    return {
+        'claims': len(texts),
+        'vehicles': sum(map(len, expected)),
+        'recognizer': _match_scores(expected, predicted),
+        'legacy_regex': _match_scores(expected, [re.findall(LEGACY_VEHICLE_PATTERN, text) for text in texts]),
+    }
+
+
+def compare_profiles(texts, profiles=NLP_PROFILES, reference=DEFAULT_NLP_PROFILE, batch_size=32):
+    """Check entity/summary agreement and speedup of spaCy profiles against a reference"""
+    outputs = {}
+    seconds = {}
+    for profile in dict.fromkeys([reference, *profiles]):
+        analyzer = ClaimsAnalyzer(nlp_profile=profile)
+        analyzer.warmup()
+        start = time.perf_counter()
+        outputs[profile] = list(analyzer.analyze_claims(texts, batch_size=batch_size))
+        seconds[profile] = time.perf_counter() - start
+
+    comparison = {}
+    for profile, results in outputs.items():
+        pairs = list(zip(outputs[reference], results))
+        comparison[profile] = {
+            'claims_per_sec': len(texts) / seconds[profile],
+            'speedup': seconds[reference] / seconds[profile],
+            'entity_agreement': sum(a['entities'] == b['entities'] for a, b in pairs) / len(pairs),
+            'summary_agreement': sum(a['summary'] == b['summary'] for a, b in pairs) / len(pairs),
+        }
+    return comparison
+
+
+def compare_sentiment_batching(texts, batch_size=32, sentiment=None):
+    """Compare length-bucketed sentiment batches with input-order batches"""
+    sentiment = sentiment or model.models.get(model.sentiment_key(DEFAULT_SENTIMENT_BACKEND))
+    lengths = [len(ids) for ids in sentiment.encode(texts)]
+    plans = {
+        'naive': naive_batches(len(texts), batch_size),
+        'bucketed': sentiment.scheduler.plan(lengths, batch_size),
+    }
+
+    comparison = {}
+    bucketed = sentiment.bucketed
+    try:
+        for mode, plan in plans.items():
+            sentiment.bucketed = mode == 'bucketed'
+            start = time.perf_counter()
+            sentiment(texts, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            comparison[mode] = {
+                'claims_per_sec': len(texts) / elapsed,
+                'padded_tokens': padded_tokens(lengths, plan),
+                'real_tokens': sum(lengths),
+            }
+    finally:
+        sentiment.bucketed = bucketed
+    comparison['speedup'] = comparison['bucketed']['claims_per_sec'] / comparison['naive']['claims_per_sec']
+    return comparison
+
+
+def compare_sentiment_backends(texts, backends=SENTIMENT_BACKENDS,
+                               reference=DEFAULT_SENTIMENT_BACKEND, batch_size=32):
+    """Label agreement with the reference backend plus latency for each sentiment backend"""
+    outputs = {}
+    comparison = {}
+    for backend in dict.fromkeys([reference, *backends]):
+        sentiment = model.models.get(model.sentiment_key(backend))
+        sentiment(texts[:batch_size], batch_size=batch_size)  # warm up kernels
+
+        start = time.perf_counter()
+        outputs[backend] = sentiment(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        agreement = sum(
+            a['label'] == b['label'] for a, b in zip(outputs[reference], outputs[backend])
+        ) / len(texts)
+        comparison[backend] = {
+            'claims_per_sec': len(texts) / elapsed,
+            'ms_per_claim': elapsed * 1000 / len(texts),
+            'label_agreement': agreement,
+        }
+    return comparison
+
+
+def _measure(analyzer, text):
+    """Seconds and peak traced allocation (MB) of analyzing one claim, from separate runs"""
+    start = time.perf_counter()
+    result = analyzer.analyze_claim(text)
+    seconds = time.perf_counter() - start
+    # A second run under tracemalloc, which slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        analyzer.analyze_claim(text)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {'seconds': seconds, 'peak_mb': peak / (1024 * 1024)}
+
+
+def benchmark_long_documents(sizes_kb=LONG_DOCUMENT_KB, nlp_profile=DEFAULT_NLP_PROFILE,
+                             sentiment_backend=DEFAULT_SENTIMENT_BACKEND, long_document_chars=LONG_DOCUMENT_CHARS,
+                             seed=0):
+    """Windowed long-document analysis against parsing each claim as one Doc
+
+    Uses synthetic multi-page claims of each size. Peak memory is what
+    Python allocated while analyzing (spaCy's token arrays included), on top
+    of the loaded models.
+    """
+    windowed = ClaimsAnalyzer(nlp_profile=nlp_profile, sentiment_backend=sentiment_backend,
+                              long_document_chars=long_document_chars)
+    whole = ClaimsAnalyzer(nlp_profile=nlp_profile, sentiment_backend=sentiment_backend,
+                           long_document_chars=None)
+    windowed.warmup()
+
+    results = {}
+    for size in sizes_kb:
+        text = generate_long_claim(size * 1024, seed=seed)
+        windowed_result, windowed_stats = _measure(windowed, text)
+        whole_result, whole_stats = _measure(whole, text)
+        results[size] = {
+            'chars': len(text),
+            'windowed': dict(windowed_stats, sentiment=windowed_result['sentiment']['label'],
+                             entities=sum(map(len, windowed_result['entities'].values()))),
+            'whole_document': dict(whole_stats, sentiment=whole_result['sentiment']['label'],
+                                   entities=sum(map(len, whole_result['entities'].values()))),
+        }
+    return results
+
+
+def print_report(report):
+    for dataset, metrics in report['datasets'].items():
+        print(f"{dataset} ({metrics['claims']} claims)")
+        print(f"  throughput: {metrics['claims_per_sec']:.1f} claims/sec "
+              f"(batched: {metrics['batch_claims_per_sec']:.1f})")
+        print(f"  latency: p50 {metrics['p50_ms']:.2f} ms, p95 {metrics['p95_ms']:.2f} ms, "
+              f"p99 {metrics['p99_ms']:.2f} ms")
+        print(f"  peak RSS: {metrics['peak_rss_mb']:.0f} MB")
+        stages = ', '.join(f"{stage} {ms:.2f}" for stage, ms in metrics['stage_ms_per_claim'].items())
+        print(f"  ms/claim by stage: {stages}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer over the bundled claims datasets")
+    parser.add_argument('datasets', nargs='*', default=DATASETS)
+    parser.add_argument('--limit', type=int, help="only use the first N claims of each dataset")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--nlp-profile', choices=sorted(NLP_PROFILES), default=DEFAULT_NLP_PROFILE)
+    parser.add_argument('--sentiment-backend', choices=sorted(SENTIMENT_BACKENDS),
+                        default=DEFAULT_SENTIMENT_BACKEND)
+    parser.add_argument('--triage-stats', action='store_true',
+                        help="report how many sentiment calls lazy triage skips and exit")
+    parser.add_argument('--vehicle-accuracy', action='store_true',
+                        help="score vehicle extraction against the generator's vehicle list and exit")
+    parser.add_argument('--compare-profiles', action='store_true',
+                        help="compare every spaCy profile against the default and exit")
+    parser.add_argument('--compare-sentiment-batching', action='store_true',
+                        help="compare length-bucketed and naive sentiment batches and exit")
+    parser.add_argument('--compare-sentiment-backends', nargs='*', metavar='BACKEND',
+                        help="compare sentiment backends (default: all) against transformers and exit")
+    parser.add_argument('--long-documents', nargs='*', type=int, metavar='KB',
+                        help="compare windowed and whole-document analysis of synthetic claims of these sizes "
+                             f"(default: {' '.join(map(str, LONG_DOCUMENT_KB))} KB) and exit")
+    parser.add_argument('--output', default='benchmarks/latest.json', help="where to save this run")
+    parser.add_argument('--baseline', help="previous run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative change that counts as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    if args.triage_stats:
+        for path in args.datasets:
+            stats = triage_stats(pd.read_csv(path)['description'].tolist()[:args.limit])
+            print(f"{path}: {stats['skipped']}/{stats['claims']} sentiment calls skipped "
+                  f"({stats['skipped_fraction']:.1%}), rules took {stats['rules_seconds'] * 1000:.1f} ms")
+        sys.exit(0)
+
+    if args.vehicle_accuracy:
+        analyzer = ClaimsAnalyzer(nlp_profile=args.nlp_profile)
+        for path in args.datasets:
+            stats = vehicle_accuracy(pd.read_csv(path)['description'].tolist()[:args.limit], analyzer,
+                                     batch_size=args.batch_size)
+            print(f"{path} ({stats['vehicles']} vehicles in {stats['claims']} claims)")
+            for name in ('recognizer', 'legacy_regex'):
+                print(f"  {name:>12}: precision {stats[name]['precision']:.1%}, "
+                      f"recall {stats[name]['recall']:.1%}")
+        sys.exit(0)
+
+    if args.compare_profiles:
+        for path in args.datasets:
+            texts = pd.read_csv(path)['description'].tolist()[:args.limit]
+            print(f"{path} ({len(texts)} claims)")
+            for profile, stats in compare_profiles(texts, batch_size=args.batch_size).items():
+                print(f"  {profile:>8}: {stats['claims_per_sec']:7.1f} claims/sec "
+                      f"({stats['speedup']:.2f}x), entities agree {stats['entity_agreement']:.1%}, "
+                      f"summaries agree {stats['summary_agreement']:.1%}")
+        sys.exit(0)
+
+    if args.compare_sentiment_batching:
+        for path in args.datasets:
+            texts = pd.read_csv(path)['description'].tolist()[:args.limit]
+            stats = compare_sentiment_batching(texts, batch_size=args.batch_size)
+            print(f"{path} ({len(texts)} claims): bucketed is {stats['speedup']:.2f}x naive")
+            for mode in ('naive', 'bucketed'):
+                efficiency = stats[mode]['real_tokens'] / stats[mode]['padded_tokens']
+                print(f"  {mode:>8}: {stats[mode]['claims_per_sec']:7.1f} claims/sec, "
+                      f"{stats[mode]['padded_tokens']} padded tokens ({efficiency:.0%} useful)")
+        sys.exit(0)
+
+    if args.compare_sentiment_backends is not None:
+        backends = args.compare_sentiment_backends or list(SENTIMENT_BACKENDS)
+        for path in args.datasets:
+            texts = pd.read_csv(path)['description'].tolist()[:args.limit]
+            print(f"{path} ({len(texts)} claims)")
+            for backend, stats in compare_sentiment_backends(texts, backends, batch_size=args.batch_size).items():
+                print(f"  {backend:>12}: {stats['ms_per_claim']:6.2f} ms/claim, "
+                      f"{stats['claims_per_sec']:7.1f} claims/sec, "
+                      f"labels agree {stats['label_agreement']:.1%}")
+        sys.exit(0)
+
+    if args.long_documents is not None:
+        stats = benchmark_long_documents(args.long_documents or LONG_DOCUMENT_KB, nlp_profile=args.nlp_profile,
+                                         sentiment_backend=args.sentiment_backend)
+        for size, modes in stats.items():
+            print(f"{size} KB claim ({modes['chars']} chars)")
+            for mode in ('windowed', 'whole_document'):
+                print(f"  {mode:>14}: {modes[mode]['seconds']:6.2f} s, peak {modes[mode]['peak_mb']:7.1f} MB, "
+                      f"sentiment {modes[mode]['sentiment']}, {modes[mode]['entities']} entities")
+        sys.exit(0)
+
+    analyzer = ClaimsAnalyzer(nlp_profile=args.nlp_profile, sentiment_backend=args.sentiment_backend)
+    report = run_benchmarks(args.datasets, limit=args.limit, batch_size=args.batch_size,
+                            analyzer=analyzer)
+    print_report(report)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['dataset']} {r['metric']}: "
+                  f"{r['baseline']:.2f} -> {r['current']:.2f} ({r['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,109 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from sentiment import json_default
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially reformatted resubmissions share a key"""
+    return ' '.join(text.split())
+
+
+def cache_key(text, version):
+    """Content address for a claim analyzed under a given analyzer version"""
+    digest = hashlib.sha256()
+    digest.update(version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_text(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache of analysis results with an optional SQLite tier
+
+    Keys already include the analyzer version (see cache_key), so changing
+    keyword rules or models simply stops old entries from being hit. Sentiment
+    that was never evaluated (see LazySentiment) is stored on disk as null,
+    and ClaimsAnalyzer turns it back into lazy sentiment on a hit.
+    """
+
+    def __init__(self, max_entries=10000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """Return a copy of the cached result, or None on a miss"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        """Store a result in memory and, if configured, on disk"""
+        with self._lock:
+            self._remember(key, copy.deepcopy(result))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+                    (key, json.dumps(result, default=json_default)),
+                )
+                self._db.commit()
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'entries': len(self._entries),
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,81 @@
+import pytest
+import spacy
+
+import vehicles  # noqa: F401 - registers the vehicle_recognizer factory
+
+
+def build_test_nlp():
+    """Small rule-based pipeline standing in for en_core_web_sm in tests"""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "GPE", "pattern": city}
+        for city in ["Boston", "Cambridge", "Newton", "Quincy", "Worcester"]
+    ] + [
+        {"label": "MONEY", "pattern": [{"ORTH": "$"}, {"LIKE_NUM": True}]},
+        {"label": "DATE", "pattern": [{"SHAPE": "dd/dd/dddd"}]},
+        {"label": "ORG", "pattern": "Fire department"},
+    ])
+    nlp.add_pipe("vehicle_recognizer")
+    return nlp
+
+
+def fake_sentiment(texts, **kwargs):
+    """Deterministic stand-in for the DistilBERT sentiment pipeline"""
+    single = isinstance(texts, str)
+    if single:
+        texts = [texts]
+    negative_words = ('damage', 'destroyed', 'severe', 'accident', 'stolen', 'injur')
+    results = []
+    for text in texts:
+        lowered = text.lower()
+        if any(word in lowered for word in negative_words):
+            results.append({'label': 'NEGATIVE', 'score': 0.98})
+        else:
+            results.append({'label': 'POSITIVE', 'score': 0.91})
+    return results
+
+
+class CallCounter:
+    """Wrap a callable and count how often it is invoked"""
+    
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+    
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.func, name)
+
+
+def install_test_models():
+    """Install the test doubles into the global registry (used by worker processes)"""
+    import model
+    model.models.set('nlp:full', build_test_nlp())
+    model.models.set('sentiment:transformers', fake_sentiment)
+
+
+@pytest.fixture(scope="session")
+def test_nlp():
+    return build_test_nlp()
+
+
+@pytest.fixture
+def test_models(monkeypatch, test_nlp):
+    """Fresh model registry preloaded with the test doubles, wrapped in counters"""
+    import model
+    registry = model.ModelRegistry()
+    registry.set('nlp:full', CallCounter(test_nlp))
+    registry.set('sentiment:transformers', CallCounter(fake_sentiment))
+    monkeypatch.setattr(model, "models", registry)
+    return registry
+
+
+@pytest.fixture
+def analyzer(test_models):
+    import model
+    return model.ClaimsAnalyzer()
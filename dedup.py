@@ -0,0 +1,297 @@
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from cache import normalize_text
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r'\w+')
+
+
+def shingles(text, size=3):
+    """Hashed word n-grams of a claim; crc32 keeps them stable across processes"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < size:
+        grams = [' '.join(tokens)] if tokens else []
+    else:
+        grams = (' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two shingle sets"""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def content_key(text):
+    """Index key for a claim without an id; whitespace changes map to the same key"""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()[:16]
+
+
+def _candidate_probability(similarity, bands, rows):
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_params(threshold, num_perm, false_positive_weight=0.5):
+    """Bands and rows per band minimizing weighted false positive/negative probability
+
+    The probability that a pair with similarity s shares a bucket is
+    1 - (1 - s**rows)**bands; integrate it below the threshold (false
+    positives) and its complement above (false negatives).
+    """
+    grid = np.linspace(0.0, 1.0, 201)
+    below, above = grid[grid < threshold], grid[grid >= threshold]
+    best, best_error = None, None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _candidate_probability(below, bands, rows).mean() * threshold
+            false_negative = (1 - _candidate_probability(above, bands, rows)).mean() * (1 - threshold)
+            error = (false_positive_weight * false_positive
+                     + (1 - false_positive_weight) * false_negative)
+            if best_error is None or error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class DuplicateIndex:
+    """MinHash LSH index of earlier claims, for finding recycled narratives
+
+    Each claim is reduced to a MinHash signature of its word shingles; the
+    signature is split into bands and every band is hashed into a bucket, so
+    a query only compares against claims sharing at least one bucket instead
+    of the whole history. Candidates are kept if their estimated Jaccard
+    similarity reaches the threshold.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, seed=1, path=None):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.path = path
+        # Candidates are verified against their signatures, so favour recall over precision
+        self.bands, self.rows = lsh_params(threshold, num_perm, false_positive_weight=0.3)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        self.keys = []
+        self._positions = {}
+        self._signatures = []
+        self._buckets = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        """Load the index saved at path, or start an empty one that will be saved there"""
+        if os.path.exists(path):
+            return cls.load(path)
+        return cls(path=path, **kwargs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def signature(self, text):
+        """MinHash signature of a claim, or None if it has no words"""
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        if not hashes.size:
+            return None
+        # Universal hashing (a*x + b) mod p per permutation; uint64 wraps on overflow
+        values = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return values.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, key, signature):
+        position = len(self.keys)
+        self.keys.append(key)
+        self._positions[key] = position
+        self._signatures.append(signature)
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band, []).append(position)
+        self._dirty = True
+
+    def _query(self, signature, exclude=None):
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band, ()))
+        if exclude in self._positions:
+            candidates.discard(self._positions[exclude])
+        if not candidates:
+            return []
+
+        candidates = sorted(candidates)
+        similarity = (np.stack([self._signatures[i] for i in candidates]) == signature).mean(axis=1)
+        matches = [
+            (self.keys[i], float(score)) for i, score in zip(candidates, similarity)
+            if score >= self.threshold
+        ]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def insert(self, key, text):
+        """Index a claim; returns False if the key is already indexed or the text is empty"""
+        signature = self.signature(text)
+        with self._lock:
+            if signature is None or key in self._positions:
+                return False
+            self._insert(key, signature)
+            return True
+
+    def query(self, text, exclude=None):
+        """Indexed claims similar to text as (key, similarity) pairs, most similar first"""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            return self._query(signature, exclude)
+
+    def check(self, key, text):
+        """Query for earlier near-duplicates of a claim, then index it
+
+        Re-checking an already indexed key never matches the claim itself.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            matches = self._query(signature, exclude=key)
+            if key not in self._positions:
+                self._insert(key, signature)
+            return matches
+
+    def truncate(self, length):
+        """Forget every claim indexed after the first length, e.g. past a checkpoint"""
+        with self._lock:
+            if length >= len(self.keys):
+                return
+            for position in range(length, len(self.keys)):
+                for bucket, band in zip(self._buckets, self._band_keys(self._signatures[position])):
+                    # Dropped claims sharing a band empty its bucket on the first pass
+                    if band not in bucket:
+                        continue
+                    kept = [i for i in bucket[band] if i < length]
+                    if kept:
+                        bucket[band] = kept
+                    else:
+                        del bucket[band]
+                del self._positions[self.keys[position]]
+            del self.keys[length:], self._signatures[length:]
+            self._dirty = True
+
+    def save(self, path=None, min_interval=0):
+        """Write the index to path (default: the path it was opened with)
+
+        With min_interval, a save to the index's own path is skipped if the
+        last one was less than min_interval seconds ago, so callers can save
+        after every claim without rewriting the whole index each time.
+        """
+        path = path or self.path
+        with self._lock:
+            if path == self.path and not self._dirty and os.path.exists(path):
+                return
+            if path == self.path and time.monotonic() - self._saved_at < min_interval:
+                return
+            signatures = (np.stack(self._signatures) if self._signatures
+                          else np.empty((0, self.num_perm), dtype=np.uint64))
+            # Write then rename so a crash never leaves a truncated index
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    keys=np.array(self.keys, dtype=str),
+                    signatures=signatures,
+                    a=self._a,
+                    b=self._b,
+                    params=np.array([self.threshold, self.num_perm, self.shingle_size]),
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            if path == self.path:
+                self._dirty = False
+                self._saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            threshold, num_perm, shingle_size = data['params']
+            index = cls(threshold=float(threshold), num_perm=int(num_perm),
+                        shingle_size=int(shingle_size), path=path)
+            index._a, index._b = data['a'], data['b']
+            for key, signature in zip(data['keys'].tolist(), data['signatures']):
+                index._insert(key, signature)
+        index._dirty = False
+        return index
+
+
+def candidate_stats(texts, sample=300, **index_kwargs):
+    """Candidate volume, flag rate and recall of the index on a list of claims
+
+    Recall is measured against exact shingle Jaccard over every pair among the
+    first sample claims.
+    """
+    index = DuplicateIndex(**index_kwargs)
+    candidates = 0
+    flagged = 0
+    for i, text in enumerate(texts):
+        signature = index.signature(text)
+        if signature is None:
+            continue
+        for bucket, band in zip(index._buckets, index._band_keys(signature)):
+            candidates += len(bucket.get(band, ()))
+        flagged += bool(index.check(str(i), text))
+
+    sets = [shingles(text, index.shingle_size) for text in texts[:sample]]
+    true_pairs = {
+        (i, j) for i in range(len(sets)) for j in range(i) if jaccard(sets[i], sets[j]) >= index.threshold
+    }
+    found_pairs = set()
+    sample_index = DuplicateIndex(**index_kwargs)
+    for i, text in enumerate(texts[:sample]):
+        found_pairs.update((i, int(key)) for key, _ in sample_index.check(str(i), text))
+
+    return {
+        'claims': len(texts),
+        'bands': index.bands,
+        'rows': index.rows,
+        'candidates_per_query': candidates / len(texts) if texts else 0.0,
+        'flagged_fraction': flagged / len(texts) if texts else 0.0,
+        'true_pairs': len(true_pairs),
+        'recall': len(true_pairs & found_pairs) / len(true_pairs) if true_pairs else 1.0,
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Near-duplicate index statistics for claims CSVs")
+    parser.add_argument('datasets', nargs='+', help="claims CSVs with a 'description' column")
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--num-perm', type=int, default=128)
+    parser.add_argument('--shingle-size', type=int, default=3)
+    parser.add_argument('--sample', type=int, default=300, help="claims used for the exact recall check")
+    args = parser.parse_args()
+
+    for path in args.datasets:
+        texts = pd.read_csv(path)['description'].tolist()
+        stats = candidate_stats(texts, sample=args.sample, threshold=args.threshold,
+                                num_perm=args.num_perm, shingle_size=args.shingle_size)
+        print(f"{path}: {stats['candidates_per_query']:.1f} candidates/query "
+              f"({stats['bands']} bands x {stats['rows']} rows), "
+              f"{stats['flagged_fraction']:.1%} flagged, recall {stats['recall']:.1%} "
+              f"on {stats['true_pairs']} pairs")
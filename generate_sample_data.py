@@ -23,150 +23,369 @@
 # df.to_csv('sample_claims.csv', index=False)
 # print("Sample claims data generated successfully!")
 # print(f"Created {len(df)} sample claims in 'sample_claims.csv'")
+import argparse
+import os
+import string
+import time
+from datetime import date, timedelta
+
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-def generate_insurance_claims(num_claims=500):
-    """
-    Generate diverse insurance claims dataset
-    """
-    
-    # Data pools for variety
-    cities = [
-        "Boston", "Cambridge", "Somerville", "Brookline", "Newton",
-        "Quincy", "Lynn", "Malden", "Medford", "Waltham",
-        "Worcester", "Springfield", "Lowell", "Providence", "Hartford"
-    ]
-    
-    streets = [
-        "Main St", "Oak Ave", "Elm Street", "Washington Blvd", "Park Ave",
-        "Broadway", "Maple Drive", "Cedar Lane", "Pine Road", "River Road",
-        "Lake Street", "Hill Ave", "Forest Drive", "Church St", "School Road",
-        "Highland Ave", "Union Street", "Pleasant St", "Spring St", "Summer St"
-    ]
-    
-    vehicles = [
-        "2019 Honda Accord", "2020 Toyota Camry", "2021 Tesla Model 3",
-        "2018 Ford F-150", "2022 BMW X5", "2020 Chevrolet Silverado",
-        "2019 Nissan Altima", "2021 Mazda CX-5", "2020 Subaru Outback",
-        "2018 Jeep Wrangler", "2022 Mercedes-Benz C-Class", "2019 Hyundai Elantra",
-        "2020 Kia Sorento", "2021 Volkswagen Jetta", "2019 Audi A4",
-        "2020 Lexus RX", "2021 Volvo XC90", "2018 Dodge Ram",
-        "2022 Acura MDX", "2020 GMC Sierra", "2019 Infiniti Q50"
-    ]
-    
-    parts = [
-        "driver side door", "rear bumper", "front bumper", "hood",
-        "passenger side", "trunk", "fender", "quarter panel",
-        "headlight", "tail light", "side mirror", "windshield"
+# Also the reference set for measuring vehicle extraction (see benchmark.py)
+VEHICLES = [
+    "2019 Honda Accord", "2020 Toyota Camry", "2021 Tesla Model 3",
+    "2018 Ford F-150", "2022 BMW X5", "2020 Chevrolet Silverado",
+    "2019 Nissan Altima", "2021 Mazda CX-5", "2020 Subaru Outback",
+    "2018 Jeep Wrangler", "2022 Mercedes-Benz C-Class", "2019 Hyundai Elantra",
+    "2020 Kia Sorento", "2021 Volkswagen Jetta", "2019 Audi A4",
+    "2020 Lexus RX", "2021 Volvo XC90", "2018 Dodge Ram",
+    "2022 Acura MDX", "2020 GMC Sierra", "2019 Infiniti Q50"
+]
+
+CITIES = [
+    "Boston", "Cambridge", "Somerville", "Brookline", "Newton",
+    "Quincy", "Lynn", "Malden", "Medford", "Waltham",
+    "Worcester", "Springfield", "Lowell", "Providence", "Hartford"
+]
+
+STREETS = [
+    "Main St", "Oak Ave", "Elm Street", "Washington Blvd", "Park Ave",
+    "Broadway", "Maple Drive", "Cedar Lane", "Pine Road", "River Road",
+    "Lake Street", "Hill Ave", "Forest Drive", "Church St", "School Road",
+    "Highland Ave", "Union Street", "Pleasant St", "Spring St", "Summer St"
+]
+
+PARTS = [
+    "driver side door", "rear bumper", "front bumper", "hood",
+    "passenger side", "trunk", "fender", "quarter panel",
+    "headlight", "tail light", "side mirror", "windshield"
+]
+
+LOCATION_KINDS = ['Mall', 'Plaza', 'Shopping Center', 'Parking Garage']
+AMOUNTS = ["50,000", "75,000", "100,000", "150,000", "200,000"]
+
+# Claim templates by severity
+TEMPLATES = {
+    'Low': [
+        "Minor parking lot incident on {date}. Small scratch on {part} of my {vehicle}. No injuries. Other party left contact information.",
+        "Windshield chip from road debris on {date} while driving on {street}. {vehicle}. Small chip needs repair before it spreads.",
+        "Shopping cart dent on {part} at {city} shopping center on {date}. {vehicle}. Superficial damage only.",
+        "Minor scrape on {part} while parking on {date} at {location}. {vehicle}. Paint transfer visible.",
+        "Small dent from hail storm on {date}. {vehicle} parked at {location}. {part} affected.",
+        "Broken {part} discovered on {date} at {location}. Likely vandalism while parked. {vehicle}.",
+        "Minor bumper contact in parking garage on {date}. {vehicle}. Both parties exchanged information.",
+        "Tire damage from pothole on {street} on {date}. {vehicle}. Tire needs replacement.",
+        "Small scratch along {part} noticed on {date}. Unknown cause. {vehicle} parked at {location}.",
+        "Bird damage to paint on hood on {date}. {vehicle}. Etching visible, needs touch-up."
+    ],
+
+    'Medium': [
+        "Rear-ended at intersection of {street1} and {street2} in {city} on {date}. My {vehicle} sustained moderate damage to {part}. Police report filed.",
+        "Side-swiped on highway near {city} on {date}. {vehicle} has damage to {part} and {part2}. Other driver cited for unsafe lane change.",
+        "Backed into pole in parking lot on {date} at {location}. {vehicle} has dent in {part}. My fault, estimated repair cost $3,500.",
+        "Hit by opening car door on {date} at {location}. Damage to {part} of my {vehicle}. Other party admitted fault.",
+        "Vehicle struck by falling branch during storm on {date}. {vehicle} has damage to {part} and windshield. Tree maintenance company notified.",
+        "Collision with deer on {street} near {city} on {date}. {vehicle} has front-end damage including {part} and {part2}. Police report available.",
+        "Hit and run while parked on {date} at {location}. {vehicle} has significant damage to {part}. Witnesses provided partial plate number.",
+        "Fender bender on {date} at {street1} in {city}. {vehicle} damage to {part}. Both drivers remained at scene.",
+        "Vehicle damaged by shopping cart blown by wind on {date}. {vehicle} has dents on {part}. Security footage available.",
+        "Minor collision at stoplight on {date}. {vehicle} bumped from behind. Damage to {part}."
+    ],
+
+    'High': [
+        "URGENT: Major collision on {date} at {street1} and {street2} in {city}. My {vehicle} was hit by driver who ran red light. Extensive damage to {part}, {part2}, and {part3}. Airbags deployed. Multiple injuries. Police and ambulance responded. Need immediate assistance.",
+        "Total loss - {vehicle} completely submerged during flooding on {street} near {city} on {date}. Water reached dashboard level. Engine and interior destroyed. Vehicle not drivable. Towing required.",
+        "Severe accident on highway near {city} on {date}. {vehicle} struck by semi-truck. Major damage to entire {part} side. Vehicle towed from scene. Hospital treatment required. Police report number {report_num}.",
+        "URGENT: House fire at {address} {street}, {city} on {date}. Kitchen completely destroyed. Smoke and fire damage throughout first floor. Estimated damage ${amount}. Fire department report available. Family displaced.",
+        "Devastating hail storm on {date} damaged {vehicle} and property. Multiple dents across hood, roof, and trunk. Windows cracked. Vehicle requires extensive repairs. Storm damage assessment needed.",
+        "Head-on collision on {street} near {city} on {date}. {vehicle} sustained catastrophic front-end damage. Engine likely destroyed. Airbags deployed. Emergency services on scene. Vehicle total loss.",
+        "My {vehicle} was struck by drunk driver on {date} at {location}. Extensive damage to {part}, {part2}, and frame. Police arrested other driver at scene. Vehicle likely totaled. Injuries sustained.",
+        "Tree fell on {vehicle} during severe storm on {date} at {address} {street}, {city}. Roof crushed, all windows broken. Vehicle not drivable. Major structural damage. Storm damage claim.",
+        "Multi-vehicle pileup on {date} on highway near {city}. {vehicle} sandwiched between two vehicles. Damage to front and rear including {part}, {part2}, {part3}. Major traffic incident with police investigation ongoing.",
+        "URGENT: {vehicle} stolen from {location} on {date}. Vehicle found abandoned three days later with severe damage. {part} and {part2} destroyed. Interior vandalized. Police report filed. Recovery investigation ongoing."
     ]
-    
-    # Claim templates by severity
-    templates = {
-        'Low': [
-            "Minor parking lot incident on {date}. Small scratch on {part} of my {vehicle}. No injuries. Other party left contact information.",
-            "Windshield chip from road debris on {date} while driving on {street}. {vehicle}. Small chip needs repair before it spreads.",
-            "Shopping cart dent on {part} at {city} shopping center on {date}. {vehicle}. Superficial damage only.",
-            "Minor scrape on {part} while parking on {date} at {location}. {vehicle}. Paint transfer visible.",
-            "Small dent from hail storm on {date}. {vehicle} parked at {location}. {part} affected.",
-            "Broken {part} discovered on {date} at {location}. Likely vandalism while parked. {vehicle}.",
-            "Minor bumper contact in parking garage on {date}. {vehicle}. Both parties exchanged information.",
-            "Tire damage from pothole on {street} on {date}. {vehicle}. Tire needs replacement.",
-            "Small scratch along {part} noticed on {date}. Unknown cause. {vehicle} parked at {location}.",
-            "Bird damage to paint on hood on {date}. {vehicle}. Etching visible, needs touch-up."
-        ],
-        
-        'Medium': [
-            "Rear-ended at intersection of {street1} and {street2} in {city} on {date}. My {vehicle} sustained moderate damage to {part}. Police report filed.",
-            "Side-swiped on highway near {city} on {date}. {vehicle} has damage to {part} and {part2}. Other driver cited for unsafe lane change.",
-            "Backed into pole in parking lot on {date} at {location}. {vehicle} has dent in {part}. My fault, estimated repair cost $3,500.",
-            "Hit by opening car door on {date} at {location}. Damage to {part} of my {vehicle}. Other party admitted fault.",
-            "Vehicle struck by falling branch during storm on {date}. {vehicle} has damage to {part} and windshield. Tree maintenance company notified.",
-            "Collision with deer on {street} near {city} on {date}. {vehicle} has front-end damage including {part} and {part2}. Police report available.",
-            "Hit and run while parked on {date} at {location}. {vehicle} has significant damage to {part}. Witnesses provided partial plate number.",
-            "Fender bender on {date} at {street1} in {city}. {vehicle} damage to {part}. Both drivers remained at scene.",
-            "Vehicle damaged by shopping cart blown by wind on {date}. {vehicle} has dents on {part}. Security footage available.",
-            "Minor collision at stoplight on {date}. {vehicle} bumped from behind. Damage to {part}."
-        ],
-        
-        'High': [
-            "URGENT: Major collision on {date} at {street1} and {street2} in {city}. My {vehicle} was hit by driver who ran red light. Extensive damage to {part}, {part2}, and {part3}. Airbags deployed. Multiple injuries. Police and ambulance responded. Need immediate assistance.",
-            "Total loss - {vehicle} completely submerged during flooding on {street} near {city} on {date}. Water reached dashboard level. Engine and interior destroyed. Vehicle not drivable. Towing required.",
-            "Severe accident on highway near {city} on {date}. {vehicle} struck by semi-truck. Major damage to entire {part} side. Vehicle towed from scene. Hospital treatment required. Police report number {report_num}.",
-            "URGENT: House fire at {address} {street}, {city} on {date}. Kitchen completely destroyed. Smoke and fire damage throughout first floor. Estimated damage ${amount}. Fire department report available. Family displaced.",
-            "Devastating hail storm on {date} damaged {vehicle} and property. Multiple dents across hood, roof, and trunk. Windows cracked. Vehicle requires extensive repairs. Storm damage assessment needed.",
-            "Head-on collision on {street} near {city} on {date}. {vehicle} sustained catastrophic front-end damage. Engine likely destroyed. Airbags deployed. Emergency services on scene. Vehicle total loss.",
-            "My {vehicle} was struck by drunk driver on {date} at {location}. Extensive damage to {part}, {part2}, and frame. Police arrested other driver at scene. Vehicle likely totaled. Injuries sustained.",
-            "Tree fell on {vehicle} during severe storm on {date} at {address} {street}, {city}. Roof crushed, all windows broken. Vehicle not drivable. Major structural damage. Storm damage claim.",
-            "Multi-vehicle pileup on {date} on highway near {city}. {vehicle} sandwiched between two vehicles. Damage to front and rear including {part}, {part2}, {part3}. Major traffic incident with police investigation ongoing.",
-            "URGENT: {vehicle} stolen from {location} on {date}. Vehicle found abandoned three days later with severe damage. {part} and {part2} destroyed. Interior vandalized. Police report filed. Recovery investigation ongoing."
-        ]
+}
+
+SEVERITIES = ['Low', 'Medium', 'High']
+DEFAULT_SEVERITY_MIX = {'Low': 0.60, 'Medium': 0.30, 'High': 0.10}
+
+# Neutral sentences (no rule keywords) appended to make claims longer
+DETAIL_SENTENCES = [
+    "Photos of the scene are attached.",
+    "The vehicle is covered under my current policy.",
+    "Please contact me by phone during business hours.",
+    "Repair estimates from two local shops are included.",
+    "This happened on my usual commute to work.",
+    "Weather conditions were clear at the time.",
+    "I can provide receipts for towing and the rental car.",
+    "My agent suggested filing the claim online.",
+    "A witness gave me their phone number at the scene.",
+    "I have been with this insurer for over ten years.",
+]
+
+# strftime formats for {date}; None means "N days ago"
+DATE_FORMATS = ["%B %d, %Y", "%m/%d/%Y", None]
+MAX_DAYS_AGO = 365
+
+# Near-duplicates keep the narrative of an earlier claim but redraw these
+NEAR_DUPLICATE_FIELDS = ('days_ago', 'date_format', 'address', 'report_num')
+
+COLUMNS = ['claim_id', 'description', 'actual_severity', 'filing_date']
+
+
+def _compile_template(template):
+    """(literal text, field name) pieces of a template, in order"""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+
+_COMPILED = [_compile_template(template) for severity in SEVERITIES for template in TEMPLATES[severity]]
+_TEMPLATE_COUNTS = np.array([len(TEMPLATES[severity]) for severity in SEVERITIES])
+_TEMPLATE_OFFSETS = np.concatenate([[0], np.cumsum(_TEMPLATE_COUNTS)[:-1]])
+
+
+def _pool(values):
+    return np.array(values, dtype=object)
+
+
+def _date_tables(reference_date):
+    """{date} strings per (format, days ago) and the matching ISO filing dates"""
+    days = [reference_date - timedelta(days=days_ago) for days_ago in range(MAX_DAYS_AGO + 1)]
+    table = np.array([
+        [day.strftime(fmt) if fmt else f"{days_ago} days ago" for days_ago, day in enumerate(days)]
+        for fmt in DATE_FORMATS
+    ], dtype=object)
+    return table, _pool([day.isoformat() for day in days])
+
+
+def _draw(rng, rows, severity_p, extra_sentences):
+    """Every random choice for a chunk of claims, as one integer array per field"""
+    severity = rng.choice(len(SEVERITIES), size=rows, p=severity_p)
+    template = _TEMPLATE_OFFSETS[severity] + (rng.random(rows) * _TEMPLATE_COUNTS[severity]).astype(np.int64)
+    extra = rng.poisson(extra_sentences, rows) if extra_sentences > 0 else np.zeros(rows, dtype=np.int64)
+    return {
+        'severity': severity,
+        'template': template,
+        'days_ago': rng.integers(1, MAX_DAYS_AGO + 1, rows),
+        'date_format': rng.integers(0, len(DATE_FORMATS), rows),
+        'vehicle': rng.integers(0, len(VEHICLES), rows),
+        'city': rng.integers(0, len(CITIES), rows),
+        'location_city': rng.integers(0, len(CITIES), rows),
+        'location_kind': rng.integers(0, len(LOCATION_KINDS), rows),
+        'street': rng.integers(0, len(STREETS), rows),
+        'street1': rng.integers(0, len(STREETS), rows),
+        'street2': rng.integers(0, len(STREETS), rows),
+        'part': rng.integers(0, len(PARTS), rows),
+        'part2': rng.integers(0, len(PARTS), rows),
+        'part3': rng.integers(0, len(PARTS), rows),
+        'address': rng.integers(100, 10000, rows),
+        'amount': rng.integers(0, len(AMOUNTS), rows),
+        'report_num': rng.integers(100000, 1000000, rows),
+        'extra': extra,
+        'detail': rng.integers(0, len(DETAIL_SENTENCES), (rows, int(extra.max(initial=0)))),
     }
-    
-    # Generate claims
-    claims_data = []
-    
-    for i in range(num_claims):
-        claim_id = f"CLM{i+1:05d}"
-        
-        # Determine severity (60% Low, 30% Medium, 10% High)
-        rand = random.random()
-        if rand < 0.60:
-            severity = 'Low'
-        elif rand < 0.90:
-            severity = 'Medium'
-        else:
-            severity = 'High'
-        
-        # Select random template
-        template = random.choice(templates[severity])
-        
-        # Generate random date (last 12 months)
-        days_ago = random.randint(1, 365)
-        claim_date = datetime.now() - timedelta(days=days_ago)
-        
-        # Format variations
-        date_formats = [
-            claim_date.strftime("%B %d, %Y"),
-            claim_date.strftime("%m/%d/%Y"),
-            f"{days_ago} days ago"
-        ]
-        
-        # Fill template
-        description = template.format(
-            date=random.choice(date_formats),
-            vehicle=random.choice(vehicles),
-            city=random.choice(cities),
-            location=f"{random.choice(cities)} {random.choice(['Mall', 'Plaza', 'Shopping Center', 'Parking Garage'])}",
-            street=random.choice(streets),
-            street1=random.choice(streets),
-            street2=random.choice(streets),
-            part=random.choice(parts),
-            part2=random.choice([p for p in parts]),
-            part3=random.choice([p for p in parts]),
-            address=random.randint(100, 9999),
-            amount=random.choice(["50,000", "75,000", "100,000", "150,000", "200,000"]),
-            report_num=f"RPT{random.randint(100000, 999999)}"
-        )
-        
-        claims_data.append({
-            'claim_id': claim_id,
-            'description': description,
-            'actual_severity': severity,
-            'filing_date': claim_date.strftime("%Y-%m-%d")
+
+
+def _copy_earlier(rng, draws, duplicate_rate, near_duplicate_rate):
+    """Turn some claims into (near-)copies of earlier original claims in the chunk"""
+    rows = len(draws['template'])
+    kind = rng.random(rows)
+    exact = kind < duplicate_rate
+    near = ~exact & (kind < duplicate_rate + near_duplicate_rate)
+    exact[0] = near[0] = False
+    copies = exact | near
+    if not copies.any():
+        return
+
+    # Each copy picks uniformly among the originals before it (row 0 always is one)
+    originals = np.flatnonzero(~copies)
+    before = np.searchsorted(originals, np.arange(rows))
+    source = originals[(rng.random(rows) * before).astype(np.int64)]
+    for name, values in draws.items():
+        target = exact if name in NEAR_DUPLICATE_FIELDS else copies
+        values[target] = values[source[target]]
+
+
+def _render(draws, date_table):
+    """Fill the drawn templates, one vectorized string concatenation per template piece"""
+    location = _pool(CITIES)[draws['location_city']] + ' ' + _pool(LOCATION_KINDS)[draws['location_kind']]
+    fields = {
+        'date': date_table[draws['date_format'], draws['days_ago']],
+        'vehicle': _pool(VEHICLES)[draws['vehicle']],
+        'city': _pool(CITIES)[draws['city']],
+        'location': location,
+        'street': _pool(STREETS)[draws['street']],
+        'street1': _pool(STREETS)[draws['street1']],
+        'street2': _pool(STREETS)[draws['street2']],
+        'part': _pool(PARTS)[draws['part']],
+        'part2': _pool(PARTS)[draws['part2']],
+        'part3': _pool(PARTS)[draws['part3']],
+        'address': draws['address'].astype(str).astype(object),
+        'amount': _pool(AMOUNTS)[draws['amount']],
+        'report_num': 'RPT' + draws['report_num'].astype(str).astype(object),
+    }
+
+    descriptions = np.empty(len(draws['template']), dtype=object)
+    for template, pieces in enumerate(_COMPILED):
+        rows = np.flatnonzero(draws['template'] == template)
+        if not rows.size:
+            continue
+        text = np.full(rows.size, '', dtype=object)
+        for literal, field in pieces:
+            if literal:
+                text = text + literal
+            if field is not None:
+                text = text + fields[field][rows]
+        descriptions[rows] = text
+
+    details = _pool(DETAIL_SENTENCES)
+    for j in range(draws['detail'].shape[1]):
+        rows = np.flatnonzero(draws['extra'] > j)
+        descriptions[rows] = descriptions[rows] + ' ' + details[draws['detail'][rows, j]]
+    return descriptions
+
+
+def generate_claim_chunks(num_claims, chunk_size=100_000, seed=None, severity_mix=None,
+                          extra_sentences=0.0, duplicate_rate=0.0, near_duplicate_rate=0.0,
+                          reference_date=None):
+    """
+    Yield synthetic claims as DataFrames of at most chunk_size rows
+
+    All random choices of a chunk are drawn with NumPy at once and the
+    templates are filled column-wise, so memory stays bounded by the chunk.
+    The same seed, chunk_size and reference_date give the same corpus.
+
+    severity_mix: relative weight per severity (default 60/30/10 Low/Medium/High)
+    extra_sentences: mean number of neutral detail sentences appended (Poisson)
+    duplicate_rate: fraction of claims repeating an earlier claim's description
+    near_duplicate_rate: fraction repeating an earlier narrative with a new
+        date, address and report number
+    """
+    severity_mix = severity_mix or DEFAULT_SEVERITY_MIX
+    unknown = set(severity_mix) - set(SEVERITIES)
+    if unknown:
+        raise ValueError(f"Unknown severities in severity_mix: {sorted(unknown)}")
+    weights = np.array([severity_mix.get(severity, 0.0) for severity in SEVERITIES], dtype=float)
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("severity_mix needs non-negative weights with a positive total")
+    if not 0 <= duplicate_rate + near_duplicate_rate <= 1 or min(duplicate_rate, near_duplicate_rate) < 0:
+        raise ValueError("duplicate_rate and near_duplicate_rate must be non-negative and sum to at most 1")
+
+    rng = np.random.default_rng(seed)
+    date_table, filing_dates = _date_tables(reference_date or date.today())
+    severities = _pool(SEVERITIES)
+
+    for start in range(0, num_claims, chunk_size):
+        rows = min(chunk_size, num_claims - start)
+        draws = _draw(rng, rows, weights / weights.sum(), extra_sentences)
+        _copy_earlier(rng, draws, duplicate_rate, near_duplicate_rate)
+
+        numbers = np.char.zfill(np.arange(start + 1, start + rows + 1).astype(str), 5)
+        yield pd.DataFrame({
+            'claim_id': 'CLM' + numbers.astype(object),
+            'description': _render(draws, date_table),
+            'actual_severity': severities[draws['severity']],
+            'filing_date': filing_dates[draws['days_ago']],
         })
-    
-    return pd.DataFrame(claims_data)
+
+
+def generate_insurance_claims(num_claims=500, seed=None, **options):
+    """
+    Generate diverse insurance claims dataset (see generate_claim_chunks for options)
+    """
+    chunks = list(generate_claim_chunks(num_claims, seed=seed, **options))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def generate_long_claim(num_chars, seed=None, claims_per_paragraph=4, extra_sentences=2.0):
+    """One multi-page narrative of about num_chars characters, e.g. for long-document benchmarks
+
+    Generated claims with extra detail sentences strung into paragraphs, the
+    way an adjuster's notes or a pasted police report read. Cut at the last
+    sentence end before num_chars.
+    """
+    # Descriptions average ~230 characters with two extra sentences; 100 is a safe floor
+    texts = generate_insurance_claims(num_chars // 100 + 1, seed=seed,
+                                      extra_sentences=extra_sentences)['description'].tolist()
+    narrative = '\n\n'.join(
+        ' '.join(texts[start:start + claims_per_paragraph])
+        for start in range(0, len(texts), claims_per_paragraph)
+    )
+    end = narrative.rfind('.', 0, num_chars) + 1
+    return narrative[:end] if end else narrative[:num_chars]
+
+
+def write_claims(path, num_claims, chunk_size=100_000, **options):
+    """Stream a synthetic corpus to a .csv or .parquet file chunk by chunk; returns rows written"""
+    written = 0
+    writer = None
+    try:
+        for chunk in generate_claim_chunks(num_claims, chunk_size=chunk_size, **options):
+            if path.endswith('.parquet'):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def parse_severity_mix(value):
+    """'Low=0.6,Medium=0.3,High=0.1' -> {'Low': 0.6, ...}"""
+    mix = {}
+    for item in value.split(','):
+        severity, _, weight = item.partition('=')
+        mix[severity.strip()] = float(weight)
+    return mix
 
 
 # Generate datasets
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic insurance claims")
+    parser.add_argument('--output', help="stream a corpus to this .csv or .parquet file instead of the demo datasets")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="claims to write with --output")
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--severity-mix', type=parse_severity_mix, default=None,
+                        help="e.g. 'Low=0.6,Medium=0.3,High=0.1'")
+    parser.add_argument('--extra-sentences', type=float, default=0.0,
+                        help="mean number of detail sentences appended to each claim")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--near-duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--reference-date', type=date.fromisoformat, default=None,
+                        help="date claims are dated back from (default: today)")
+    args = parser.parse_args()
+
+    options = dict(
+        seed=args.seed,
+        severity_mix=args.severity_mix,
+        extra_sentences=args.extra_sentences,
+        duplicate_rate=args.duplicate_rate,
+        near_duplicate_rate=args.near_duplicate_rate,
+        reference_date=args.reference_date,
+    )
+    if args.output:
+        start = time.perf_counter()
+        written = write_claims(args.output, args.rows, chunk_size=args.chunk_size, **options)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(args.output) / 1e6
+        print(f"Wrote {written} claims to {args.output} ({size_mb:.1f} MB) in {elapsed:.1f}s "
+              f"({written / elapsed * 60 / 1e6:.2f}M rows/minute)")
+        raise SystemExit
+
     print("Generating insurance claims datasets...\n")
     
     # Generate sample_claims.csv (for app demo)
     print("Generating sample_claims.csv (50 claims for demo)...")
-    df_demo = generate_insurance_claims(50)
+    df_demo = generate_insurance_claims(50, **options)
     df_demo.to_csv('sample_claims.csv', index=False)
     print(f"  Created: sample_claims.csv")
     print(f"  Total claims: {len(df_demo)}")
@@ -186,7 +405,7 @@ if __name__ == "__main__":
     
     for name, size in sizes.items():
         print(f"Generating {name} dataset ({size} claims)...")
-        df = generate_insurance_claims(size)
+        df = generate_insurance_claims(size, **options)
         filename = f'claims_{name}_{size}.csv'
         df.to_csv(filename, index=False)
         
@@ -0,0 +1,367 @@
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+
+from sentiment import json_default
+
+from model import (
+    DEFAULT_NLP_PROFILE, DEFAULT_SENTIMENT_BACKEND, NLP_PROFILES, SENTIMENT_BACKENDS, ClaimsAnalyzer,
+)
+
+PATTERNS = ('*.csv', '*.jsonl')
+# Files still being written by the intake process use one of these suffixes
+IGNORED_SUFFIXES = ('.tmp', '.part', '.partial')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    inode INTEGER,
+    offset INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    header TEXT,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    claim_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    analyzed_at REAL NOT NULL
+);
+"""
+# Columns added to files since the first release, for databases created before them
+_ADDED_FILE_COLUMNS = {
+    'skipped': "INTEGER NOT NULL DEFAULT 0",
+    'error': "TEXT",
+}
+
+
+class _CountingLines:
+    """Iterate decoded lines while tracking how many bytes have been handed out"""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self.consumed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._lines)
+        self.consumed += len(line)
+        return line.decode('utf-8')
+
+
+def _complete_lines(data):
+    # A trailing line without a newline may still be being written
+    end = data.rfind(b'\n') + 1
+    return data[:end].splitlines(keepends=True)
+
+
+def parse_csv_block(data, header=None):
+    """Complete CSV records in a block of bytes
+
+    Returns (header, records, consumed) where records are (fields, end_offset)
+    pairs and consumed is the byte length of everything that was parsed. A
+    quoted record that is cut off at the end of the block is left for later.
+    """
+    lines = _CountingLines(_complete_lines(data))
+    reader = csv.reader(lines, strict=True)
+    records = []
+    consumed = 0
+    try:
+        if header is None:
+            header = next(reader, None)
+            consumed = lines.consumed
+        for fields in reader:
+            records.append((fields, lines.consumed))
+            consumed = lines.consumed
+    except csv.Error:
+        # Unterminated quoted field: the rest of the record hasn't arrived yet
+        pass
+    return header, records, consumed
+
+
+def parse_jsonl_block(data):
+    """Complete JSON lines in a block of bytes as (record, end_offset) pairs
+
+    Lines that aren't valid JSON objects become None so the caller can skip
+    them without stalling the file.
+    """
+    records = []
+    consumed = 0
+    for line in _complete_lines(data):
+        consumed += len(line)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        records.append((record if isinstance(record, dict) else None, consumed))
+    return records, consumed
+
+
+class IngestDaemon:
+    """Watch a directory and analyze every new claim appended to CSV/JSONL files in it
+
+    Each file's byte offset, row count and CSV header are checkpointed in a
+    SQLite database, in the same transaction as the results of the claims up
+    to that offset. Results are keyed by claim_id, so claims that were
+    already analyzed (e.g. re-read after a crash or a replaced file) are
+    skipped without running the models again. Files without a claim_id
+    column get '<file name>:<row>' ids.
+
+    Records without a description (and malformed JSON lines) are counted as
+    skipped; a CSV file without a description column is marked failed and
+    left alone until it changes. See file_status.
+    """
+
+    def __init__(self, watch_dir, db_path, analyzer=None, chunk_size=256, batch_size=32,
+                 poll_interval=2.0, block_bytes=8 * 1024 * 1024, patterns=PATTERNS):
+        self.watch_dir = watch_dir
+        self.analyzer = analyzer or ClaimsAnalyzer()
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.block_bytes = block_bytes
+        self.patterns = patterns
+        self._stop = threading.Event()
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(files)")}
+        for column, definition in _ADDED_FILE_COLUMNS.items():
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE files ADD COLUMN {column} {definition}")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def stop(self):
+        """Ask run() to return after the current poll"""
+        self._stop.set()
+
+    def run(self, on_poll=None):
+        """Poll until stop() is called; on_poll receives {path: new claims} after each poll"""
+        while not self._stop.is_set():
+            processed = self.poll_once()
+            if on_poll is not None:
+                on_poll(processed)
+            self._stop.wait(self.poll_interval)
+
+    def candidate_files(self):
+        names = []
+        for entry in os.scandir(self.watch_dir):
+            if not entry.is_file() or entry.name.startswith('.') or entry.name.endswith(IGNORED_SUFFIXES):
+                continue
+            if any(fnmatch.fnmatch(entry.name, pattern) for pattern in self.patterns):
+                names.append(entry.path)
+        return sorted(names)
+
+    def poll_once(self):
+        """Analyze whatever is new in the watched files; returns {path: claims analyzed}"""
+        processed = {}
+        for path in self.candidate_files():
+            count = self.ingest_file(path)
+            if count:
+                processed[path] = count
+        return processed
+
+    def _checkpoint(self, path):
+        row = self._db.execute(
+            "SELECT inode, offset, rows, header, skipped, error FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None, 0, 0, None, 0, None
+        inode, offset, rows, header, skipped, error = row
+        return inode, offset, rows, json.loads(header) if header else None, skipped, error
+
+    def ingest_file(self, path):
+        """Analyze the unseen claims of one file; returns how many were analyzed"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        inode, offset, rows, header, skipped, error = self._checkpoint(path)
+        if inode != stat.st_ino or stat.st_size < offset or (error is not None and stat.st_size != offset):
+            # Replaced, truncated or a failed file that changed: read it again,
+            # already analyzed claim_ids are skipped
+            offset, rows, header, skipped, error = 0, 0, None, 0, None
+        if stat.st_size == offset:
+            return 0
+
+        analyzed = 0
+        block_bytes = self.block_bytes
+        with open(path, 'rb') as f:
+            while not self._stop.is_set():
+                f.seek(offset)
+                data = f.read(block_bytes)
+                if not data:
+                    break
+                claims, consumed, header, block_rows, block_skipped = self._parse(path, data, offset, rows, header)
+                if header is not None and 'description' not in header:
+                    # Checkpointed at the end of the file, so it is only retried once it changes
+                    error = f"No 'description' column in header {header}"
+                    self._save_checkpoint(path, stat.st_ino, stat.st_size, rows, header, skipped, error)
+                    break
+                if not consumed:
+                    if len(data) < block_bytes:
+                        break
+                    # A single record longer than the block: read a bigger one
+                    block_bytes *= 2
+                    continue
+                block_bytes = self.block_bytes
+                for start in range(0, len(claims), self.chunk_size):
+                    chunk = claims[start:start + self.chunk_size]
+                    analyzed += self._analyze_chunk(path, chunk)
+                    self._save_checkpoint(path, stat.st_ino, chunk[-1]['end'], chunk[-1]['row'], header,
+                                          skipped + chunk[-1]['skipped'])
+                    if self._stop.is_set() and start + self.chunk_size < len(claims):
+                        # Resume after the last checkpointed claim rather than finishing the block
+                        return analyzed
+                offset += consumed
+                # Every line of the block, including skipped ones after the last claim
+                rows, skipped = block_rows, skipped + block_skipped
+                # Also covers blocks with only a header, blank or malformed lines
+                self._save_checkpoint(path, stat.st_ino, offset, rows, header, skipped)
+        return analyzed
+
+    def _parse(self, path, data, offset, rows, header):
+        """(claims, consumed, header, rows, skipped) for a block; rows counts every record read"""
+        name = os.path.basename(path)
+        claims = []
+        skipped = 0
+        if path.endswith('.jsonl'):
+            records, consumed = parse_jsonl_block(data)
+        else:
+            header, records, consumed = parse_csv_block(data, header)
+            records = [(dict(zip(header, fields)), end) for fields, end in records]
+        for record, end in records:
+            rows += 1
+            if record is not None and record.get('description') is not None:
+                claims.append(self._claim(name, rows, record, offset + end))
+                # Skipped so far in this block, for checkpoints taken at this claim
+                claims[-1]['skipped'] = skipped
+            else:
+                skipped += 1
+        return claims, consumed, header, rows, skipped
+
+    @staticmethod
+    def _claim(name, row, record, end):
+        claim_id = record.get('claim_id')
+        if claim_id in (None, ''):
+            claim_id = f'{name}:{row}'
+        return {'claim_id': str(claim_id), 'description': str(record['description']), 'row': row, 'end': end}
+
+    def _analyze_chunk(self, path, chunk):
+        ids = list(dict.fromkeys(claim['claim_id'] for claim in chunk))
+        placeholders = ','.join('?' * len(ids))
+        done = {
+            row[0] for row in
+            self._db.execute(f"SELECT claim_id FROM results WHERE claim_id IN ({placeholders})", ids)
+        }
+        pending = []
+        for claim in chunk:
+            if claim['claim_id'] not in done:
+                done.add(claim['claim_id'])
+                pending.append(claim)
+        if not pending:
+            return 0
+
+        results = self.analyzer.analyze_claims(
+            [claim['description'] for claim in pending],
+            batch_size=self.batch_size,
+            claim_ids=[claim['claim_id'] for claim in pending],
+        )
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR IGNORE INTO results (claim_id, source, row, result, analyzed_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (claim['claim_id'], path, claim['row'], json.dumps(result, default=json_default), now)
+                for claim, result in zip(pending, results)
+            ],
+        )
+        # Committed together with the file offset in _save_checkpoint
+        return len(pending)
+
+    def _save_checkpoint(self, path, inode, offset, rows, header, skipped=0, error=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (path, inode, offset, rows, header, skipped, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, inode, offset, rows, json.dumps(header) if header is not None else None, skipped, error),
+        )
+        self._db.commit()
+
+    def file_status(self, path):
+        """{'rows', 'skipped', 'error'} of a watched file, or None if it hasn't been read"""
+        row = self._db.execute("SELECT rows, skipped, error FROM files WHERE path = ?", (path,)).fetchone()
+        return dict(zip(('rows', 'skipped', 'error'), row)) if row else None
+
+    def failed_files(self):
+        """{path: error} for the files that can't be ingested"""
+        return dict(self._db.execute("SELECT path, error FROM files WHERE error IS NOT NULL"))
+
+    def result(self, claim_id):
+        """Stored result for a claim_id, or None if it hasn't been analyzed"""
+        row = self._db.execute("SELECT result FROM results WHERE claim_id = ?", (claim_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a directory and analyze new claims as they arrive")
+    parser.add_argument('watch_dir', help="directory that receives claim CSV/JSONL files")
+    parser.add_argument('--db', default='ingest.sqlite', help="results and checkpoint database")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="seconds between directory scans")
+    parser.add_argument('--chunk-size', type=int, default=256, help="claims per checkpoint")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--once', action='store_true', help="process what is there now and exit")
+    parser.add_argument('--nlp-profile', choices=sorted(NLP_PROFILES), default=DEFAULT_NLP_PROFILE)
+    parser.add_argument('--lazy-sentiment', action='store_true',
+                        help="only run sentiment where it can change the severity decision")
+    parser.add_argument('--sentiment-backend', choices=sorted(SENTIMENT_BACKENDS),
+                        default=DEFAULT_SENTIMENT_BACKEND)
+    args = parser.parse_args()
+
+    analyzer = ClaimsAnalyzer(
+        nlp_profile=args.nlp_profile,
+        sentiment_backend=args.sentiment_backend,
+        sentiment_mode='lazy' if args.lazy_sentiment else 'eager',
+    )
+    analyzer.warmup()
+    daemon = IngestDaemon(args.watch_dir, args.db, analyzer=analyzer, chunk_size=args.chunk_size,
+                          batch_size=args.batch_size, poll_interval=args.poll_interval)
+
+    reported_failures = set()
+
+    def report(processed):
+        for path, count in processed.items():
+            print(f"Analyzed {count} new claims from {path}", flush=True)
+        for path, error in daemon.failed_files().items():
+            if (path, error) not in reported_failures:
+                reported_failures.add((path, error))
+                print(f"Skipping {path}: {error}", file=sys.stderr, flush=True)
+
+    try:
+        if args.once:
+            report(daemon.poll_once())
+        else:
+            # Finish the chunk in flight and checkpoint it before exiting
+            signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+            signal.signal(signal.SIGINT, lambda *_: daemon.stop())
+            print(f"Watching {args.watch_dir} (results in {args.db})", flush=True)
+            daemon.run(on_poll=report)
+    finally:
+        daemon.close()
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from results import ResultTable
+
+
+def job_id_for(data, version):
+    """Key a batch job by the uploaded file's bytes and the analyzer version"""
+    digest = hashlib.sha256()
+    digest.update(version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(data)
+    return digest.hexdigest()[:24]
+
+
+class BatchJob:
+    """A batch analysis running in the background, filling a ResultTable per chunk
+
+    Uploaded files often reuse claim ids (CLM001, ...), so near-duplicate
+    checks key claims as '<source>:<claim_id>', source defaulting to the job id.
+    """
+
+    def __init__(self, job_id, claim_ids, texts, source=None):
+        self.job_id = job_id
+        self.source = source or job_id
+        self.claim_ids = list(claim_ids)
+        self.texts = list(texts)
+        self.table = ResultTable()
+        self.status = 'pending'
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.texts)
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def progress(self):
+        return len(self.table) / self.total if self.total else 1.0
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns False on timeout"""
+        return self._finished.wait(timeout)
+
+    def snapshot(self):
+        """Arrow table of the results so far, safe to read while the job is still running"""
+        with self._lock:
+            return self.table.to_arrow()
+
+    def run(self, analyzer, chunk_size):
+        self.status = 'running'
+        self.started = time.time()
+        try:
+            for start in range(0, self.total, chunk_size):
+                chunk = self.texts[start:start + chunk_size]
+                claim_ids = self.claim_ids[start:start + chunk_size]
+                results = list(analyzer.analyze_claims(
+                    chunk, batch_size=min(chunk_size, 32),
+                    claim_ids=[f'{self.source}:{claim_id}' for claim_id in claim_ids],
+                ))
+                with self._lock:
+                    self.table.extend(claim_ids, results)
+            self.status = 'done'
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.status = 'failed'
+        finally:
+            self.finished = time.time()
+            self._finished.set()
+
+
+class JobManager:
+    """Runs batch jobs on a background thread and keeps recent ones for reuse
+
+    Submitting a job id that is already running or finished returns the
+    existing job instead of analyzing the file again.
+    """
+
+    def __init__(self, analyzer, chunk_size=64, max_jobs=8, workers=1):
+        self.analyzer = analyzer
+        self.chunk_size = chunk_size
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-job')
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, job_id, claim_ids, texts, source=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != 'failed':
+                self._jobs.move_to_end(job_id)
+                return job
+
+            job = BatchJob(job_id, claim_ids, texts, source)
+            self._jobs[job_id] = job
+            self._evict()
+        self._executor.submit(job.run, self.analyzer, self.chunk_size)
+        return job
+
+    def _evict(self):
+        # Drop the oldest finished jobs; never drop one that is still running
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
@@ -0,0 +1,84 @@
+import json
+import re
+from collections import namedtuple
+
+
+KeywordHit = namedtuple('KeywordHit', ['keyword', 'category', 'start', 'end'])
+
+
+class KeywordMatcher:
+    """Match every configured keyword against a claim in a single regex pass
+
+    All keywords are compiled into one case-insensitive alternation anchored
+    on word boundaries, so 'chip' no longer matches inside 'chipped'. A keyword
+    listed under several categories produces one hit per category. The compiled
+    regex is exposed as .pattern (None when there are no keywords).
+    """
+
+    def __init__(self, keyword_sets):
+        self.keyword_sets = {
+            category: [self._normalize(keyword) for keyword in keywords]
+            for category, keywords in keyword_sets.items()
+        }
+
+        self._categories = {}
+        for category, keywords in self.keyword_sets.items():
+            for keyword in keywords:
+                self._categories.setdefault(keyword, [])
+                if category not in self._categories[keyword]:
+                    self._categories[keyword].append(category)
+
+        # IGNORECASE also matches case-folded spellings ('ſtolen'), so look hits up by casefold
+        self._canonical = {keyword.casefold(): keyword for keyword in self._categories}
+
+        # Longest keywords first so 'total loss' wins over any shorter prefix
+        alternatives = sorted(self._categories, key=len, reverse=True)
+        if alternatives:
+            body = '|'.join(r'\s+'.join(map(re.escape, keyword.split())) for keyword in alternatives)
+            self.pattern = re.compile(r'\b(?:' + body + r')\b', re.IGNORECASE)
+        else:
+            self.pattern = None
+
+    @staticmethod
+    def _normalize(keyword):
+        return ' '.join(keyword.lower().split())
+
+    def canonical(self, matched_text):
+        """Configured keyword that a piece of matched text corresponds to"""
+        return self._canonical[self._normalize(matched_text).casefold()]
+
+    def find(self, text):
+        """Return every keyword hit in text, ordered by offset"""
+        if self.pattern is None:
+            return []
+
+        hits = []
+        for match in self.pattern.finditer(text):
+            keyword = self.canonical(match.group())
+            for category in self._categories[keyword]:
+                hits.append(KeywordHit(keyword, category, match.start(), match.end()))
+        return hits
+
+    @staticmethod
+    def matched(hits, category):
+        """Distinct keywords of one category found in a list of hits"""
+        return {hit.keyword for hit in hits if hit.category == category}
+
+
+def load_keyword_config(path):
+    """Load keyword lists from a JSON file
+
+    Expected layout (every key is optional):
+        {
+            "fraud": ["stolen", ...],
+            "retraction": ["false alarm", ...],
+            "urgency": ["urgent", ...],
+            "severity": {"high": [...], "medium": [...], "low": [...]}
+        }
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    if not isinstance(config, dict):
+        raise ValueError(f"Keyword config {path} must contain a JSON object")
+    return config
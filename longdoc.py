@@ -0,0 +1,123 @@
+import re
+
+# A sentence ends at terminal punctuation (plus any closing quotes/brackets)
+# followed by whitespace, or at a blank line
+_SENTENCE_BREAK = re.compile(r'[.!?]["\')\]]*\s+|\n\s*\n')
+_WORD = re.compile(r'\S+\s*')
+_NON_SPACE = re.compile(r'\S+')
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+def sentence_spans(text):
+    """(start, end) character spans of the sentences of text, trailing whitespace included"""
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        yield start, match.end()
+        start = match.end()
+    if start < len(text):
+        yield start, len(text)
+
+
+def count_words(text):
+    """len(text.split()) without building the list of words"""
+    return sum(1 for _ in _NON_SPACE.finditer(text))
+
+
+def char_counts(texts):
+    return [len(text) for text in texts]
+
+
+def estimated_tokens(texts):
+    """Rough word-piece counts for models without a tokenizer (about 1.3 per word)"""
+    return [int(len(_TOKEN.findall(text)) * 1.3) + 1 for text in texts]
+
+
+def token_counter(model):
+    """Function giving the model's token count for each of a list of texts"""
+    return getattr(model, 'count_tokens', estimated_tokens)
+
+
+def _split_sentence(text, words, limit, count):
+    # Halve an oversized sentence at word boundaries until every piece fits
+    start, end = words[0][0], words[-1][1]
+    size = count([text[start:end]])[0]
+    if len(words) == 1 or size <= limit:
+        yield start, end, size
+        return
+    middle = len(words) // 2
+    yield from _split_sentence(text, words[:middle], limit, count)
+    yield from _split_sentence(text, words[middle:], limit, count)
+
+
+def pack_windows(text, limit, count=char_counts, block=256):
+    """Consecutive sentence-aligned (start, end, size) windows of text with size <= limit
+
+    Sentences are packed greedily; count maps a list of strings to their sizes
+    (characters by default, or model tokens) and is called on blocks of
+    sentences, so a tokenizer sees batches while only one block is held. A
+    sentence over the limit on its own is split at whitespace.
+    """
+    spans = sentence_spans(text)
+    window_start = window_end = window_size = 0
+    while True:
+        spans_block = [span for _, span in zip(range(block), spans)]
+        if not spans_block:
+            break
+        sizes = count([text[start:end] for start, end in spans_block])
+        for (start, end), size in zip(spans_block, sizes):
+            if window_size and window_size + size > limit:
+                yield window_start, window_end, window_size
+                window_size = 0
+            if size > limit:
+                words = [match.span() for match in _WORD.finditer(text, start, end)]
+                yield from _split_sentence(text, words, limit, count) if words else [(start, end, size)]
+                continue
+            if not window_size:
+                window_start = start
+            window_end = end
+            window_size += size
+    if window_size:
+        yield window_start, window_end, window_size
+
+
+def aggregate_sentiment(results, weights):
+    """Combine window sentiments into one {'label', 'score'}, weighted by window length
+
+    Labels are binary (SST-2), so each window gives a probability of
+    POSITIVE; the weighted mean decides the label, so a short polite closing
+    doesn't outvote pages describing the damage.
+    """
+    total = sum(weights)
+    positive = sum(
+        weight * (result['score'] if result['label'] == 'POSITIVE' else 1 - result['score'])
+        for result, weight in zip(results, weights)
+    ) / total
+    if positive >= 0.5:
+        return {'label': 'POSITIVE', 'score': float(positive)}
+    return {'label': 'NEGATIVE', 'score': float(1 - positive)}
+
+
+def windowed_sentiment(text, model, batch_size=32, max_tokens=None):
+    """Sentiment of a text longer than the model's limit, from all of its windows
+
+    Windows are sentence-aligned and fit the model's token limit (less the
+    [CLS]/[SEP] tokens); they go to the model batch_size at a time and are
+    combined with aggregate_sentiment.
+    """
+    max_tokens = max_tokens or getattr(model, 'max_length', 512) - 2
+    results, weights, batch = [], [], []
+
+    def flush():
+        results.extend(model(batch, batch_size=batch_size))
+        batch.clear()
+
+    for start, end, size in pack_windows(text, max_tokens, token_counter(model)):
+        batch.append(text[start:end])
+        weights.append(max(size, 1))
+        if len(batch) == batch_size:
+            flush()
+    if batch:
+        flush()
+    if not results:
+        return model([text])[0]
+    return aggregate_sentiment(results, weights)
@@ -1,14 +1,258 @@
-import spacy
-from transformers import pipeline
-import re
+import hashlib
+import json
+import os
+import threading
+import time
 from datetime import datetime
+from functools import partial
+from itertools import islice
 
-# Load models - no auto-download needed
-nlp = spacy.load("en_core_web_sm")
-sentiment_analyzer = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+from artifacts import artifact_key
+from cache import cache_key
+from keywords import KeywordMatcher, load_keyword_config
+from longdoc import count_words, pack_windows, windowed_sentiment
+from metrics import BATCH_BUCKETS, LENGTH_BUCKETS
+from sentiment import (
+    DEFAULT_SENTIMENT_BACKEND, SENTIMENT_BACKENDS, SENTIMENT_MODEL, LazySentiment, load_sentiment_backend,
+)
 
-class ClaimsAnalyzer:
+# Bump when analysis logic changes in a way that invalidates cached results
+ANALYZER_VERSION = '4'
+NLP_MODEL = 'en_core_web_sm'
+
+# spaCy pipeline profiles. The analyzer only reads doc.ents and doc.sents, so
+# the tagger, lemmatizer and dependency parser are dead weight outside 'full'.
+NLP_PROFILES = {
+    # Every en_core_web_sm component, sentences from the dependency parser
+    'full': {'exclude': [], 'enable': [], 'add': []},
+    # NER plus the statistical sentence recognizer that shares its tok2vec
+    'fast': {
+        'exclude': ['tagger', 'parser', 'attribute_ruler', 'lemmatizer'],
+        'enable': ['senter'],
+        'add': [],
+    },
+    # NER only, with punctuation-based sentence splitting
+    'minimal': {
+        'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter'],
+        'enable': [],
+        'add': ['sentencizer'],
+    },
+}
+DEFAULT_NLP_PROFILE = 'full'
+
+# 'eager' always runs sentiment; 'lazy' runs it only when the severity decision
+# depends on it and otherwise returns a LazySentiment computed on first read.
+# With the 'hashing' severity backend sentiment never decides, so it is always lazy.
+SENTIMENT_MODES = ('eager', 'lazy')
+
+# 'rules' is the keyword + sentiment decision in ClaimsAnalyzer.classify_severity;
+# 'hashing' is a trained severity_model.HashingSeverityModel
+SEVERITY_BACKENDS = ('rules', 'hashing')
+DEFAULT_SEVERITY_BACKEND = 'rules'
+DEFAULT_SEVERITY_MODEL_PATH = os.environ.get('CLAIMS_SEVERITY_MODEL', 'severity_model.joblib')
+
+# Claims longer than this many characters (about 400 words, where DistilBERT's
+# 512 tokens start to truncate) are parsed in sentence-aligned windows of at
+# most this size, and their sentiment combines every token-limited window
+LONG_DOCUMENT_CHARS = 2000
+
+
+class ModelRegistry:
+    """Thread-safe registry that loads each heavy model once, on first use"""
+    
     def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._lock = threading.Lock()
+    
+    def register(self, name, loader):
+        """Register a zero-argument loader for a model name"""
+        self._loaders[name] = loader
+    
+    def get(self, name):
+        """Return the named model, loading it if this is the first request"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if name not in self._models:
+                self._models[name] = self._loaders[name]()
+            return self._models[name]
+    
+    def set(self, name, model):
+        """Install an already constructed model under a name"""
+        with self._lock:
+            self._models[name] = model
+    
+    def is_loaded(self, name):
+        return name in self._models
+    
+    def warmup(self, names=None):
+        """Eagerly load the given models (all registered models by default)"""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+
+def nlp_key(profile):
+    """Registry name of the spaCy pipeline for a profile"""
+    return f'nlp:{profile}'
+
+
+def _load_nlp(profile):
+    import spacy
+    import vehicles  # noqa: F401 - registers the vehicle_recognizer factory
+    settings = NLP_PROFILES[profile]
+    nlp = spacy.load(NLP_MODEL, exclude=settings['exclude'])
+    for name in settings['enable']:
+        nlp.enable_pipe(name)
+    for name in settings['add']:
+        nlp.add_pipe(name, first=True)
+    # Every profile keeps NER, and vehicle spans are merged into its entities
+    nlp.add_pipe('vehicle_recognizer', after='ner')
+    return nlp
+
+
+def sentiment_key(backend):
+    """Registry name of the sentiment model for a backend"""
+    return f'sentiment:{backend}'
+
+
+def severity_key(path):
+    """Registry name of the trained severity model saved at path"""
+    return f'severity:{path}'
+
+
+# Models are loaded lazily - importing this module stays cheap
+models = ModelRegistry()
+for _profile in NLP_PROFILES:
+    models.register(nlp_key(_profile), lambda profile=_profile: _load_nlp(profile))
+for _backend in SENTIMENT_BACKENDS:
+    # Every backend truncates at 512 tokens and batches claims by token length
+    models.register(sentiment_key(_backend),
+                    lambda backend=_backend: load_sentiment_backend(backend, SENTIMENT_MODEL))
+
+
+def warmup(nlp_profile=DEFAULT_NLP_PROFILE, sentiment_backend=DEFAULT_SENTIMENT_BACKEND):
+    """Load the models up front, e.g. before a server starts taking traffic"""
+    models.warmup([nlp_key(nlp_profile), sentiment_key(sentiment_backend)])
+
+
+def __getattr__(name):
+    # Backwards compatible access to the old module-level model handles
+    if name == 'nlp':
+        return models.get(nlp_key(DEFAULT_NLP_PROFILE))
+    if name == 'sentiment_analyzer':
+        return models.get(sentiment_key(DEFAULT_SENTIMENT_BACKEND))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _claim_sentiment(text, backend, windowed=False):
+    model = models.get(sentiment_key(backend))
+    if windowed:
+        return windowed_sentiment(text, model)
+    return model(text)[0]
+
+
+class ClaimContext:
+    """Per-claim state shared by every analysis stage so the text is parsed once"""
+    
+    def __init__(self, text, doc=None, sentiment=None, nlp_profile=DEFAULT_NLP_PROFILE,
+                 sentiment_backend=DEFAULT_SENTIMENT_BACKEND, long_document_chars=None):
+        self.text = text
+        self.nlp_profile = nlp_profile
+        self.sentiment_backend = sentiment_backend
+        self.long_document_chars = long_document_chars
+        self._doc = doc
+        self._sentiment = sentiment
+        # (entities, summary) of a long claim, from windowed parsing
+        self._windowed = None
+        # (severity, confidence) from a trained severity model, set by batch analysis
+        self._severity = None
+        self._keyword_hits = None
+    
+    @property
+    def is_long(self):
+        """Whether the claim is analyzed in windows rather than as one Doc"""
+        return self.long_document_chars is not None and len(self.text) > self.long_document_chars
+    
+    @property
+    def doc(self):
+        """spaCy Doc for the claim, parsed on first access"""
+        if self._doc is None:
+            self._doc = models.get(nlp_key(self.nlp_profile))(self.text)
+        return self._doc
+    
+    @property
+    def sentiment(self):
+        """Sentiment label/score for the claim, computed on first access"""
+        if self._sentiment is None:
+            self._sentiment = _claim_sentiment(self.text, self.sentiment_backend, self.is_long)
+        return self._sentiment
+    
+    def lazy_sentiment(self):
+        """Sentiment that is only computed if something reads it"""
+        if self._sentiment is not None:
+            return self._sentiment
+        # Bind the text only, so a cached result doesn't keep the Doc alive; a
+        # partial of a module-level function pickles, e.g. back from pool workers
+        return LazySentiment(partial(_claim_sentiment, self.text, self.sentiment_backend, self.is_long))
+    
+    def keyword_hits(self, matcher):
+        """All keyword hits for the claim, matched once per matcher"""
+        if self._keyword_hits is None or self._keyword_hits[0] is not matcher:
+            self._keyword_hits = (matcher, matcher.find(self.text))
+        return self._keyword_hits[1]
+
+
+def as_context(claim, nlp_profile=DEFAULT_NLP_PROFILE, sentiment_backend=DEFAULT_SENTIMENT_BACKEND,
+               long_document_chars=None):
+    """Accept either raw claim text or an existing ClaimContext"""
+    if isinstance(claim, ClaimContext):
+        return claim
+    return ClaimContext(claim, nlp_profile=nlp_profile, sentiment_backend=sentiment_backend,
+                        long_document_chars=long_document_chars)
+
+
+def _timed(timings, stage, func, *args):
+    """Call func, recording its wall time under stage when timings is a dict"""
+    if timings is None:
+        return func(*args)
+    start = time.perf_counter()
+    result = func(*args)
+    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+    return result
+
+
+class ClaimsAnalyzer:
+    def __init__(self, keyword_config=None, cache=None, metrics=None,
+                 nlp_profile=DEFAULT_NLP_PROFILE, sentiment_backend=DEFAULT_SENTIMENT_BACKEND,
+                 sentiment_mode='eager', duplicate_index=None,
+                 severity_backend=DEFAULT_SEVERITY_BACKEND, severity_model_path=None, artifacts=None,
+                 long_document_chars=LONG_DOCUMENT_CHARS):
+        if nlp_profile not in NLP_PROFILES:
+            raise ValueError(f"Unknown nlp_profile {nlp_profile!r}; choose from {sorted(NLP_PROFILES)}")
+        if sentiment_backend not in SENTIMENT_BACKENDS:
+            raise ValueError(
+                f"Unknown sentiment_backend {sentiment_backend!r}; choose from {sorted(SENTIMENT_BACKENDS)}"
+            )
+        if sentiment_mode not in SENTIMENT_MODES:
+            raise ValueError(f"Unknown sentiment_mode {sentiment_mode!r}; choose from {SENTIMENT_MODES}")
+        if severity_backend not in SEVERITY_BACKENDS:
+            raise ValueError(f"Unknown severity_backend {severity_backend!r}; choose from {SEVERITY_BACKENDS}")
+        self.nlp_profile = nlp_profile
+        self.sentiment_backend = sentiment_backend
+        self.sentiment_mode = sentiment_mode
+        # 'hashing' decides severity with a trained HashingSeverityModel instead
+        # of keywords + sentiment; sentiment is then only computed if read
+        self.severity_backend = severity_backend
+        self.severity_model_path = severity_model_path or DEFAULT_SEVERITY_MODEL_PATH
+        # None parses every claim as one Doc and truncates sentiment to the first 512 tokens
+        self.long_document_chars = long_document_chars
+        # How often triage needed the sentiment model vs. could skip it
+        self.sentiment_stats = {'required': 0, 'skipped': 0}
+
         self.fraud_keywords = [
             'stolen', 'theft', 'burglar', 'missing', 'disappeared',
             'false alarm', 'mistake', 'forgot', 'confused'
@@ -19,10 +263,136 @@ class ClaimsAnalyzer:
             'medium': ['moderate', 'damaged', 'broken', 'cracked', 'dented'],
             'low': ['minor', 'small', 'slight', 'scratch', 'chip', 'tiny']
         }
+        self.retraction_keywords = ['false alarm', 'mistake']
+        self.urgency_words = ['urgent', 'immediately', 'asap', 'emergency']
+        
+        self.cache = cache
+        self.metrics = metrics
+        # Optional dedup.DuplicateIndex; matches are flagged outside the cache
+        # because they depend on which claims were seen before, not on the text
+        self.duplicate_index = duplicate_index
+        # Optional artifacts.ArtifactStore of spaCy Docs and sentiment reused by
+        # batch analysis, so a rules change doesn't rerun the models (see rescore)
+        self.artifacts = artifacts
+        self._local = threading.local()
+        self._matcher = None
+        self._matcher_key = None
+        self._version = None
+        if keyword_config is not None:
+            self.load_keywords(keyword_config)
+    
+    def warmup(self):
+        """Load the models this analyzer uses"""
+        warmup(self.nlp_profile, self.sentiment_backend)
+        if self.severity_backend == 'hashing':
+            self.severity_model
+    
+    @property
+    def severity_model(self):
+        """Trained severity model of the 'hashing' backend, loaded once per path"""
+        key = severity_key(self.severity_model_path)
+        if not models.is_loaded(key):
+            # Imported here: the model needs numpy/scikit-learn, the rules backend doesn't
+            from severity_model import HashingSeverityModel
+            path = self.severity_model_path
+            models.register(key, lambda: HashingSeverityModel.load(path))
+        return models.get(key)
+    
+    def _context(self, claim):
+        return as_context(claim, self.nlp_profile, self.sentiment_backend, self.long_document_chars)
+    
+    def load_keywords(self, path):
+        """Replace keyword lists with the ones defined in a JSON config file"""
+        config = load_keyword_config(path)
+        self.fraud_keywords = list(config.get('fraud', self.fraud_keywords))
+        self.retraction_keywords = list(config.get('retraction', self.retraction_keywords))
+        self.urgency_words = list(config.get('urgency', self.urgency_words))
+        severity = config.get('severity', {})
+        self.severity_keywords = {
+            level: list(severity.get(level, self.severity_keywords[level]))
+            for level in ('high', 'medium', 'low')
+        }
+    
+    def keyword_sets(self):
+        """Current keyword lists keyed by matcher category"""
+        return {
+            'severity_high': self.severity_keywords['high'],
+            'severity_medium': self.severity_keywords['medium'],
+            'severity_low': self.severity_keywords['low'],
+            'fraud': self.fraud_keywords,
+            'retraction': self.retraction_keywords,
+            'urgency': self.urgency_words,
+        }
+    
+    @property
+    def keyword_matcher(self):
+        """Compiled matcher for the current keyword lists, rebuilt only when they change"""
+        keyword_sets = self.keyword_sets()
+        key = tuple((category, tuple(keywords)) for category, keywords in keyword_sets.items())
+        if key != self._matcher_key:
+            self._matcher = KeywordMatcher(keyword_sets)
+            self._matcher_key = key
+            self._version = None
+        return self._matcher
+    
+    @property
+    def version(self):
+        """Fingerprint of the analyzer logic, models and keyword rules"""
+        matcher = self.keyword_matcher
+        if self._version is None:
+            fingerprint = json.dumps({
+                'analyzer': ANALYZER_VERSION,
+                'nlp': NLP_MODEL,
+                'nlp_profile': self.nlp_profile,
+                'sentiment': SENTIMENT_MODEL,
+                'sentiment_backend': self.sentiment_backend,
+                'severity_backend': self.severity_backend,
+                'long_document_chars': self.long_document_chars,
+                'severity_model': (self.severity_model.fingerprint
+                                   if self.severity_backend == 'hashing' else None),
+                'keywords': matcher.keyword_sets,
+            }, sort_keys=True)
+            self._version = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:16]
+        return self._version
+    
+    @property
+    def artifact_versions(self):
+        """Versions of the models whose outputs are kept in the artifact store"""
+        from vehicles import MAKE_ALIASES, VEHICLE_MODELS
+        nlp = json.dumps({
+            'nlp': NLP_MODEL,
+            'nlp_profile': self.nlp_profile,
+            # The gazetteer decides which VEHICLE entities a Doc carries
+            'vehicles': [VEHICLE_MODELS, MAKE_ALIASES],
+        }, sort_keys=True)
+        doc = hashlib.sha256(nlp.encode('utf-8')).hexdigest()[:16]
+        sentiment = f'{SENTIMENT_MODEL}:{self.sentiment_backend}'
+        return {
+            'doc': doc,
+            'sentiment': sentiment,
+            # Long claims: window boundaries follow long_document_chars, while
+            # sentiment windows follow the model's token limit. Windows before
+            # 'mentions' kept only distinct entities.
+            'windows': f'{doc}:{self.long_document_chars}:mentions',
+            'windowed_sentiment': f'{sentiment}:windowed',
+        }
+    
+    @property
+    def last_timings(self):
+        """Stage timings of this thread's last analysis, if metrics are enabled
+
+        Maps stage name to seconds, plus 'input_chars' and 'batch_size'. None
+        when metrics are disabled or the last result was served from the cache.
+        """
+        return getattr(self._local, 'timings', None)
     
     def extract_entities(self, text):
         """Extract named entities from claim text"""
-        doc = nlp(text)
+        context = self._context(text)
+        if context.is_long:
+            entities, _ = self._windowed(context)
+            return {kind: list(values) for kind, values in entities.items()}
+        doc = context.doc
         
         entities = {
             'locations': [],
@@ -41,28 +411,61 @@ class ClaimsAnalyzer:
                 entities['money'].append(ent.text)
             elif ent.label_ == 'ORG':
                 entities['organizations'].append(ent.text)
-        
-        # Extract vehicle information using regex
-        vehicle_pattern = r'\b(19|20)\d{2}\s+[A-Z][a-z]+\s+[A-Z][a-z-]+\b'
-        vehicles = re.findall(vehicle_pattern, text)
-        entities['vehicles'] = vehicles
+            elif ent.label_ == 'VEHICLE':
+                # Tagged by the vehicle_recognizer pipe; see ent._.vehicle for year/make/model
+                entities['vehicles'].append(ent.text)
         
         return entities
     
+    def severity_counts(self, text):
+        """Distinct high, medium and low severity keywords found in the claim"""
+        hits = self._context(text).keyword_hits(self.keyword_matcher)
+        return (
+            len(KeywordMatcher.matched(hits, 'severity_high')),
+            len(KeywordMatcher.matched(hits, 'severity_medium')),
+            len(KeywordMatcher.matched(hits, 'severity_low')),
+        )
+    
+    @staticmethod
+    def sentiment_required(high_count, low_count):
+        """Whether sentiment can change the severity decision for these keyword counts"""
+        # One high keyword flips to High on NEGATIVE; otherwise a single low
+        # keyword flips to Low on POSITIVE. Every other case is decided by counts.
+        return high_count == 1 or (high_count == 0 and low_count == 1)
+    
+    def needs_sentiment(self, text):
+        """Whether analyzing this claim will call the sentiment model"""
+        if self.severity_backend == 'hashing':
+            return False
+        if self.sentiment_mode == 'eager':
+            return True
+        high_count, _, low_count = self.severity_counts(text)
+        return self.sentiment_required(high_count, low_count)
+    
+    def evaluate_rules(self, claim_texts, indicators=True):
+        """Vectorized keyword rules, fraud scores and severity pre-decisions for a column of claims"""
+        # Imported here: rules needs pandas, which would make importing this module slow
+        from rules import evaluate_rules
+        return evaluate_rules(self.keyword_matcher, claim_texts, indicators)
+    
     def classify_severity(self, text):
         """Classify claim severity based on keywords and sentiment"""
-        text_lower = text.lower()
+        context = self._context(text)
+        if self.severity_backend == 'hashing':
+            return self._predict_severity(context)
         
         # Count severity indicators
-        high_count = sum(1 for keyword in self.severity_keywords['high'] 
-                        if keyword in text_lower)
-        medium_count = sum(1 for keyword in self.severity_keywords['medium'] 
-                          if keyword in text_lower)
-        low_count = sum(1 for keyword in self.severity_keywords['low'] 
-                       if keyword in text_lower)
+        high_count, medium_count, low_count = self.severity_counts(context)
         
-        # Get sentiment
-        sentiment = sentiment_analyzer(text[:512])[0]
+        # Get sentiment, deferring the model call when the counts already decide
+        if self.sentiment_mode == 'eager' or self.sentiment_required(high_count, low_count):
+            sentiment = context.sentiment
+            self.sentiment_stats['required'] += 1
+        else:
+            sentiment = context.lazy_sentiment()
+            self.sentiment_stats['skipped'] += 1
+            if self.metrics is not None:
+                self.metrics.increment('sentiment_skipped_total')
         
         # Decision logic
         if high_count >= 2 or (high_count >= 1 and sentiment['label'] == 'NEGATIVE'):
@@ -77,47 +480,85 @@ class ClaimsAnalyzer:
         
         return severity, confidence, sentiment
     
+    def _predict_severity(self, context):
+        if context._severity is None:
+            context._severity = self.severity_model.predict(context.text)[0]
+        severity, confidence = context._severity
+        self.sentiment_stats['skipped'] += 1
+        if self.metrics is not None:
+            self.metrics.increment('sentiment_skipped_total')
+        return severity, confidence, context.lazy_sentiment()
+    
     def detect_fraud_indicators(self, text):
         """Detect potential fraud indicators"""
-        text_lower = text.lower()
+        context = self._context(text)
+        text = context.text
+        hits = context.keyword_hits(self.keyword_matcher)
         
         indicators = []
         fraud_score = 0
         
         # Check for fraud keywords
-        for keyword in self.fraud_keywords:
-            if keyword in text_lower:
+        fraud_hits = KeywordMatcher.matched(hits, 'fraud')
+        for keyword in self.keyword_matcher.keyword_sets['fraud']:
+            if keyword in fraud_hits:
                 indicators.append(f"Contains keyword: '{keyword}'")
                 fraud_score += 1
         
         # Check for conflicting information
-        if 'false alarm' in text_lower or 'mistake' in text_lower:
+        if KeywordMatcher.matched(hits, 'retraction'):
             indicators.append("Claim retraction mentioned")
             fraud_score += 2
         
-        # Check for vague details
-        if len(text.split()) < 20:
+        # Check for vague details (maxsplit: only whether there are 20 words matters)
+        if len(text.split(maxsplit=20)) < 20:
             indicators.append("Very short description (lack of detail)")
             fraud_score += 1
         
         # Check for excessive urgency
-        urgency_words = ['urgent', 'immediately', 'asap', 'emergency']
-        urgency_count = sum(1 for word in urgency_words if word in text_lower)
+        urgency_count = len(KeywordMatcher.matched(hits, 'urgency'))
         if urgency_count >= 2:
             indicators.append("Excessive urgency language")
             fraud_score += 1
         
-        fraud_risk = 'Low'
+        return self.fraud_risk_tier(fraud_score), indicators, fraud_score
+    
+    @staticmethod
+    def fraud_risk_tier(fraud_score):
+        """Risk tier for a fraud score"""
         if fraud_score >= 3:
-            fraud_risk = 'High'
-        elif fraud_score >= 2:
-            fraud_risk = 'Medium'
+            return 'High'
+        if fraud_score >= 2:
+            return 'Medium'
+        return 'Low'
+    
+    def flag_duplicates(self, claim_text, results, claim_id=None):
+        """Add a fraud indicator for near-duplicates of earlier claims, then index this one"""
+        if self.duplicate_index is None:
+            return results
         
-        return fraud_risk, indicators, fraud_score
+        from dedup import content_key  # numpy is only needed once an index is attached
+        key = claim_id if claim_id is not None else content_key(claim_text)
+        matches = self.duplicate_index.check(str(key), claim_text)
+        if matches:
+            best_key, similarity = matches[0]
+            indicator = f"Near-duplicate of earlier claim {best_key} ({similarity:.0%} similar)"
+            if len(matches) > 1:
+                indicator += f" and {len(matches) - 1} more"
+            results['fraud_indicators'].append(indicator)
+            # Recycled narratives weigh as much as a retraction
+            results['fraud_score'] += 2
+            results['fraud_risk'] = self.fraud_risk_tier(results['fraud_score'])
+            if self.metrics is not None:
+                self.metrics.increment('near_duplicates_total')
+        return results
     
     def generate_summary(self, text):
         """Generate a brief summary of the claim"""
-        doc = nlp(text)
+        context = self._context(text)
+        if context.is_long:
+            return self._windowed(context)[1]
+        doc = context.doc
         
         # Extract first sentence as summary
         sentences = list(doc.sents)
@@ -129,20 +570,237 @@ class ClaimsAnalyzer:
             return summary
         return "No summary available"
     
-    def analyze_claim(self, claim_text):
+    def _windowed(self, context, batch_size=4):
+        """Entities and summary of a long claim, parsing one window at a time
+        
+        Windows stream through nlp.pipe and each Doc is dropped once its
+        entities are read, so memory is bounded by the window size rather
+        than the claim's. Entities are every mention in order, as for a claim
+        parsed whole; the summary comes from the first window.
+        """
+        if context._windowed is None:
+            text = context.text
+            windows = (text[start:end] for start, end, _ in pack_windows(text, self.long_document_chars))
+            docs = models.get(nlp_key(self.nlp_profile)).pipe(windows, batch_size=batch_size)
+            entities, summary = {}, None
+            for doc in docs:
+                window = ClaimContext(doc.text, doc=doc, nlp_profile=self.nlp_profile)
+                for kind, values in self.extract_entities(window).items():
+                    entities.setdefault(kind, []).extend(values)
+                if summary is None:
+                    summary = self.generate_summary(window)
+            context._windowed = (entities, summary or "No summary available")
+        return context._windowed
+    
+    def analyze_claim(self, claim_text, claim_id=None):
         """Complete analysis pipeline"""
         
+        context = self._context(claim_text)
+        if self.cache is None:
+            return self.flag_duplicates(context.text, self._analyze_context(context), claim_id)
+        
+        key = cache_key(context.text, self.version)
+        results = self._cached(key, context)
+        if results is None:
+            # Parse once and share the result across all stages
+            results = self._analyze_context(context)
+            self.cache.put(key, results)
+        elif self.metrics is not None:
+            self.metrics.increment('cache_hits_total')
+            self._local.timings = None
+        return self.flag_duplicates(context.text, results, claim_id)
+    
+    def _cached(self, key, claim):
+        """Cached result for a claim, or None on a miss"""
+        results = self.cache.get(key)
+        if results is not None and results.get('sentiment') is None:
+            # Lazy sentiment nothing read was stored as null; make it lazy again
+            results['sentiment'] = self._context(claim).lazy_sentiment()
+        return results
+    
+    def analyze_claims(self, claim_texts, batch_size=32, claim_ids=None):
+        """Analyze an iterable of claims in batches, yielding results in input order"""
+        claim_texts = iter(claim_texts)
+        claim_ids = iter(claim_ids) if claim_ids is not None else None
+        while True:
+            batch = list(islice(claim_texts, batch_size))
+            if not batch:
+                break
+            batch_ids = list(islice(claim_ids, len(batch))) if claim_ids is not None else [None] * len(batch)
+            
+            # Serve what we can from the cache and only run models on the misses
+            results = [None] * len(batch)
+            keys = [None] * len(batch)
+            if self.cache is not None:
+                version = self.version
+                for i, text in enumerate(batch):
+                    keys[i] = cache_key(text, version)
+                    results[i] = self._cached(keys[i], text)
+                    if results[i] is not None and self.metrics is not None:
+                        self.metrics.increment('cache_hits_total')
+            pending = [i for i, result in enumerate(results) if result is None]
+            
+            if pending:
+                texts = [batch[i] for i in pending]
+                
+                # One nlp.pipe pass and one batched sentiment call per chunk;
+                # long claims are parsed and scored in windows of their own
+                batch_timings = {} if self.metrics is not None else None
+                contexts = [self._context(text) for text in texts]
+                short = [context for context in contexts if not context.is_long]
+                long = [context for context in contexts if context.is_long]
+                unstored = self._load_windowed(long) if long and self.artifacts is not None else []
+                docs = _timed(batch_timings, 'spacy_pipe',
+                              lambda: self._parse_batch([context.text for context in short], batch_size))
+                for context, doc in zip(short, docs):
+                    context._doc = doc
+                
+                # In lazy mode only the claims whose decision depends on it go to the model
+                needed = [context for context in short if self.needs_sentiment(context)]
+                if needed:
+                    sentiments = _timed(
+                        batch_timings, 'sentiment_batch',
+                        lambda: self._sentiment_batch([context.text for context in needed], batch_size),
+                    )
+                    for context, sentiment in zip(needed, sentiments):
+                        context._sentiment = sentiment
+                if self.severity_backend == 'hashing':
+                    predictions = _timed(batch_timings, 'severity_batch',
+                                         lambda: self.severity_model.predict(texts))
+                    for context, prediction in zip(contexts, predictions):
+                        context._severity = prediction
+                if batch_timings is not None:
+                    self._record_batch(batch_timings, len(texts))
+                
+                for i, context in zip(pending, contexts):
+                    results[i] = self._analyze_context(context, batch_size=len(texts))
+                    if self.cache is not None:
+                        self.cache.put(keys[i], results[i])
+                if unstored:
+                    self._save_windowed(unstored)
+            
+            # In input order, so a duplicate later in the same batch is still caught
+            for text, result, claim_id in zip(batch, results, batch_ids):
+                self.flag_duplicates(text, result, claim_id)
+            yield from results
+    
+    def rescore(self, claim_texts, batch_size=256, claim_ids=None):
+        """Re-run the rule stages over claims using their stored Docs and sentiment
+        
+        Long claims reuse their stored windowed entities, summary and
+        sentiment instead of a Doc. Gives the same results as analyze_claims under the current keywords
+        and thresholds; only claims without stored artifacts (new text, or a
+        different spaCy pipeline or sentiment model) run the models, and their
+        artifacts are saved for the next rescore.
+        """
+        if self.artifacts is None:
+            raise ValueError("rescore needs an artifact store; pass artifacts=ArtifactStore(path)")
+        return self.analyze_claims(claim_texts, batch_size=batch_size, claim_ids=claim_ids)
+    
+    def _stored(self, texts, version, lookup):
+        """Artifact keys of texts, the stored artifacts, and the texts still missing by key"""
+        keys = [artifact_key(text, version) for text in texts]
+        stored = lookup(keys)
+        missing = dict((key, text) for key, text in zip(keys, texts) if key not in stored)
+        return keys, stored, missing
+    
+    def _parse_batch(self, texts, batch_size):
+        """spaCy Docs for a batch, loaded from the artifact store where possible"""
+        nlp = models.get(nlp_key(self.nlp_profile))
+        if self.artifacts is None:
+            return list(nlp.pipe(texts, batch_size=batch_size))
+        
+        keys, stored, missing = self._stored(
+            texts, self.artifact_versions['doc'], lambda keys: self.artifacts.get_docs(keys, texts, nlp.vocab)
+        )
+        if missing:
+            docs = list(nlp.pipe(missing.values(), batch_size=batch_size))
+            self.artifacts.put_docs(missing.keys(), docs)
+            stored.update(zip(missing.keys(), docs))
+        return [stored[key] for key in keys]
+    
+    def _sentiment_batch(self, texts, batch_size):
+        """Sentiment for a batch, loaded from the artifact store where possible"""
+        model = models.get(sentiment_key(self.sentiment_backend))
+        if self.artifacts is None:
+            return model(texts, batch_size=batch_size)
+        
+        keys, stored, missing = self._stored(
+            texts, self.artifact_versions['sentiment'], self.artifacts.get_sentiments
+        )
+        if missing:
+            sentiments = model(list(missing.values()), batch_size=batch_size)
+            self.artifacts.put_sentiments(missing.keys(), sentiments)
+            stored.update(zip(missing.keys(), sentiments))
+        return [stored[key] for key in keys]
+    
+    def _load_windowed(self, contexts):
+        """Set the stored windowed results on long claims; returns the ones still missing
+        
+        Entries are (context, windows key, sentiment key), with None for the
+        artifacts that were found.
+        """
+        versions = self.artifact_versions
+        texts = [context.text for context in contexts]
+        window_keys, windows, _ = self._stored(texts, versions['windows'], self.artifacts.get_windows)
+        sentiment_keys, sentiments, _ = self._stored(
+            texts, versions['windowed_sentiment'], self.artifacts.get_sentiments
+        )
+        unstored = []
+        for context, window_key, sentiment_key in zip(contexts, window_keys, sentiment_keys):
+            if window_key in windows:
+                context._windowed = windows[window_key]
+                window_key = None
+            if sentiment_key in sentiments:
+                context._sentiment = sentiments[sentiment_key]
+                sentiment_key = None
+            if window_key or sentiment_key:
+                unstored.append((context, window_key, sentiment_key))
+        return unstored
+    
+    def _save_windowed(self, unstored):
+        """Store the windowed results computed for long claims by _analyze_context"""
+        # Lazy sentiment that nothing read stays unscored, and so unstored
+        windows = [(key, context._windowed) for context, key, _ in unstored
+                   if key and context._windowed is not None]
+        sentiments = [(key, context._sentiment) for context, _, key in unstored
+                      if key and context._sentiment is not None]
+        if windows:
+            self.artifacts.put_windows(*zip(*windows))
+        if sentiments:
+            self.artifacts.put_sentiments(*zip(*sentiments))
+    
+    def _analyze_context(self, context, batch_size=1):
+        """Run every stage against a prepared ClaimContext"""
+        claim_text = context.text
+        
+        # Timings are only collected when a metrics registry is attached
+        timings = {} if self.metrics is not None else None
+        if timings is not None:
+            # Time the model calls separately from the stages that consume them
+            if context._doc is None and not context.is_long:
+                _timed(timings, 'spacy_parse', lambda: context.doc)
+            if context._sentiment is None and self.needs_sentiment(context):
+                _timed(timings, 'sentiment', lambda: context.sentiment)
+        
         # Extract entities
-        entities = self.extract_entities(claim_text)
+        entities = _timed(timings, 'extract_entities', self.extract_entities, context)
         
         # Classify severity
-        severity, confidence, sentiment = self.classify_severity(claim_text)
+        severity, confidence, sentiment = _timed(
+            timings, 'classify_severity', self.classify_severity, context
+        )
         
         # Detect fraud indicators
-        fraud_risk, fraud_indicators, fraud_score = self.detect_fraud_indicators(claim_text)
+        fraud_risk, fraud_indicators, fraud_score = _timed(
+            timings, 'detect_fraud_indicators', self.detect_fraud_indicators, context
+        )
         
         # Generate summary
-        summary = self.generate_summary(claim_text)
+        summary = _timed(timings, 'generate_summary', self.generate_summary, context)
+        
+        if timings is not None:
+            self._record_claim(timings, claim_text, batch_size)
         
         # Compile results
         results = {
@@ -154,7 +812,19 @@ class ClaimsAnalyzer:
             'fraud_indicators': fraud_indicators,
             'fraud_score': fraud_score,
             'entities': entities,
-            'word_count': len(claim_text.split())
+            'word_count': count_words(claim_text)
         }
         
-        return results
\ No newline at end of file
+        return results
+    
+    def _record_claim(self, timings, claim_text, batch_size):
+        for stage, seconds in timings.items():
+            self.metrics.observe('stage_seconds', seconds, stage=stage)
+        self.metrics.observe('input_chars', len(claim_text), buckets=LENGTH_BUCKETS)
+        self.metrics.increment('claims_analyzed_total')
+        self._local.timings = dict(timings, input_chars=len(claim_text), batch_size=batch_size)
+    
+    def _record_batch(self, timings, batch_size):
+        for stage, seconds in timings.items():
+            self.metrics.observe('stage_seconds', seconds, stage=stage)
+        self.metrics.observe('batch_size', batch_size, buckets=BATCH_BUCKETS)
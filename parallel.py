@@ -0,0 +1,145 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import model
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer = None
+_worker_batch_size = 32
+
+
+def _init_worker(torch_threads, batch_size, analyzer_kwargs, worker_setup):
+    """Load models once per worker process and pin its thread pools"""
+    global _worker_analyzer, _worker_batch_size
+
+    # Must be set before torch is imported by the sentiment loader
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[var] = str(torch_threads)
+
+    if worker_setup is not None:
+        worker_setup()
+
+    _worker_analyzer = model.ClaimsAnalyzer(**analyzer_kwargs)
+    _worker_batch_size = batch_size
+    _worker_analyzer.warmup()
+
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(torch_threads)
+
+
+def _analyze_chunk(chunk):
+    """Analyze one chunk, isolating failures to the rows that caused them"""
+    try:
+        return list(_worker_analyzer.analyze_claims(chunk, batch_size=_worker_batch_size))
+    except Exception:
+        pass
+
+    # Retry row by row so a single bad claim doesn't sink its whole chunk
+    results = []
+    for text in chunk:
+        try:
+            results.append(_worker_analyzer.analyze_claim(text))
+        except Exception as e:
+            results.append({'error': f"{type(e).__name__}: {e}"})
+    return results
+
+
+class ParallelAnalyzer:
+    """Process-pool batch engine that spreads claims over several CPU cores
+
+    Each worker loads spaCy and the sentiment model once and then receives
+    chunks of claims. Results are yielded in input order; a row that fails
+    yields {'error': ...} instead of aborting the batch.
+    """
+
+    def __init__(self, workers=None, chunk_size=64, batch_size=32, torch_threads=1,
+                 analyzer_kwargs=None, worker_setup=None, mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.torch_threads = torch_threads
+        self.analyzer_kwargs = analyzer_kwargs or {}
+        self.worker_setup = worker_setup
+        self.mp_context = mp_context
+        self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        """Start the worker pool (called automatically on first use)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self.mp_context,
+                initializer=_init_worker,
+                initargs=(self.torch_threads, self.batch_size,
+                          self.analyzer_kwargs, self.worker_setup),
+            )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def analyze_claims(self, claim_texts):
+        """Yield results for every claim in input order"""
+        self.start()
+        claim_texts = iter(claim_texts)
+
+        # Keep a bounded number of chunks in flight so memory stays flat
+        in_flight = deque()
+        max_in_flight = self.workers * 2
+        while True:
+            while len(in_flight) < max_in_flight:
+                chunk = list(islice(claim_texts, self.chunk_size))
+                if not chunk:
+                    break
+                in_flight.append(self._executor.submit(_analyze_chunk, chunk))
+
+            if not in_flight:
+                break
+            yield from in_flight.popleft().result()
+
+
+def throughput_curve(claim_texts, worker_counts, **kwargs):
+    """Measure claims/sec for each worker count, excluding model load time"""
+    claim_texts = list(claim_texts)
+    curve = []
+    for workers in worker_counts:
+        with ParallelAnalyzer(workers=workers, **kwargs) as engine:
+            # Warm every worker before timing
+            list(engine.analyze_claims(claim_texts[:workers * engine.chunk_size]))
+
+            start = time.perf_counter()
+            for _ in engine.analyze_claims(claim_texts):
+                pass
+            elapsed = time.perf_counter() - start
+        curve.append({'workers': workers, 'claims_per_sec': len(claim_texts) / elapsed})
+    return curve
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Measure batch throughput against worker count")
+    parser.add_argument('csv', help="claims CSV with a 'description' column")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--torch-threads', type=int, default=1)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)['description'].tolist()
+    print(f"Throughput on {args.csv} ({len(texts)} claims):")
+    for point in throughput_curve(texts, args.workers, chunk_size=args.chunk_size,
+                                  torch_threads=args.torch_threads):
+        print(f"  {point['workers']:>3} workers: {point['claims_per_sec']:8.1f} claims/sec")
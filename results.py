@@ -0,0 +1,179 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from sentiment import peek_sentiment
+
+RESULT_COLUMNS = [
+    'claim_id', 'severity', 'severity_confidence', 'sentiment_label', 'sentiment_score',
+    'fraud_risk', 'fraud_score', 'fraud_indicators', 'summary', 'word_count',
+    'locations', 'dates', 'money', 'organizations', 'vehicles',
+]
+LIST_COLUMNS = {'fraud_indicators', 'locations', 'dates', 'money', 'organizations', 'vehicles'}
+
+# Categorical columns and their levels, in order
+CATEGORIES = {
+    'severity': ['Low', 'Medium', 'High'],
+    'fraud_risk': ['Low', 'Medium', 'High'],
+    'sentiment_label': ['NEGATIVE', 'POSITIVE'],
+}
+
+_CATEGORY = pa.dictionary(pa.int8(), pa.string(), ordered=True)
+_STRINGS = pa.list_(pa.string())
+
+RESULT_SCHEMA = pa.schema([
+    ('claim_id', pa.string()),
+    ('severity', _CATEGORY),
+    ('severity_confidence', pa.float64()),
+    ('sentiment_label', _CATEGORY),
+    ('sentiment_score', pa.float64()),
+    ('fraud_risk', _CATEGORY),
+    ('fraud_score', pa.int32()),
+    ('fraud_indicators', _STRINGS),
+    ('summary', pa.string()),
+    ('word_count', pa.int32()),
+    ('locations', _STRINGS),
+    ('dates', _STRINGS),
+    ('money', _STRINGS),
+    ('organizations', _STRINGS),
+    ('vehicles', _STRINGS),
+    ('error', pa.string()),
+])
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+
+
+def flatten_result(claim_id, result):
+    """Flatten a nested analyze_claim result into one output row"""
+    if 'error' in result:
+        return {'claim_id': claim_id, 'error': result['error']}
+
+    # Don't force a lazily skipped sentiment call just to write it out
+    sentiment = peek_sentiment(result['sentiment']) or {}
+    row = {
+        'claim_id': claim_id,
+        'severity': result['severity'],
+        'severity_confidence': result['severity_confidence'],
+        'sentiment_label': sentiment.get('label'),
+        'sentiment_score': sentiment.get('score'),
+        'fraud_risk': result['fraud_risk'],
+        'fraud_score': result['fraud_score'],
+        'fraud_indicators': result['fraud_indicators'],
+        'summary': result['summary'],
+        'word_count': result['word_count'],
+    }
+    for key, values in result['entities'].items():
+        row[key] = values
+    return row
+
+
+def _categorical_array(values, levels):
+    # A fixed dictionary keeps every record batch's codes compatible
+    codes = {level: i for i, level in enumerate(levels)}
+    indices = pa.array([codes.get(value) for value in values], type=pa.int8())
+    return pa.DictionaryArray.from_arrays(indices, pa.array(levels, type=pa.string()), ordered=True)
+
+
+def _record_batch(rows):
+    arrays = []
+    for field in RESULT_SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.name == 'claim_id':
+            values = [None if value is None else str(value) for value in values]
+        if field.name in CATEGORIES:
+            arrays.append(_categorical_array(values, CATEGORIES[field.name]))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=RESULT_SCHEMA)
+
+
+class ResultTable:
+    """Columnar, Arrow-backed table of batch analysis results
+
+    Results are flattened into a small row buffer that is sealed into an Arrow
+    record batch every batch_rows rows, so a large batch is held as typed
+    columns rather than one nested dict per claim. Severity, fraud risk and
+    sentiment label are ordered categoricals; entities and fraud indicators
+    are list<string> columns.
+    """
+
+    def __init__(self, batch_rows=4096):
+        self.batch_rows = batch_rows
+        self._batches = []
+        self._pending = []
+        self._sealed_rows = 0
+
+    @classmethod
+    def from_results(cls, claim_ids, results, batch_rows=4096):
+        table = cls(batch_rows)
+        table.extend(claim_ids, results)
+        return table
+
+    def __len__(self):
+        return self._sealed_rows + len(self._pending)
+
+    def append(self, claim_id, result):
+        self._pending.append(flatten_result(claim_id, result))
+        if len(self._pending) >= self.batch_rows:
+            self._seal()
+
+    def extend(self, claim_ids, results):
+        for claim_id, result in zip(claim_ids, results):
+            self.append(claim_id, result)
+
+    def _seal(self):
+        if self._pending:
+            self._batches.append(_record_batch(self._pending))
+            self._sealed_rows += len(self._pending)
+            self._pending = []
+
+    def to_arrow(self):
+        """Results as a pyarrow Table; sealed batches are shared, not copied"""
+        self._seal()
+        return pa.Table.from_batches(self._batches, schema=RESULT_SCHEMA)
+
+    def to_pandas(self):
+        """Results as a DataFrame with categorical columns and list-valued entity columns"""
+        return self.to_arrow().to_pandas()
+
+    def group_counts(self, *columns):
+        """Row counts per combination of values of the given columns, in category order"""
+        counts = self.to_arrow().group_by(list(columns)).aggregate([([], 'count_all')])
+        counts = counts.rename_columns(list(columns) + ['count'])
+        return counts.to_pandas().sort_values(list(columns)).reset_index(drop=True)
+
+    def write_parquet(self, path):
+        pq.write_table(self.to_arrow(), path)
+
+    def write_ipc(self, sink):
+        """Write the table in the Arrow IPC file format to a path or pyarrow sink"""
+        table = self.to_arrow()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    def write_csv(self, sink):
+        """Write a flat CSV; list columns are joined with '; ' and categoricals decoded"""
+        table = self.to_arrow()
+        columns = []
+        for field, column in zip(table.schema, table.columns):
+            if field.name in LIST_COLUMNS:
+                column = pc.binary_join(column, '; ')
+            elif field.name in CATEGORIES:
+                column = column.cast(pa.string())
+            columns.append(column)
+        pyarrow.csv.write_csv(pa.table(columns, names=table.column_names), sink)
+
+    def to_bytes(self, output_format):
+        """Serialize to 'csv', 'parquet' or 'arrow' (IPC) bytes, e.g. for a download"""
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {output_format!r}; choose from {EXPORT_FORMATS}")
+        sink = pa.BufferOutputStream()
+        if output_format == 'parquet':
+            pq.write_table(self.to_arrow(), sink)
+        elif output_format == 'arrow':
+            self.write_ipc(sink)
+        else:
+            self.write_csv(sink)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,181 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from results import CATEGORIES
+
+# Indicator messages appended after the per-keyword ones, in detect_fraud_indicators order
+RETRACTION_INDICATOR = "Claim retraction mentioned"
+SHORT_INDICATOR = "Very short description (lack of detail)"
+URGENCY_INDICATOR = "Excessive urgency language"
+
+
+def as_text_series(texts):
+    """Claim texts as a pandas Series, accepting a Series, a pyarrow array or any iterable"""
+    if isinstance(texts, pd.Series):
+        return texts
+    if hasattr(texts, 'to_pandas'):
+        return texts.to_pandas()
+    return pd.Series(list(texts), dtype=object)
+
+
+def _scan(matcher, texts):
+    """Raw keyword matches and word count for every claim, in one pass over the column"""
+    pattern = matcher.pattern
+    keywords = [keyword for keywords in matcher.keyword_sets.values() for keyword in keywords]
+    if pattern is None:
+        return [[] for _ in texts], [len(text.split()) for text in texts]
+
+    # Case-insensitive matching is several times slower in re, so ASCII claims are
+    # lowercased and matched case-sensitively against the (lowercase) keywords instead.
+    # Only exact when the keywords are ASCII too; other claims keep IGNORECASE.
+    folded = re.compile(pattern.pattern) if all(keyword.isascii() for keyword in keywords) else pattern
+    found = []
+    word_counts = []
+    for text in texts:
+        if folded is not pattern and text.isascii():
+            found.append(folded.findall(text.lower()))
+        else:
+            found.append(pattern.findall(text))
+        word_counts.append(len(text.split()))
+    return found, word_counts
+
+
+def keyword_matches(matcher, texts, scanned=None):
+    """Distinct (row, category, keyword) hits for a column of claims
+
+    Uses the matcher's combined regex, so overlapping keywords resolve exactly
+    as KeywordMatcher.find does. row is the position in texts.
+    """
+    texts = as_text_series(texts)
+    found, _ = scanned or _scan(matcher, texts.tolist())
+    columns = ['row', 'category', 'keyword']
+
+    rows = np.repeat(np.arange(len(found)), [len(matches) for matches in found])
+    codes, raw = pd.factorize(pd.Series([match for matches in found for match in matches], dtype=object))
+    if not len(raw):
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in
+                             zip(columns, ('int64', object, object))})
+
+    # Normalize each distinct spelling once, then work on integer codes
+    keyword_ids, keywords = pd.factorize(pd.Series([matcher.canonical(match) for match in raw]))
+    matches = pd.DataFrame({'row': rows, 'keyword_id': keyword_ids[codes]}).drop_duplicates()
+
+    categories = pd.DataFrame(
+        [
+            (keyword_id, category)
+            for keyword_id, keyword in enumerate(keywords)
+            for category, category_keywords in matcher.keyword_sets.items()
+            if keyword in category_keywords
+        ],
+        columns=['keyword_id', 'category'],
+    )
+    matches = matches.merge(categories, on='keyword_id')
+    matches['keyword'] = np.asarray(keywords, dtype=object)[matches['keyword_id'].to_numpy()]
+    return matches.sort_values(['row', 'keyword_id'], kind='stable')[columns].reset_index(drop=True)
+
+
+def _distinct_counts(matches, rows, categories):
+    codes = pd.Categorical(matches['category'], categories=categories).codes
+    flat = np.bincount(
+        matches['row'].to_numpy(dtype=np.int64) * len(categories) + codes,
+        minlength=rows * len(categories),
+    )
+    return pd.DataFrame(flat.reshape(rows, len(categories)), columns=categories)
+
+
+def _decide_severity(high, low, negative, positive):
+    # Vectorized form of the ClaimsAnalyzer.classify_severity decision logic
+    is_high = (high >= 2) | ((high >= 1) & negative)
+    is_low = ~is_high & ((low >= 2) | ((low >= 1) & positive))
+    severity = np.where(is_high, 'High', np.where(is_low, 'Low', 'Medium')).astype(object)
+    confidence = np.where(
+        is_high, np.minimum(0.7 + (high * 0.1), 0.95),
+        np.where(is_low, np.minimum(0.6 + (low * 0.1), 0.9), 0.65),
+    )
+    return severity, confidence
+
+
+def _categorical(values, column):
+    return pd.Categorical(values, categories=CATEGORIES[column], ordered=True)
+
+
+def evaluate_rules(matcher, texts, indicators=True):
+    """Run every keyword rule over a column of claims at once
+
+    Returns one row per claim with the distinct keyword count per category,
+    word_count, fraud_score, fraud_risk, fraud_indicators (when indicators is
+    true), sentiment_required, and the severity pre-decision with its
+    confidence. severity is missing where the decision needs sentiment (see
+    resolve_severity). Values match the per-claim ClaimsAnalyzer methods.
+    """
+    texts = as_text_series(texts)
+    index = texts.index
+    texts = texts.reset_index(drop=True)
+    rows = len(texts)
+
+    scanned = _scan(matcher, texts.tolist())
+    matches = keyword_matches(matcher, texts, scanned)
+    counts = _distinct_counts(matches, rows, list(matcher.keyword_sets))
+    word_count = np.asarray(scanned[1], dtype=np.int64)
+
+    # One flag per configured fraud keyword, in list order (duplicates included)
+    fraud_keywords = matcher.keyword_sets['fraud']
+    fraud_matches = matches.loc[matches['category'] == 'fraud']
+    fraud_flags = np.zeros((rows, len(fraud_keywords)), dtype=bool)
+    for j, keyword in enumerate(fraud_keywords):
+        rows_with_keyword = fraud_matches.loc[fraud_matches['keyword'] == keyword, 'row']
+        fraud_flags[rows_with_keyword.to_numpy(dtype=np.int64), j] = True
+
+    retraction = counts['retraction'].to_numpy() > 0
+    short = word_count < 20
+    urgent = counts['urgency'].to_numpy() >= 2
+    fraud_score = fraud_flags.sum(axis=1) + 2 * retraction + short + urgent
+    fraud_risk = np.select([fraud_score >= 3, fraud_score >= 2], ['High', 'Medium'], 'Low')
+
+    high = counts['severity_high'].to_numpy()
+    low = counts['severity_low'].to_numpy()
+    # Same condition as ClaimsAnalyzer.sentiment_required
+    sentiment_required = (high == 1) | ((high == 0) & (low == 1))
+    undecided = np.zeros(rows, dtype=bool)
+    severity, confidence = _decide_severity(high, low, undecided, undecided)
+    severity[sentiment_required] = None
+    confidence[sentiment_required] = np.nan
+
+    result = counts.copy()
+    result['word_count'] = word_count
+    result['fraud_score'] = fraud_score
+    result['fraud_risk'] = _categorical(fraud_risk, 'fraud_risk')
+    if indicators:
+        messages = np.array(
+            [f"Contains keyword: '{keyword}'" for keyword in fraud_keywords]
+            + [RETRACTION_INDICATOR, SHORT_INDICATOR, URGENCY_INDICATOR],
+            dtype=object,
+        )
+        flags = np.column_stack([fraud_flags, retraction, short, urgent])
+        result['fraud_indicators'] = [messages[row].tolist() for row in flags]
+    result['sentiment_required'] = sentiment_required
+    result['severity'] = _categorical(severity, 'severity')
+    result['severity_confidence'] = confidence
+    result.index = index
+    return result
+
+
+def resolve_severity(rules, sentiment_labels):
+    """Final severity and confidence from evaluate_rules output plus sentiment labels
+
+    sentiment_labels is aligned with the rules rows; labels of rows that don't
+    require sentiment are ignored, so they may be None.
+    """
+    labels = np.asarray(sentiment_labels, dtype=object)
+    severity, confidence = _decide_severity(
+        rules['severity_high'].to_numpy(),
+        rules['severity_low'].to_numpy(),
+        labels == 'NEGATIVE',
+        labels == 'POSITIVE',
+    )
+    return pd.DataFrame(
+        {'severity': _categorical(severity, 'severity'), 'severity_confidence': confidence},
+        index=rules.index,
+    )
@@ -0,0 +1,286 @@
+import os
+from collections.abc import Mapping
+
+SENTIMENT_MODEL = 'distilbert-base-uncased-finetuned-sst-2-english'
+
+
+class SentimentScheduler:
+    """Group encoded claims into length-sorted batches under a padded-token budget
+
+    A batch is padded to its longest member, so mixing a 15-token claim with a
+    500-token one wastes most of the compute. Sorting by length and capping
+    batch_size * longest_length keeps padding (and peak memory) small.
+    """
+
+    def __init__(self, token_budget=8192, max_batch_size=64):
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+
+    def plan(self, lengths, max_batch_size=None):
+        """Return batches of indices into lengths, shortest claims first"""
+        max_batch_size = max_batch_size or self.max_batch_size
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+        batches = []
+        batch = []
+        for i in order:
+            # Sorted ascending, so the newest member sets the padded length
+            if batch and ((len(batch) + 1) * lengths[i] > self.token_budget
+                          or len(batch) >= max_batch_size):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+
+def padded_tokens(lengths, batches):
+    """Tokens actually pushed through the model for a batching plan, padding included"""
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+
+def naive_batches(count, batch_size):
+    """Input-order batches, as a plain pipeline(texts, batch_size=...) call would form"""
+    return [list(range(start, min(start + batch_size, count))) for start in range(0, count, batch_size)]
+
+
+class BatchedSentiment:
+    """Callable sentiment model with the transformers pipeline calling convention
+
+    Subclasses implement encode() and predict_encoded(); this class tokenizes
+    every claim once, schedules the encodings into batches and restores the
+    original order. Each result is a {'label', 'score'} dict.
+    """
+
+    def __init__(self, max_length=512, token_budget=8192, max_batch_size=64, bucketed=True):
+        self.max_length = max_length
+        self.bucketed = bucketed
+        self.scheduler = SentimentScheduler(token_budget, max_batch_size)
+
+    def encode(self, texts):
+        """Token ids for each text, truncated to max_length tokens"""
+        raise NotImplementedError
+
+    def predict_encoded(self, encodings):
+        """Sentiment dicts for one batch of encodings"""
+        raise NotImplementedError
+
+    def count_tokens(self, texts):
+        """Token count of each text, for fitting long claims into windows
+
+        Counts truncated encodings, so anything too long still shows up as
+        max_length; subclasses with a tokenizer count exactly.
+        """
+        return [len(ids) for ids in self.encode(list(texts))]
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return []
+
+        encodings = self.encode(texts)
+        lengths = [len(ids) for ids in encodings]
+        if self.bucketed:
+            batches = self.scheduler.plan(lengths, batch_size)
+        else:
+            batches = naive_batches(len(texts), batch_size or self.scheduler.max_batch_size)
+
+        results = [None] * len(texts)
+        for batch in batches:
+            predictions = self.predict_encoded([encodings[i] for i in batch])
+            for i, prediction in zip(batch, predictions):
+                results[i] = prediction
+        return results
+
+
+class TransformersSentiment(BatchedSentiment):
+    """DistilBERT SST-2 classifier run directly on pre-tokenized, bucketed batches"""
+
+    def __init__(self, model_name=SENTIMENT_MODEL, **kwargs):
+        super().__init__(**kwargs)
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.id2label = self.model.config.id2label
+        self.max_length = min(self.max_length, self.tokenizer.model_max_length)
+
+    def encode(self, texts):
+        return self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+
+    def count_tokens(self, texts):
+        return [len(ids) for ids in self.tokenizer(list(texts), add_special_tokens=False)['input_ids']]
+
+    def predict_encoded(self, encodings):
+        features = self.tokenizer.pad({'input_ids': encodings}, return_tensors='pt')
+        with self._torch.inference_mode():
+            logits = self.model(**features).logits
+        scores, label_ids = logits.softmax(dim=-1).max(dim=-1)
+        return [
+            {'label': self.id2label[int(label_id)], 'score': float(score)}
+            for label_id, score in zip(label_ids, scores)
+        ]
+
+
+class QuantizedSentiment(TransformersSentiment):
+    """Same model with its Linear layers dynamically quantized to int8 for CPU inference"""
+
+    def __init__(self, model_name=SENTIMENT_MODEL, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.model = self._torch.ao.quantization.quantize_dynamic(
+            self.model, {self._torch.nn.Linear}, dtype=self._torch.qint8
+        )
+
+
+class OnnxSentiment(BatchedSentiment):
+    """Model exported to ONNX and run with ONNX Runtime on the CPU
+
+    The export is done once (it needs torch) and cached at onnx_path; later
+    loads only need onnxruntime and the tokenizer.
+    """
+
+    def __init__(self, model_name=SENTIMENT_MODEL, onnx_path=None, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The 'onnx' sentiment backend requires onnxruntime: pip install onnxruntime")
+        import numpy
+        from transformers import AutoConfig, AutoTokenizer
+
+        self._np = numpy
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.id2label = AutoConfig.from_pretrained(model_name).id2label
+        self.max_length = min(self.max_length, self.tokenizer.model_max_length)
+
+        self.onnx_path = onnx_path or default_onnx_path(model_name)
+        if not os.path.exists(self.onnx_path):
+            export_onnx(model_name, self.onnx_path)
+        self.session = onnxruntime.InferenceSession(self.onnx_path, providers=['CPUExecutionProvider'])
+
+    def encode(self, texts):
+        return self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+
+    def count_tokens(self, texts):
+        return [len(ids) for ids in self.tokenizer(list(texts), add_special_tokens=False)['input_ids']]
+
+    def predict_encoded(self, encodings):
+        np = self._np
+        features = self.tokenizer.pad({'input_ids': encodings}, return_tensors='np')
+        logits = self.session.run(['logits'], {
+            'input_ids': features['input_ids'].astype(np.int64),
+            'attention_mask': features['attention_mask'].astype(np.int64),
+        })[0]
+        # Numerically stable softmax over the label axis
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probs = exp / exp.sum(axis=-1, keepdims=True)
+        return [
+            {'label': self.id2label[int(row.argmax())], 'score': float(row.max())}
+            for row in probs
+        ]
+
+
+def default_onnx_path(model_name):
+    cache_dir = os.environ.get('CLAIMS_ONNX_CACHE', os.path.expanduser('~/.cache/claims-analyzer'))
+    return os.path.join(cache_dir, f"{model_name.replace('/', '--')}.onnx")
+
+
+def export_onnx(model_name, onnx_path):
+    """Export a sequence classification model to ONNX with dynamic batch and length axes"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    sample = tokenizer(["sample claim text"], return_tensors='pt')
+
+    os.makedirs(os.path.dirname(onnx_path) or '.', exist_ok=True)
+    dynamic = {0: 'batch', 1: 'sequence'}
+    torch.onnx.export(
+        model,
+        (sample['input_ids'], sample['attention_mask']),
+        onnx_path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={'input_ids': dynamic, 'attention_mask': dynamic, 'logits': {0: 'batch'}},
+        opset_version=14,
+    )
+
+
+SENTIMENT_BACKENDS = {
+    'transformers': TransformersSentiment,
+    'quantized': QuantizedSentiment,
+    'onnx': OnnxSentiment,
+}
+DEFAULT_SENTIMENT_BACKEND = 'transformers'
+
+
+def load_sentiment_backend(backend, model_name=SENTIMENT_MODEL, **kwargs):
+    """Construct the named sentiment backend"""
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}; choose from {sorted(SENTIMENT_BACKENDS)}")
+    return SENTIMENT_BACKENDS[backend](model_name, **kwargs)
+
+
+class LazySentiment(Mapping):
+    """{'label', 'score'} mapping that only runs the sentiment model when read
+
+    Returned when the severity decision didn't depend on sentiment, so the
+    model is called only if a consumer (e.g. the UI gauge) asks for it.
+    """
+
+    def __init__(self, compute):
+        self._compute = compute
+        self._value = None
+
+    @property
+    def evaluated(self):
+        return self._value is not None
+
+    def resolve(self):
+        """Run the model if needed and return the plain result dict"""
+        if self._value is None:
+            self._value = self._compute()
+        return self._value
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __iter__(self):
+        return iter(('label', 'score'))
+
+    def __len__(self):
+        return 2
+
+    def __copy__(self):
+        # Immutable apart from memoization, so copies can share the result
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        if self._value is None:
+            return 'LazySentiment(<not evaluated>)'
+        return f'LazySentiment({self._value!r})'
+
+
+def peek_sentiment(sentiment):
+    """Sentiment dict without triggering a lazy evaluation; None if not computed"""
+    if isinstance(sentiment, LazySentiment):
+        return sentiment._value
+    return sentiment
+
+
+def json_default(value):
+    """json.dumps hook that writes unevaluated lazy sentiment as null"""
+    if isinstance(value, LazySentiment):
+        return peek_sentiment(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
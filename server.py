@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import model
+from metrics import MetricsRegistry
+from sentiment import json_default
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class QueueFullError(Exception):
+    """Raised when the batcher is at capacity and the caller should back off"""
+
+
+class RequestError(Exception):
+    """Raised for a request that can't be read; the connection is closed after the error"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Collect concurrent single-claim requests into batches for the analyzer
+
+    The first queued claim opens a batch; the batch is closed when it reaches
+    max_batch_size or max_wait seconds have passed, whichever comes first.
+    Model calls run on a single worker thread so the event loop stays free.
+    """
+
+    def __init__(self, analyzer, max_batch_size=32, max_wait=0.005, max_queue=1024):
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.batches = 0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analyzer')
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, text):
+        """Queue one claim and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Analyzer queue is full ({self.max_queue} pending claims)")
+        return await future
+
+    async def submit_many(self, texts):
+        """Queue a list of claims together and wait for all of their results
+
+        The claims are admitted all at once or not at all, so a batch request
+        never half-fills the queue before being turned away.
+        """
+        loop = asyncio.get_running_loop()
+        if self._queue.maxsize - self._queue.qsize() < len(texts):
+            raise QueueFullError(
+                f"Analyzer queue can't take {len(texts)} claims ({self.queue_depth}/{self.max_queue} pending)"
+            )
+        futures = [loop.create_future() for _ in texts]
+        for text, future in zip(texts, futures):
+            self._queue.put_nowait((text, future))
+        return await asyncio.gather(*futures)
+
+    async def run_in_worker(self, func, *args):
+        """Run a blocking call on the analyzer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def analyze_batch(self, texts):
+        """Analyze an explicit batch in one pass on the analyzer thread"""
+        return await self.run_in_worker(
+            lambda: list(self.analyzer.analyze_claims(texts, batch_size=self.max_batch_size))
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Skip requests whose clients have already gone away
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            self.batches += 1
+            if self.analyzer.metrics is not None:
+                self.analyzer.metrics.observe('queue_depth', self.queue_depth,
+                                              buckets=(0, 1, 8, 32, 128, 512, 2048))
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await self.analyze_batch(texts)
+            except Exception:
+                # Fall back to one claim at a time so one bad claim fails alone
+                results = []
+                for text in texts:
+                    try:
+                        results.append(await self.run_in_worker(self.analyzer.analyze_claim, text))
+                    except Exception as e:
+                        results.append(e)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class ClaimsServer:
+    """Minimal asyncio HTTP/1.1 front end for ClaimsAnalyzer
+
+    Endpoints:
+        POST /analyze        {"text": "..."}        -> analysis result
+        POST /analyze_batch  {"texts": ["...", ...]} -> {"results": [...]}
+        GET  /health                                 -> readiness, 503 until models load or if they failed
+        GET  /metrics                                -> Prometheus text
+    """
+
+    def __init__(self, analyzer=None, max_batch_size=32, max_wait=0.005, max_queue=1024,
+                 max_request_batch=1000):
+        self.analyzer = analyzer or model.ClaimsAnalyzer(metrics=MetricsRegistry())
+        self.batcher = MicroBatcher(self.analyzer, max_batch_size, max_wait, max_queue)
+        # A batch must fit in the queue in one go, or it would be turned away forever
+        self.max_request_batch = min(max_request_batch, max_queue)
+        self.ready = False
+        self.warmup_error = None
+        self.started = time.time()
+        self._server = None
+        self._warmup_task = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        # Load models on the analyzer thread; /health reports when it's done
+        self._warmup_task = asyncio.get_running_loop().create_task(self._warmup())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def _warmup(self):
+        try:
+            await self.batcher.run_in_worker(self.analyzer.warmup)
+        except Exception as e:
+            # Keep serving so /health can say why the models never loaded
+            self.warmup_error = f"{type(e).__name__}: {e}"
+            return
+        self.ready = True
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    # The rest of the request is unread, so the connection can't be reused
+                    self._write_response(writer, *_error(e.status, str(e)), keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, content_type = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get('content-length', '0')
+        if not (length.isascii() and length.isdigit()):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {length!r}")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method, target.split('?', 1)[0], headers, body
+
+    async def _dispatch(self, method, path, body):
+        try:
+            if method == 'GET' and path == '/health':
+                return self._health()
+            if method == 'GET' and path == '/metrics':
+                metrics = self.analyzer.metrics
+                text = metrics.to_prometheus() if metrics is not None else ''
+                return HTTPStatus.OK, text.encode('utf-8'), 'text/plain; version=0.0.4'
+            if method == 'POST' and path == '/analyze':
+                data = _parse_json(body)
+                text = data.get('text')
+                if not isinstance(text, str) or not text.strip():
+                    return _error(HTTPStatus.BAD_REQUEST, "'text' must be a non-empty string")
+                return _json(HTTPStatus.OK, await self.batcher.submit(text))
+            if method == 'POST' and path == '/analyze_batch':
+                data = _parse_json(body)
+                texts = data.get('texts')
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    return _error(HTTPStatus.BAD_REQUEST, "'texts' must be a list of strings")
+                if len(texts) > self.max_request_batch:
+                    return _error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                  f"At most {self.max_request_batch} claims per request")
+                return _json(HTTPStatus.OK, {'results': await self.batcher.submit_many(texts)})
+            return _error(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+        except QueueFullError as e:
+            return _error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except ValueError as e:
+            return _error(HTTPStatus.BAD_REQUEST, str(e))
+        except Exception as e:
+            return _error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+
+    def _health(self):
+        payload = {
+            'status': 'ready' if self.ready else 'failed' if self.warmup_error else 'loading',
+            'models': {
+                name: model.models.is_loaded(name)
+                for name in (model.nlp_key(self.analyzer.nlp_profile),
+                             model.sentiment_key(self.analyzer.sentiment_backend))
+            },
+            'queue_depth': self.batcher.queue_depth,
+            'batches': self.batcher.batches,
+            'uptime_seconds': time.time() - self.started,
+        }
+        if self.warmup_error:
+            payload['error'] = self.warmup_error
+        return _json(HTTPStatus.OK if self.ready else HTTPStatus.SERVICE_UNAVAILABLE, payload)
+
+    @staticmethod
+    def _write_response(writer, status, payload, content_type, keep_alive):
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(payload)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head.append("Retry-After: 1")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+
+
+def _parse_json(body):
+    try:
+        data = json.loads(body or b'{}')
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    return data
+
+
+def _json(status, payload):
+    return status, json.dumps(payload, default=json_default).encode('utf-8'), 'application/json'
+
+
+def _error(status, message):
+    return _json(status, {'error': message})
+
+
+async def main(args):
+    analyzer = model.ClaimsAnalyzer(
+        metrics=MetricsRegistry(),
+        nlp_profile=args.nlp_profile,
+        sentiment_backend=args.sentiment_backend,
+    )
+    server = ClaimsServer(
+        analyzer=analyzer,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        max_queue=args.max_queue,
+        max_request_batch=args.max_request_batch,
+    )
+    host, port = await server.start(args.host, args.port)
+    print(f"Serving claims analyzer on http://{host}:{port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP service for the claims analyzer")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    parser.add_argument('--max-request-batch', type=int, default=1000,
+                        help="claims per /analyze_batch request (at most --max-queue)")
+    parser.add_argument('--nlp-profile', choices=sorted(model.NLP_PROFILES), default=model.DEFAULT_NLP_PROFILE)
+    parser.add_argument('--sentiment-backend', choices=sorted(model.SENTIMENT_BACKENDS),
+                        default=model.DEFAULT_SENTIMENT_BACKEND)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
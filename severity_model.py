@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from results import CATEGORIES
+
+DATASETS = ['claims_small_100.csv', 'claims_medium_500.csv', 'claims_large_1000.csv', 'claims_xlarge_2000.csv']
+
+
+class HashingSeverityModel:
+    """Severity classifier over hashed word n-grams, trained on labelled claims
+
+    HashingVectorizer maps n-grams straight to feature indices, so there is no
+    vocabulary to fit or keep in memory and transforming a claim costs one pass
+    over its tokens. A linear SGD classifier sits on top; its scores are
+    calibrated with sigmoid calibration on cross-validated predictions, so the
+    returned confidence is a probability rather than a raw margin. scikit-learn
+    is only imported when a model is built or loaded.
+    """
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 2), alpha=1e-5, calibration_folds=3, seed=0):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.calibration_folds = calibration_folds
+        self.seed = seed
+        self.classes = None
+        self.weights = None
+        self.intercept = None
+        self.sigmoid = None
+        self.metadata = {}
+        self._vectorizer = None
+        self._analyzer = None
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(
+                n_features=self.n_features, ngram_range=self.ngram_range,
+                alternate_sign=False, norm='l2', dtype=np.float32,
+            )
+        return self._vectorizer
+
+    def fit(self, texts, labels):
+        from sklearn.calibration import CalibratedClassifierCV
+        from sklearn.linear_model import SGDClassifier
+
+        base = SGDClassifier(loss='hinge', alpha=self.alpha, max_iter=50, tol=1e-4, random_state=self.seed)
+        # ensemble=False: one classifier on all rows, calibrated on out-of-fold scores
+        calibrated = CalibratedClassifierCV(base, method='sigmoid', cv=self.calibration_folds, ensemble=False)
+        calibrated.fit(self.vectorizer.transform(texts), labels)
+
+        # Keep only the numbers: scoring is then one sparse dot product and a
+        # sigmoid, without scikit-learn's per-call validation overhead
+        fitted = calibrated.calibrated_classifiers_[0]
+        self.classes = [str(label) for label in calibrated.classes_]
+        self.weights = np.ascontiguousarray(fitted.estimator.coef_.T, dtype=np.float32)
+        self.intercept = fitted.estimator.intercept_.astype(np.float32)
+        self.sigmoid = np.array([[c.a_, c.b_] for c in fitted.calibrators], dtype=np.float64)
+        self.metadata = {'rows': len(labels), 'trained_at': time.time()}
+        return self
+
+    def _scores_one(self, text):
+        # HashingVectorizer.transform costs ~0.6 ms per call in input validation
+        # and sparse matrix construction; hash a single claim's n-grams directly
+        from sklearn.utils import murmurhash3_32
+
+        if self._analyzer is None:
+            self._analyzer = self.vectorizer.build_analyzer()
+        counts = Counter(self._analyzer(text))
+        if not counts:
+            return self.intercept[np.newaxis, :].astype(np.float64)
+        # Same feature index as HashingVectorizer: abs(signed murmurhash3) mod n_features
+        indices = np.fromiter((abs(murmurhash3_32(gram, positive=False)) % self.n_features for gram in counts),
+                              dtype=np.int64, count=len(counts))
+        indices, position = np.unique(indices, return_inverse=True)
+        values = np.bincount(position, weights=np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        values /= np.sqrt(values @ values)
+        return (values @ self.weights[indices] + self.intercept)[np.newaxis, :]
+
+    def predict_proba(self, texts):
+        """Class probabilities per claim, columns in self.classes order"""
+        if isinstance(texts, str):
+            scores = self._scores_one(texts)
+        else:
+            scores = self.vectorizer.transform(texts) @ self.weights + self.intercept
+        probabilities = 1.0 / (1.0 + np.exp(scores * self.sigmoid[:, 0] + self.sigmoid[:, 1]))
+        if len(self.classes) == 2:
+            # Binary models have a single score, for the second class
+            return np.column_stack([1.0 - probabilities[:, 0], probabilities[:, 0]])
+        # One-vs-rest calibration, normalized the way scikit-learn does it
+        total = probabilities.sum(axis=1, keepdims=True)
+        return np.divide(probabilities, total, out=np.full_like(probabilities, 1 / len(self.classes)),
+                         where=total > 0)
+
+    def predict(self, texts):
+        """(severity, confidence) per claim"""
+        probabilities = self.predict_proba(texts)
+        classes = np.asarray(self.classes, dtype=object)
+        best = probabilities.argmax(axis=1)
+        return [(label, float(score)) for label, score in zip(classes[best], probabilities.max(axis=1))]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Stateless; rebuilt from the parameters after loading
+        state['_vectorizer'] = None
+        state['_analyzer'] = None
+        return state
+
+    def save(self, path):
+        import joblib
+        tmp_path = path + '.tmp'
+        joblib.dump(self, tmp_path, compress=3)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        model = joblib.load(path)
+        with open(path, 'rb') as f:
+            model.metadata['fingerprint'] = hashlib.sha256(f.read()).hexdigest()[:16]
+        return model
+
+    @property
+    def fingerprint(self):
+        """Identifies the trained weights, e.g. for cache keys"""
+        return self.metadata.get('fingerprint') or f"{self.metadata.get('trained_at')}:{self.metadata.get('rows')}"
+
+
+def load_labeled(paths):
+    """Texts and actual_severity labels from claims CSVs"""
+    frames = [pd.read_csv(path, usecols=['description', 'actual_severity']) for path in paths]
+    data = pd.concat(frames, ignore_index=True).dropna()
+    return data['description'].astype(str).tolist(), data['actual_severity'].tolist()
+
+
+def calibration_error(probabilities, labels, classes, bins=10):
+    """Expected calibration error of the top-class confidence"""
+    confidence = probabilities.max(axis=1)
+    correct = np.asarray(classes, dtype=object)[probabilities.argmax(axis=1)] == np.asarray(labels, dtype=object)
+    edges = np.minimum((confidence * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        in_bin = edges == b
+        if in_bin.any():
+            error += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    return float(error)
+
+
+def rules_severity(texts, analyzer, batch_size=32):
+    """Severity from the keyword rules plus the analyzer's sentiment model, without spaCy
+
+    Matches ClaimsAnalyzer.classify_severity; sentiment only runs where the
+    keyword counts leave the decision open.
+    """
+    from model import models, sentiment_key
+    from rules import resolve_severity
+
+    rules = analyzer.evaluate_rules(texts, indicators=False)
+    labels = [None] * len(texts)
+    needed = np.flatnonzero(rules['sentiment_required'].to_numpy())
+    if needed.size:
+        sentiments = models.get(sentiment_key(analyzer.sentiment_backend))(
+            [texts[i] for i in needed], batch_size=batch_size
+        )
+        for i, sentiment in zip(needed, sentiments):
+            labels[i] = sentiment['label']
+    return resolve_severity(rules, labels)['severity'].astype(str).tolist()
+
+
+def confusion(labels, predicted):
+    """Counts per (actual, predicted) severity, rows and columns in severity order"""
+    levels = CATEGORIES['severity']
+    table = pd.crosstab(
+        pd.Categorical(labels, categories=levels), pd.Categorical(predicted, categories=levels), dropna=False,
+    )
+    return {actual: {str(k): int(v) for k, v in row.items()} for actual, row in table.iterrows()}
+
+
+def evaluate(model, texts, labels, analyzer=None, batch_size=32, single_sample=200):
+    """Accuracy and per-claim latency of the model, and of the rules + sentiment path if given an analyzer"""
+    labels = list(labels)
+    # Keep one-off imports out of the timings
+    model.predict_proba(texts[:1])
+    model.predict_proba(texts[0])
+    start = time.perf_counter()
+    probabilities = model.predict_proba(texts)
+    batch_seconds = time.perf_counter() - start
+
+    sample = texts[:single_sample]
+    start = time.perf_counter()
+    for text in sample:
+        model.predict_proba(text)
+    single_seconds = time.perf_counter() - start
+
+    predicted = np.asarray(model.classes, dtype=object)[probabilities.argmax(axis=1)]
+    report = {
+        'claims': len(texts),
+        'hashing': {
+            'accuracy': float((predicted == np.asarray(labels, dtype=object)).mean()),
+            'calibration_error': calibration_error(probabilities, labels, model.classes),
+            'batch_us_per_claim': batch_seconds / len(texts) * 1e6,
+            'single_us_per_claim': single_seconds / len(sample) * 1e6,
+        },
+    }
+    report['hashing']['confusion'] = confusion(labels, predicted)
+
+    if analyzer is not None:
+        start = time.perf_counter()
+        rules_predicted = rules_severity(texts, analyzer, batch_size)
+        seconds = time.perf_counter() - start
+        report['rules'] = {
+            'accuracy': float((np.asarray(rules_predicted, dtype=object) == np.asarray(labels, dtype=object)).mean()),
+            'batch_us_per_claim': seconds / len(texts) * 1e6,
+            'confusion': confusion(labels, rules_predicted),
+        }
+    return report
+
+
+def train_test_split(texts, labels, test_size, seed):
+    """Shuffled train texts/labels and held-out texts/labels"""
+    order = np.random.default_rng(seed).permutation(len(texts))
+    cut = int(len(texts) * (1 - test_size))
+    train, test = order[:cut], order[cut:]
+    return ([texts[i] for i in train], [labels[i] for i in train],
+            [texts[i] for i in test], [labels[i] for i in test])
+
+
+def train_model(paths, test_size=0.2, seed=0, **model_kwargs):
+    """Fit a HashingSeverityModel on claims CSVs, holding out test_size of the rows
+
+    Returns the model and the held-out texts and labels. The split is
+    recorded in the model's metadata so held_out can rebuild it later.
+    """
+    texts, labels = load_labeled(paths)
+    train_texts, train_labels, test_texts, test_labels = train_test_split(texts, labels, test_size, seed)
+    model = HashingSeverityModel(seed=seed, **model_kwargs).fit(train_texts, train_labels)
+    model.metadata['split'] = {
+        'datasets': [os.path.abspath(path) for path in paths],
+        'rows': len(texts),
+        'test_size': test_size,
+        'seed': seed,
+    }
+    return model, test_texts, test_labels
+
+
+def held_out(model):
+    """Texts and labels of the claims held out when the model was trained"""
+    split = model.metadata.get('split')
+    if split is None:
+        raise ValueError("The model has no recorded training split; evaluate it on separate claims CSVs")
+    texts, labels = load_labeled(split['datasets'])
+    if len(texts) != split['rows']:
+        raise ValueError(f"The training data changed since the model was trained "
+                         f"({len(texts)} labelled claims, trained with {split['rows']})")
+    _, _, texts, labels = train_test_split(texts, labels, split['test_size'], split['seed'])
+    return texts, labels
+
+
+def print_evaluation(report):
+    print(f"{report['claims']} claims")
+    for name in ('hashing', 'rules'):
+        if name not in report:
+            continue
+        stats = report[name]
+        line = f"  {name:>8}: accuracy {stats['accuracy']:.1%}, {stats['batch_us_per_claim']:8.1f} us/claim batched"
+        if 'single_us_per_claim' in stats:
+            line += (f", {stats['single_us_per_claim']:.1f} us/claim one at a time, "
+                     f"calibration error {stats['calibration_error']:.3f}")
+        print(line)
+
+
+if __name__ == "__main__":
+    from model import DEFAULT_SEVERITY_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the hashing severity model")
+    parser.add_argument('command', choices=['train', 'eval'])
+    parser.add_argument('datasets', nargs='*',
+                        help="claims CSVs with an actual_severity column (train default: the bundled CSVs; "
+                             "eval default: the rows held out in training)")
+    parser.add_argument('--model', default=DEFAULT_SEVERITY_MODEL_PATH, help="model artifact to write or read")
+    parser.add_argument('--test-size', type=float, default=0.2, help="held-out fraction when training")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--n-features', type=int, default=2 ** 18)
+    parser.add_argument('--alpha', type=float, default=1e-5)
+    parser.add_argument('--compare-rules', action='store_true',
+                        help="also score the keyword rules + sentiment model path")
+    parser.add_argument('--sentiment-backend', default=None, help="sentiment backend for --compare-rules")
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        model, texts, labels = train_model(args.datasets or DATASETS, args.test_size, args.seed,
+                                           n_features=args.n_features, alpha=args.alpha)
+        model.save(args.model)
+        print(f"Trained on {model.metadata['rows']} claims; saved {args.model} "
+              f"({os.path.getsize(args.model) / 1024:.0f} KB)")
+    else:
+        model = HashingSeverityModel.load(args.model)
+        if not args.datasets:
+            texts, labels = held_out(model)
+        else:
+            # Rows the model was fitted on would inflate its accuracy
+            trained_on = set(model.metadata.get('split', {}).get('datasets', []))
+            overlap = [path for path in args.datasets if os.path.abspath(path) in trained_on]
+            if overlap:
+                parser.error(f"{', '.join(overlap)} were used for training; "
+                             f"omit the datasets to evaluate on the held-out rows")
+            texts, labels = load_labeled(args.datasets)
+
+    analyzer = None
+    if args.compare_rules:
+        from model import ClaimsAnalyzer
+        options = {'sentiment_backend': args.sentiment_backend} if args.sentiment_backend else {}
+        analyzer = ClaimsAnalyzer(**options)
+    if texts:
+        print_evaluation(evaluate(model, texts, labels, analyzer))
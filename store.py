@@ -0,0 +1,374 @@
+import argparse
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from results import flatten_result
+from vehicles import parse_vehicle
+
+ENTITY_KINDS = ('locations', 'dates', 'money', 'organizations', 'vehicles')
+CLAIM_COLUMNS = [
+    'claim_id', 'description', 'severity', 'severity_confidence', 'sentiment_label', 'sentiment_score',
+    'fraud_risk', 'fraud_score', 'summary', 'word_count', 'error', 'analyzed_at',
+]
+# Sort column and the index that yields claims in that order (id is the rowid)
+ORDERINGS = {
+    'recent': ('id', None),
+    'fraud_score': ('fraud_score', 'claims_fraud'),
+    'severity_confidence': ('severity_confidence', 'claims_confidence'),
+}
+# Reading an index entry is roughly this much cheaper than fetching a claim row by id
+_INDEX_SCAN_COST = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    claim_id TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL,
+    severity TEXT,
+    severity_confidence REAL,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    fraud_risk TEXT,
+    fraud_score INTEGER,
+    summary TEXT,
+    word_count INTEGER,
+    error TEXT,
+    analyzed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_severity ON claims (severity, fraud_score);
+CREATE INDEX IF NOT EXISTS claims_fraud ON claims (fraud_score);
+CREATE INDEX IF NOT EXISTS claims_fraud_risk ON claims (fraud_risk);
+CREATE INDEX IF NOT EXISTS claims_confidence ON claims (severity_confidence);
+
+CREATE TABLE IF NOT EXISTS entities (
+    claim INTEGER NOT NULL REFERENCES claims (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS entities_value ON entities (kind, value, claim);
+CREATE INDEX IF NOT EXISTS entities_claim ON entities (claim);
+
+CREATE TABLE IF NOT EXISTS vehicles (
+    claim INTEGER NOT NULL REFERENCES claims (id) ON DELETE CASCADE,
+    year INTEGER,
+    make TEXT NOT NULL COLLATE NOCASE,
+    model TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS vehicles_make ON vehicles (make, model, claim);
+CREATE INDEX IF NOT EXISTS vehicles_model ON vehicles (model, claim);
+CREATE INDEX IF NOT EXISTS vehicles_claim ON vehicles (claim);
+
+CREATE TABLE IF NOT EXISTS fraud_indicators (
+    claim INTEGER NOT NULL REFERENCES claims (id) ON DELETE CASCADE,
+    indicator TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fraud_indicators_indicator ON fraud_indicators (indicator, claim);
+CREATE INDEX IF NOT EXISTS fraud_indicators_claim ON fraud_indicators (claim);
+
+-- External content index: the text lives once, in claims.description
+CREATE VIRTUAL TABLE IF NOT EXISTS claims_fts USING fts5 (
+    description, content='claims', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS claims_fts_insert AFTER INSERT ON claims BEGIN
+    INSERT INTO claims_fts (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS claims_fts_delete AFTER DELETE ON claims BEGIN
+    INSERT INTO claims_fts (claims_fts, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+"""
+
+
+def fts_query(text):
+    """FTS5 MATCH expression requiring every word of free text, quoted so it can't be a syntax error"""
+    terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+    return ' AND '.join(terms)
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+class ClaimStore:
+    """Analyzed claims in SQLite, normalized for filtering and full-text search
+
+    claims holds one row per claim_id with the scalar results; entities,
+    vehicles (parsed into year/make/model) and fraud_indicators hold one row
+    per value, each indexed on (value, claim) so a filter is an index range
+    scan. Descriptions are indexed with FTS5. Re-inserting a claim_id
+    replaces its earlier analysis.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        # One connection shared by the app's threads; sqlite3 serializes nothing by itself
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def insert_results(self, claim_ids, texts, results):
+        """Store analyze_claim(s) results for the given claim ids and texts; returns rows stored"""
+        rows = [flatten_result(claim_id, result) for claim_id, result in zip(claim_ids, results)]
+        return self.insert_rows(rows, texts)
+
+    def insert_table(self, table, texts):
+        """Store a ResultTable (or its Arrow table) whose rows line up with texts"""
+        if hasattr(table, 'to_arrow'):
+            table = table.to_arrow()
+        return self.insert_rows(table.to_pylist(), texts)
+
+    def insert_rows(self, rows, texts):
+        """Store flattened result rows (see results.flatten_result) in one transaction"""
+        rows = list(rows)
+        texts = list(texts)
+        if not rows:
+            return 0
+        now = time.time()
+        claim_ids = [str(row['claim_id']) for row in rows]
+
+        with self._lock, self._db:
+            self._delete(claim_ids)
+            next_id = self._db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM claims").fetchone()[0]
+            # Later rows win when a batch repeats a claim_id
+            latest = {claim_id: i for i, claim_id in enumerate(claim_ids)}
+
+            claims, entities, vehicles, indicators = [], [], [], []
+            for i in sorted(latest.values()):
+                row, claim = rows[i], next_id + len(claims)
+                values = tuple(row.get(column) for column in CLAIM_COLUMNS[2:-1])
+                claims.append((claim, claim_ids[i], texts[i]) + values + (now,))
+                for kind in ENTITY_KINDS:
+                    for value in dict.fromkeys(row.get(kind) or ()):
+                        entities.append((claim, kind, value))
+                        vehicle = parse_vehicle(value) if kind == 'vehicles' else None
+                        if vehicle is not None:
+                            vehicles.append((claim, vehicle['year'], vehicle['make'], vehicle['model']))
+                indicators.extend((claim, indicator) for indicator in row.get('fraud_indicators') or ())
+
+            placeholders = ', '.join('?' * (len(CLAIM_COLUMNS) + 1))
+            self._db.executemany(
+                f"INSERT INTO claims (id, {', '.join(CLAIM_COLUMNS)}) VALUES ({placeholders})", claims
+            )
+            self._db.executemany("INSERT INTO entities (claim, kind, value) VALUES (?, ?, ?)", entities)
+            self._db.executemany("INSERT INTO vehicles (claim, year, make, model) VALUES (?, ?, ?, ?)", vehicles)
+            self._db.executemany("INSERT INTO fraud_indicators (claim, indicator) VALUES (?, ?)", indicators)
+        return len(claims)
+
+    def _delete(self, claim_ids):
+        for start in range(0, len(claim_ids), 500):
+            chunk = claim_ids[start:start + 500]
+            self._db.execute(
+                f"DELETE FROM claims WHERE claim_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+
+    def optimize(self):
+        """Refresh planner statistics and merge FTS segments, e.g. after a large import"""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO claims_fts (claims_fts) VALUES ('optimize')")
+        with self._lock:
+            self._db.execute("ANALYZE")
+
+    def _filters(self, text=None, severity=None, fraud_risk=None, min_fraud_score=None, location=None,
+                 organization=None, vehicle_make=None, vehicle_model=None, indicator=None):
+        """Conditions on claims columns, and SELECTs of matching ids from the other tables"""
+        clauses, clause_params = [], []
+        for column, values in (('severity', _as_list(severity)), ('fraud_risk', _as_list(fraud_risk))):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                clause_params.extend(values)
+        if min_fraud_score is not None:
+            clauses.append("fraud_score >= ?")
+            clause_params.append(min_fraud_score)
+
+        selects, select_params = [], []
+        for kind, value in (('locations', location), ('organizations', organization)):
+            if value:
+                selects.append("SELECT claim FROM entities WHERE kind = ? AND value = ?")
+                select_params.extend([kind, value])
+        if vehicle_make and vehicle_model:
+            selects.append("SELECT claim FROM vehicles WHERE make = ? AND model = ?")
+            select_params.extend([vehicle_make, vehicle_model])
+        elif vehicle_make:
+            selects.append("SELECT claim FROM vehicles WHERE make = ?")
+            select_params.append(vehicle_make)
+        elif vehicle_model:
+            selects.append("SELECT claim FROM vehicles WHERE model = ?")
+            select_params.append(vehicle_model)
+        if indicator:
+            selects.append("SELECT claim FROM fraud_indicators WHERE indicator = ?")
+            select_params.append(indicator)
+        if text and text.strip():
+            selects.append("SELECT rowid FROM claims_fts WHERE claims_fts MATCH ?")
+            select_params.append(fts_query(text))
+        return (' AND '.join(clauses), clause_params), (' INTERSECT '.join(selects), select_params)
+
+    @staticmethod
+    def _matches(filters):
+        """SELECT of matching claim ids, or (None, []) when nothing is filtered
+
+        Entity, vehicle, indicator and text filters are answered from covering
+        indexes and intersected; claims column conditions are then checked by
+        rowid on those few claims rather than intersecting the (usually much
+        larger) set of e.g. every High severity claim.
+        """
+        (clauses, clause_params), (selects, select_params) = filters
+        if selects and clauses:
+            return f"SELECT id FROM claims WHERE id IN ({selects}) AND {clauses}", select_params + clause_params
+        if selects:
+            return selects, select_params
+        if clauses:
+            return f"SELECT id FROM claims WHERE {clauses}", clause_params
+        return None, []
+
+    def _page_ids(self, filters, order_by, limit, offset):
+        column, index = ORDERINGS[order_by]
+        order = f"{column} DESC, id DESC" if column != 'id' else "id DESC"
+        matches, params = self._matches(filters)
+        if matches is None:
+            return self._db.execute(f"SELECT id FROM claims ORDER BY {order} LIMIT ? OFFSET ?",
+                                    [limit, offset]).fetchall()
+        if index is None:
+            if not filters[0][0]:
+                # The relation indexes are ordered by claim already
+                return self._db.execute(f"SELECT * FROM ({matches}) ORDER BY 1 DESC LIMIT ? OFFSET ?",
+                                        params + [limit, offset]).fetchall()
+            # MATERIALIZED stops SQLite from flattening this into a full scan in rowid order
+            return self._db.execute(
+                f"WITH m (id) AS MATERIALIZED ({matches}) SELECT id FROM m ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+
+        # Either walk the sort index, checking each claim, until the page is full;
+        # or read the sort key of every match. Pick whichever touches fewer rows.
+        matched = self._db.execute(f"SELECT COUNT(*) FROM ({matches})", params).fetchone()[0]
+        total = self._db.execute("SELECT MAX(id) FROM claims").fetchone()[0] or 0
+        if not matched:
+            return []
+        if (limit + offset) * total / matched * _INDEX_SCAN_COST < matched:
+            (clauses, clause_params), (selects, select_params) = filters
+            conditions = ([clauses] if clauses else []) + ([f"id IN ({selects})"] if selects else [])
+            return self._db.execute(
+                f"SELECT id FROM claims INDEXED BY {index} WHERE {' AND '.join(conditions)} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                clause_params + select_params + [limit, offset],
+            ).fetchall()
+        return self._db.execute(
+            f"WITH m (id) AS MATERIALIZED ({matches}) "
+            f"SELECT c.id FROM m JOIN claims c ON c.id = m.id ORDER BY c.{column} DESC, c.id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+
+    def search(self, limit=100, offset=0, order_by='recent', **filters):
+        """Claims matching every given filter as a DataFrame
+
+        Filters: text (full-text, every word must appear), severity and
+        fraud_risk (a value or a list), min_fraud_score, location,
+        organization, vehicle_make, vehicle_model and indicator (exact, case
+        insensitive for entities and vehicles). order_by is one of ORDERINGS.
+        """
+        if order_by not in ORDERINGS:
+            raise ValueError(f"Unknown order_by {order_by!r}; choose from {sorted(ORDERINGS)}")
+        filters = self._filters(**filters)
+        with self._lock:
+            ids = [claim for (claim,) in self._page_ids(filters, order_by, limit, offset)]
+            rows = self._db.execute(
+                f"SELECT id, {', '.join(CLAIM_COLUMNS)} FROM claims WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall() if ids else []
+        by_id = {row[0]: row[1:] for row in rows}
+        return pd.DataFrame([by_id[claim] for claim in ids], columns=CLAIM_COLUMNS)
+
+    def count(self, **filters):
+        """Number of claims matching the filters (see search)"""
+        matches, params = self._matches(self._filters(**filters))
+        sql = f"SELECT COUNT(*) FROM ({matches})" if matches else "SELECT COUNT(*) FROM claims"
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def get(self, claim_id):
+        """Everything stored for one claim, with entity, vehicle and indicator lists; None if absent"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT id, {', '.join(CLAIM_COLUMNS)} FROM claims WHERE claim_id = ?", (str(claim_id),)
+            ).fetchone()
+            if row is None:
+                return None
+            claim, values = row[0], row[1:]
+            record = dict(zip(CLAIM_COLUMNS, values))
+            for kind in ENTITY_KINDS:
+                record[kind] = [value for (value,) in self._db.execute(
+                    "SELECT value FROM entities WHERE claim = ? AND kind = ? ORDER BY rowid", (claim, kind)
+                )]
+            record['parsed_vehicles'] = [
+                {'year': year, 'make': make, 'model': model} for year, make, model in self._db.execute(
+                    "SELECT year, make, model FROM vehicles WHERE claim = ? ORDER BY rowid", (claim,)
+                )
+            ]
+            record['fraud_indicators'] = [indicator for (indicator,) in self._db.execute(
+                "SELECT indicator FROM fraud_indicators WHERE claim = ? ORDER BY rowid", (claim,)
+            )]
+        return record
+
+    def facets(self, kind, limit=50):
+        """Most common values of an entity kind (or 'vehicle_make'), for filter pickers"""
+        if kind == 'vehicle_make':
+            sql = "SELECT make, COUNT(*) AS n FROM vehicles GROUP BY make ORDER BY n DESC LIMIT ?"
+            params = [limit]
+        else:
+            sql = "SELECT value, COUNT(*) AS n FROM entities WHERE kind = ? GROUP BY value ORDER BY n DESC LIMIT ?"
+            params = [kind, limit]
+        with self._lock:
+            return [value for value, _ in self._db.execute(sql, params)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a claims store")
+    parser.add_argument('db', help="store database, e.g. written by stream.py --store")
+    parser.add_argument('--text', help="words that must all appear in the description")
+    parser.add_argument('--severity', action='append')
+    parser.add_argument('--fraud-risk', action='append')
+    parser.add_argument('--min-fraud-score', type=int)
+    parser.add_argument('--location')
+    parser.add_argument('--organization')
+    parser.add_argument('--vehicle-make')
+    parser.add_argument('--vehicle-model')
+    parser.add_argument('--indicator')
+    parser.add_argument('--order-by', choices=sorted(ORDERINGS), default='recent')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--optimize', action='store_true', help="refresh statistics and merge the FTS index first")
+    args = parser.parse_args()
+
+    store = ClaimStore(args.db)
+    if args.optimize:
+        store.optimize()
+    filters = dict(
+        text=args.text, severity=args.severity, fraud_risk=args.fraud_risk,
+        min_fraud_score=args.min_fraud_score, location=args.location, organization=args.organization,
+        vehicle_make=args.vehicle_make, vehicle_model=args.vehicle_model, indicator=args.indicator,
+    )
+    start = time.perf_counter()
+    matches = store.search(limit=args.limit, order_by=args.order_by, **filters)
+    search_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    total = store.count(**filters)
+    count_ms = (time.perf_counter() - start) * 1000
+
+    with pd.option_context('display.max_colwidth', 60, 'display.width', 200):
+        print(matches[['claim_id', 'severity', 'fraud_risk', 'fraud_score', 'summary']].to_string(index=False))
+    print(f"\n{total} of {len(store)} claims match (search {search_ms:.1f} ms, count {count_ms:.1f} ms)")
+    store.close()
@@ -0,0 +1,267 @@
+import argparse
+import csv
+import json
+import os
+
+import pandas as pd
+
+from results import LIST_COLUMNS, RESULT_COLUMNS, ResultTable, flatten_result
+from sentiment import json_default
+
+from model import (
+    DEFAULT_NLP_PROFILE, DEFAULT_SENTIMENT_BACKEND, DEFAULT_SEVERITY_BACKEND, NLP_PROFILES, SENTIMENT_BACKENDS,
+    SEVERITY_BACKENDS, ClaimsAnalyzer,
+)
+
+
+class _JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, claim_ids, results, start_row):
+        for claim_id, result in zip(claim_ids, results):
+            record = dict(result, claim_id=claim_id)
+            self._file.write(json.dumps(record, default=json_default) + '\n')
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=RESULT_COLUMNS + ['error'], extrasaction='ignore'
+        )
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def write(self, claim_ids, results, start_row):
+        for claim_id, result in zip(claim_ids, results):
+            row = flatten_result(claim_id, result)
+            for key in LIST_COLUMNS & row.keys():
+                row[key] = '; '.join(row[key])
+            self._writer.writerow(row)
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Writes one part file per chunk into a directory, named by start row"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, claim_ids, results, start_row):
+        part = os.path.join(self.path, f"part-{start_row:012d}.parquet")
+        ResultTable.from_results(claim_ids, results).write_parquet(part)
+
+    def flush(self):
+        return None
+
+    def close(self):
+        pass
+
+
+WRITERS = {'jsonl': _JsonlWriter, 'csv': _CsvWriter, 'parquet': _ParquetWriter}
+
+
+def _detect_format(output_path):
+    extension = os.path.splitext(output_path)[1].lstrip('.').lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Cannot infer output format from {output_path!r}; use one of {sorted(WRITERS)}")
+    return extension
+
+
+def _load_checkpoint(checkpoint_path, input_path):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('input')}")
+    return checkpoint
+
+
+def _save_checkpoint(checkpoint_path, checkpoint):
+    # Write then rename so a crash never leaves a half-written checkpoint
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+
+def stream_analyze(input_path, output_path, analyzer=None, output_format=None,
+                   chunk_size=1000, batch_size=None, checkpoint_path=None, restart=False, store=None):
+    """Analyze a claims CSV chunk by chunk, appending results to output_path
+
+    Memory use is bounded by chunk_size regardless of file size. After each
+    chunk is durably written, the number of processed rows is recorded in a
+    checkpoint file so an interrupted run resumes where it stopped. Returns
+    the total number of rows processed.
+
+    analyzer may be a ClaimsAnalyzer or a parallel.ParallelAnalyzer. With a
+    store.ClaimStore, every chunk is also saved there for querying.
+    """
+    analyzer = analyzer or ClaimsAnalyzer()
+    analyze_kwargs = {'batch_size': batch_size} if batch_size else {}
+    # Near-duplicate matches are reported against claim ids, not text hashes
+    duplicate_index = getattr(analyzer, 'duplicate_index', None)
+    output_format = output_format or _detect_format(output_path)
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint.json'
+
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = _load_checkpoint(checkpoint_path, input_path)
+    rows_done = 0
+    if checkpoint is not None:
+        rows_done = checkpoint['rows_done']
+        # Drop anything written after the last checkpoint so resumed rows aren't duplicated
+        if checkpoint.get('output_bytes') is not None and os.path.exists(output_path):
+            with open(output_path, 'r+b') as f:
+                f.truncate(checkpoint['output_bytes'])
+        if duplicate_index is not None and checkpoint.get('indexed') is not None:
+            # Likewise for claims indexed past it, which would otherwise count as
+            # earlier claims when the rows before them are analyzed again
+            duplicate_index.truncate(checkpoint['indexed'])
+    elif os.path.isdir(output_path):
+        for name in os.listdir(output_path):
+            if name.startswith('part-') and name.endswith('.parquet'):
+                os.remove(os.path.join(output_path, name))
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+    writer = WRITERS[output_format](output_path)
+    try:
+        reader = pd.read_csv(
+            input_path,
+            chunksize=chunk_size,
+            # A callable keeps memory flat even when skipping millions of rows
+            skiprows=lambda i: 0 < i <= rows_done,
+            dtype={'description': str},
+            keep_default_na=False,
+        )
+        for chunk in reader:
+            if 'description' not in chunk.columns:
+                raise ValueError("CSV must contain a 'description' column")
+
+            if 'claim_id' in chunk.columns:
+                claim_ids = chunk['claim_id'].astype(str).tolist()
+            else:
+                claim_ids = [f'CLM{rows_done + i + 1:03d}' for i in range(len(chunk))]
+
+            if duplicate_index is not None:
+                analyze_kwargs['claim_ids'] = claim_ids
+            results = list(analyzer.analyze_claims(chunk['description'].tolist(), **analyze_kwargs))
+            writer.write(claim_ids, results, rows_done)
+            output_bytes = writer.flush()
+            if store is not None:
+                # Keyed by claim_id, so chunks replayed after a resume are replaced, not duplicated
+                store.insert_results(claim_ids, chunk['description'].tolist(), results)
+
+            rows_done += len(chunk)
+            _save_checkpoint(checkpoint_path, {
+                'input': os.path.abspath(input_path),
+                'rows_done': rows_done,
+                'output_bytes': output_bytes,
+                'indexed': len(duplicate_index) if duplicate_index is not None else None,
+            })
+    finally:
+        writer.close()
+        if duplicate_index is not None and duplicate_index.path is not None:
+            # Claims indexed past the checkpoint are dropped again on resume
+            duplicate_index.save()
+
+    return rows_done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a claims CSV through the analyzer")
+    parser.add_argument('input', help="claims CSV with a 'description' column")
+    parser.add_argument('output', help="output .jsonl, .csv or .parquet (a directory of parts)")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="override the output format")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=1, help="use a process pool when > 1")
+    parser.add_argument('--checkpoint', help="checkpoint path (default: <output>.checkpoint.json)")
+    parser.add_argument('--restart', action='store_true', help="ignore any existing checkpoint")
+    parser.add_argument('--nlp-profile', choices=sorted(NLP_PROFILES), default=DEFAULT_NLP_PROFILE)
+    parser.add_argument('--lazy-sentiment', action='store_true',
+                        help="only run sentiment where it can change the severity decision")
+    parser.add_argument('--sentiment-backend', choices=sorted(SENTIMENT_BACKENDS),
+                        default=DEFAULT_SENTIMENT_BACKEND)
+    parser.add_argument('--severity-backend', choices=SEVERITY_BACKENDS, default=DEFAULT_SEVERITY_BACKEND,
+                        help="'hashing' uses the trained model from severity_model.py train")
+    parser.add_argument('--severity-model', help="severity model artifact for --severity-backend hashing")
+    parser.add_argument('--store', metavar='PATH', help="also save results in a searchable claims store")
+    parser.add_argument('--keywords', metavar='PATH', help="keyword rules JSON (see keywords.py)")
+    parser.add_argument('--artifacts', metavar='PATH',
+                        help="reuse spaCy Docs and sentiment stored at PATH and save new ones, so a rerun "
+                             "after a keyword change only reruns the rules")
+    parser.add_argument('--duplicate-index', metavar='PATH',
+                        help="flag near-duplicates of earlier claims using the index saved at PATH")
+    args = parser.parse_args()
+    if args.duplicate_index and args.workers > 1:
+        parser.error("--duplicate-index needs a single shared index; use --workers 1")
+    if args.artifacts and args.workers > 1:
+        parser.error("--artifacts needs a single writer; use --workers 1")
+
+    analyzer_kwargs = {
+        'nlp_profile': args.nlp_profile,
+        'sentiment_backend': args.sentiment_backend,
+        'sentiment_mode': 'lazy' if args.lazy_sentiment else 'eager',
+        'severity_backend': args.severity_backend,
+        'severity_model_path': args.severity_model,
+        'keyword_config': args.keywords,
+    }
+    if args.workers > 1:
+        from parallel import ParallelAnalyzer
+        engine = ParallelAnalyzer(workers=args.workers, batch_size=args.batch_size,
+                                  analyzer_kwargs=analyzer_kwargs)
+    else:
+        if args.duplicate_index:
+            from dedup import DuplicateIndex
+            analyzer_kwargs['duplicate_index'] = DuplicateIndex.open(args.duplicate_index)
+        if args.artifacts:
+            from artifacts import ArtifactStore
+            analyzer_kwargs['artifacts'] = ArtifactStore(args.artifacts)
+        engine = ClaimsAnalyzer(**analyzer_kwargs)
+
+    store = None
+    if args.store:
+        from store import ClaimStore
+        store = ClaimStore(args.store)
+
+    try:
+        total = stream_analyze(
+            args.input, args.output,
+            analyzer=engine,
+            output_format=args.format,
+            chunk_size=args.chunk_size,
+            batch_size=None if args.workers > 1 else args.batch_size,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+            store=store,
+        )
+    finally:
+        if args.workers > 1:
+            engine.close()
+        if store is not None:
+            store.close()
+        if args.artifacts:
+            engine.artifacts.close()
+    print(f"Analyzed {total} claims -> {args.output}")
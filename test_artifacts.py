@@ -0,0 +1,67 @@
+import pytest
+
+from artifacts import ArtifactStore, doc_from_bytes, doc_to_bytes
+from model import ClaimsAnalyzer
+from vehicles import vehicles_in
+
+
+CLAIMS = [
+    "Severe accident in Boston. My 2021 Tesla Model 3 was destroyed.",
+    "Minor scratch on the bumper in Quincy. No injuries.",
+    "Car stolen from the driveway on 03/15/2024, urgent, please help immediately.",
+]
+
+
+def test_doc_round_trip_keeps_entities_and_sentences(test_nlp):
+    doc = test_nlp(CLAIMS[0] + "  Towed to\n Newton.")
+    restored = doc_from_bytes(doc_to_bytes(doc), test_nlp.vocab, doc.text)
+    
+    assert [(ent.text, ent.label_) for ent in restored.ents] == [(ent.text, ent.label_) for ent in doc.ents]
+    assert vehicles_in(restored) == [{'year': 2021, 'make': 'Tesla', 'model': 'Model 3'}]
+    assert [sent.text for sent in restored.sents] == [sent.text for sent in doc.sents]
+    assert restored.text == doc.text
+
+
+def test_rescore_reuses_artifacts_after_rule_change(test_models, tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    list(ClaimsAnalyzer(artifacts=store).analyze_claims(CLAIMS))
+    assert store.counts() == {'docs': 3, 'sentiments': 3, 'windows': 0}
+    sentiment_calls = test_models.get('sentiment:transformers').calls
+    
+    tuned = ClaimsAnalyzer(artifacts=store)
+    tuned.fraud_keywords = tuned.fraud_keywords + ['driveway']
+    tuned.severity_keywords['low'] = tuned.severity_keywords['low'] + ['bumper']
+    rescored = list(tuned.rescore(CLAIMS))
+    
+    assert test_models.get('sentiment:transformers').calls == sentiment_calls
+    assert store.stats()['hits'] == {'docs': 3, 'sentiments': 3, 'windows': 0}
+    fresh = ClaimsAnalyzer()
+    fresh.fraud_keywords, fresh.severity_keywords = tuned.fraud_keywords, tuned.severity_keywords
+    assert rescored == list(fresh.analyze_claims(CLAIMS))
+    assert "Contains keyword: 'driveway'" in rescored[2]['fraud_indicators']
+
+
+def test_rescore_reuses_windowed_artifacts_of_long_claims(test_models, tmp_path, monkeypatch):
+    long_claim = "My 2019 Honda Civic was parked in Boston. " * 40 + "The garage fire destroyed it. " * 80
+    claims = CLAIMS[:1] + [long_claim]
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    analyzed = list(ClaimsAnalyzer(artifacts=store, long_document_chars=2000).analyze_claims(claims))
+    assert store.counts() == {'docs': 1, 'sentiments': 2, 'windows': 1}
+    
+    nlp, sentiment = test_models.get('nlp:full'), test_models.get('sentiment:transformers')
+    sentiment_calls = sentiment.calls
+    with monkeypatch.context() as patched:
+        patched.setattr(nlp, 'pipe', lambda *args, **kwargs: pytest.fail("rescore parsed a claim"), raising=False)
+        rescored = list(ClaimsAnalyzer(artifacts=store, long_document_chars=2000).rescore(claims))
+    
+    assert rescored == analyzed
+    assert sentiment.calls == sentiment_calls
+    assert store.stats()['hits'] == {'docs': 1, 'sentiments': 2, 'windows': 1}
+    # Another window size gives other windows, so they are parsed again
+    list(ClaimsAnalyzer(artifacts=store, long_document_chars=1000).rescore(claims))
+    assert store.counts()['windows'] == 2
+
+
+def test_rescore_needs_an_artifact_store(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.rescore(CLAIMS)
@@ -0,0 +1,107 @@
+import copy
+
+import pandas as pd
+
+from benchmark import (
+    STAGES, benchmark_long_documents, benchmark_texts, compare_profiles, compare_reports, compare_sentiment_backends, compare_sentiment_batching,
+    run_benchmarks, vehicle_accuracy,
+)
+from conftest import CallCounter
+from model import ClaimsAnalyzer
+
+
+def test_run_benchmarks_reports_metrics(analyzer):
+    report = run_benchmarks(['claims_small_100.csv'], limit=20, analyzer=analyzer)
+    metrics = report['datasets']['claims_small_100.csv']
+    
+    assert metrics['claims'] == 20
+    assert metrics['claims_per_sec'] > 0
+    assert metrics['p50_ms'] <= metrics['p95_ms'] <= metrics['p99_ms']
+    assert set(metrics['stage_ms_per_claim']) == set(STAGES)
+
+
+def test_benchmark_texts_uses_the_analyzers_sentiment_backend(test_models):
+    quantized = CallCounter(lambda texts, **kwargs: [{'label': 'POSITIVE', 'score': 0.6} for _ in texts])
+    test_models.set('sentiment:quantized', quantized)
+    texts = ["Minor scratch.", "Severe damage to the hood."]
+    
+    benchmark_texts(texts, ClaimsAnalyzer(sentiment_backend='quantized'))
+    
+    assert test_models.get('sentiment:transformers').calls == 0
+    # Once per claim on the timed path, once per batch on analyze_claims
+    assert quantized.calls == len(texts) + 1
+
+
+def test_compare_reports_flags_regressions():
+    baseline = {'datasets': {'claims_small_100.csv': {
+        'claims': 100, 'claims_per_sec': 100.0, 'p95_ms': 10.0, 'peak_rss_mb': 500.0,
+    }}}
+    current = copy.deepcopy(baseline)
+    assert compare_reports(baseline, current) == []
+    
+    current['datasets']['claims_small_100.csv'].update(claims_per_sec=80.0, p95_ms=10.5)
+    regressions = compare_reports(baseline, current, threshold=0.10)
+    assert [r['metric'] for r in regressions] == ['claims_per_sec']
+
+
+def test_compare_reports_checks_stage_timings():
+    stages = {'spacy_ner': 2.0, 'sentiment': 4.0}
+    baseline = {'datasets': {'claims_small_100.csv': {'claims': 100, 'stage_ms_per_claim': stages}}}
+    current = copy.deepcopy(baseline)
+    current['datasets']['claims_small_100.csv']['stage_ms_per_claim'].update(spacy_ner=1.0, sentiment=5.0)
+    
+    regressions = compare_reports(baseline, current, threshold=0.10)
+    
+    assert [(r['metric'], r['change']) for r in regressions] == [('stage_ms_per_claim.sentiment', 0.25)]
+
+
+def test_compare_profiles_reports_agreement(test_models, test_nlp):
+    test_models.set('nlp:minimal', test_nlp)
+    texts = ["Minor scratch in Boston. Paint transfer visible.", "Severe fire in Quincy. House destroyed."]
+    
+    comparison = compare_profiles(texts, profiles=['minimal'])
+    
+    assert set(comparison) == {'full', 'minimal'}
+    assert comparison['minimal']['entity_agreement'] == 1.0
+    assert comparison['minimal']['summary_agreement'] == 1.0
+    assert comparison['full']['speedup'] == 1.0
+
+
+def test_compare_sentiment_batching_counts_padding():
+    from test_sentiment import WordSentiment
+    
+    texts = ["word " * 60, "minor scratch", "small dent on door", "word " * 5] * 4
+    comparison = compare_sentiment_batching(texts, batch_size=4, sentiment=WordSentiment())
+    
+    assert comparison['bucketed']['padded_tokens'] < comparison['naive']['padded_tokens']
+    assert comparison['naive']['real_tokens'] == comparison['bucketed']['real_tokens']
+
+
+def test_compare_sentiment_backends_reports_agreement(test_models):
+    test_models.set('sentiment:quantized', lambda texts, **kwargs: [
+        {'label': 'POSITIVE', 'score': 0.6} for _ in texts
+    ])
+    texts = ["Minor scratch.", "Severe damage to the hood.", "Tiny chip.", "Car destroyed."]
+    
+    comparison = compare_sentiment_backends(texts, ['quantized'], batch_size=2)
+    
+    assert comparison['transformers']['label_agreement'] == 1.0
+    assert comparison['quantized']['label_agreement'] == 0.5
+    assert comparison['quantized']['ms_per_claim'] > 0
+
+
+def test_vehicle_accuracy_against_generator_vehicles(test_models):
+    texts = pd.read_csv('claims_small_100.csv')['description'].tolist()
+    stats = vehicle_accuracy(texts)
+    
+    assert stats['vehicles'] > 0
+    assert stats['recognizer'] == {'precision': 1.0, 'recall': 1.0}
+    assert stats['legacy_regex']['recall'] == 0.0
+
+
+def test_long_documents_stay_within_window_memory(test_models):
+    stats = benchmark_long_documents([50])[50]
+    
+    assert 50 * 1024 - 300 < stats['chars'] <= 50 * 1024
+    assert stats['windowed']['entities'] > 0
+    assert stats['windowed']['peak_mb'] < stats['whole_document']['peak_mb'] / 2
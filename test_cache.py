@@ -0,0 +1,74 @@
+from cache import ResultCache, cache_key
+from model import ClaimsAnalyzer
+
+
+CLAIM = "Minor scratch on rear bumper in Boston. No injuries."
+
+
+def test_cache_key_normalizes_whitespace_and_tracks_version():
+    assert cache_key("Minor  scratch\n", "v1") == cache_key("Minor scratch", "v1")
+    assert cache_key("Minor scratch", "v1") != cache_key("Minor scratch", "v2")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    cache.get('a')
+    cache.put('c', {'n': 3})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1}
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'disk_hits': 0, 'entries': 2}
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "results.sqlite"
+    cache = ResultCache(path=str(path))
+    cache.put('key', {'severity': 'Low'})
+    cache.close()
+    
+    reopened = ResultCache(path=str(path))
+    assert reopened.get('key') == {'severity': 'Low'}
+    assert reopened.disk_hits == 1
+
+
+def test_analyzer_serves_repeats_from_cache(test_models):
+    analyzer = ClaimsAnalyzer(cache=ResultCache())
+    first = analyzer.analyze_claim(CLAIM)
+    first['claim_id'] = 'CLM001'
+    second = analyzer.analyze_claim(CLAIM + "  ")
+    
+    assert 'claim_id' not in second
+    assert test_models.get('nlp:full').calls == 1
+    
+    results = list(analyzer.analyze_claims([CLAIM, "Severe damage, vehicle destroyed."]))
+    assert results[0] == second
+    assert test_models.get('sentiment:transformers').calls == 2
+    assert analyzer.cache.hits == 2
+
+
+def test_keyword_change_invalidates_cached_results(test_models):
+    analyzer = ClaimsAnalyzer(cache=ResultCache())
+    analyzer.analyze_claim(CLAIM)
+    version = analyzer.version
+    
+    analyzer.severity_keywords['low'].remove('scratch')
+    assert analyzer.version != version
+    analyzer.analyze_claim(CLAIM)
+    assert analyzer.cache.misses == 2
+
+
+def test_unread_lazy_sentiment_is_lazy_again_from_disk(test_models, tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ClaimsAnalyzer(cache=ResultCache(path=path), sentiment_mode='lazy').analyze_claim(CLAIM)
+    assert test_models.get('sentiment:transformers').calls == 0
+    
+    analyzer = ClaimsAnalyzer(cache=ResultCache(path=path), sentiment_mode='lazy')
+    single = analyzer.analyze_claim(CLAIM)
+    batched = list(analyzer.analyze_claims([CLAIM]))[0]
+    
+    assert analyzer.cache.disk_hits == 1
+    assert test_models.get('sentiment:transformers').calls == 0
+    expected = ClaimsAnalyzer().analyze_claim(CLAIM)['sentiment']
+    assert dict(single['sentiment']) == dict(batched['sentiment']) == expected
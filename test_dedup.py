@@ -0,0 +1,81 @@
+import pandas as pd
+
+from dedup import DuplicateIndex, candidate_stats
+from model import ClaimsAnalyzer
+
+
+CLAIM = (
+    "Rear-ended at a red light on Main Street in Boston on 03/15/2024. "
+    "2019 Honda Accord has a damaged bumper and trunk. Other driver admitted fault."
+)
+RECYCLED = CLAIM.replace("03/15/2024", "04/02/2024")
+UNRELATED = "Hail storm cracked the windshield and dented the roof of my parked car overnight."
+
+
+def test_index_finds_near_duplicates_only():
+    index = DuplicateIndex(threshold=0.7)
+    assert index.check('CLM001', CLAIM) == []
+    assert index.check('CLM002', UNRELATED) == []
+    
+    matches = index.check('CLM003', RECYCLED)
+    assert [key for key, _ in matches] == ['CLM001']
+    assert matches[0][1] >= 0.7
+    # Re-checking a claim never matches itself
+    assert index.check('CLM001', CLAIM) == [('CLM003', matches[0][1])]
+    assert len(index) == 3
+
+
+def test_truncate_forgets_later_claims():
+    index = DuplicateIndex(threshold=0.7)
+    for key, text in [('CLM001', CLAIM), ('CLM002', UNRELATED), ('CLM003', RECYCLED), ('CLM004', CLAIM)]:
+        index.check(key, text)
+    
+    index.truncate(2)
+    
+    assert index.keys == ['CLM001', 'CLM002'] and 'CLM003' not in index
+    assert [key for key, _ in index.query(RECYCLED)] == ['CLM001']
+    assert index.check('CLM003', RECYCLED)[0][0] == 'CLM001'
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = DuplicateIndex.open(path, threshold=0.7)
+    index.insert('CLM001', CLAIM)
+    index.save()
+    
+    index.insert('CLM002', UNRELATED)
+    index.save(min_interval=60)
+    assert len(DuplicateIndex.open(path)) == 1
+    index.save()
+    
+    reopened = DuplicateIndex.open(path)
+    assert len(reopened) == 2
+    assert reopened.threshold == 0.7
+    assert 'CLM001' in reopened
+    assert reopened.query(RECYCLED) == index.query(RECYCLED)
+
+
+def test_analyzer_flags_recycled_narratives(test_models):
+    analyzer = ClaimsAnalyzer(duplicate_index=DuplicateIndex(threshold=0.7))
+    results = list(analyzer.analyze_claims([CLAIM, UNRELATED, RECYCLED], claim_ids=['A', 'B', 'C']))
+    
+    assert not any('Near-duplicate' in indicator for indicator in results[0]['fraud_indicators'])
+    flagged = results[2]
+    assert flagged['fraud_indicators'][-1].startswith("Near-duplicate of earlier claim A")
+    baseline = ClaimsAnalyzer().analyze_claim(RECYCLED)
+    assert flagged['fraud_score'] == baseline['fraud_score'] + 2
+    assert flagged['fraud_risk'] == ClaimsAnalyzer.fraud_risk_tier(flagged['fraud_score'])
+    
+    # Without an id the text itself is the key, so resubmitting it isn't a duplicate
+    fresh = "Water from a burst pipe soaked the basement carpet and drywall last night."
+    first = analyzer.analyze_claim(fresh)
+    assert analyzer.analyze_claim(fresh + " ")['fraud_score'] == first['fraud_score']
+
+
+def test_candidate_stats_on_bundled_claims():
+    texts = pd.read_csv('claims_small_100.csv')['description'].tolist()
+    stats = candidate_stats(texts, sample=100, threshold=0.5)
+    
+    assert stats['claims'] == 100
+    assert stats['candidates_per_query'] < len(texts) / 2
+    assert 0.0 <= stats['recall'] <= 1.0
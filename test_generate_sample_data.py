@@ -0,0 +1,49 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from generate_sample_data import COLUMNS, generate_claim_chunks, generate_insurance_claims, write_claims
+
+REFERENCE_DATE = date(2026, 1, 1)
+
+
+def test_seeded_generation_is_reproducible():
+    first = generate_insurance_claims(500, seed=7, reference_date=REFERENCE_DATE)
+    second = generate_insurance_claims(500, seed=7, reference_date=REFERENCE_DATE)
+    
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first.columns) == COLUMNS
+    assert first['claim_id'].is_unique
+    assert first['filing_date'].between('2025-01-01', '2025-12-31').all()
+
+
+def test_severity_mix_length_and_duplicates():
+    df = generate_insurance_claims(
+        4000, seed=1, severity_mix={'High': 1.0}, extra_sentences=3, duplicate_rate=0.2,
+        reference_date=REFERENCE_DATE,
+    )
+    plain = generate_insurance_claims(4000, seed=1, severity_mix={'High': 1.0}, reference_date=REFERENCE_DATE)
+    
+    assert set(df['actual_severity']) == {'High'}
+    assert df['description'].str.len().mean() > plain['description'].str.len().mean() + 100
+    assert 0.15 < df['description'].duplicated().mean() < 0.25
+
+
+def test_chunks_stream_to_csv_and_parquet(tmp_path):
+    options = dict(seed=3, near_duplicate_rate=0.1, reference_date=REFERENCE_DATE)
+    chunks = list(generate_claim_chunks(250, chunk_size=100, **options))
+    
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert write_claims(str(tmp_path / 'claims.csv'), 250, chunk_size=100, **options) == 250
+    assert write_claims(str(tmp_path / 'claims.parquet'), 250, chunk_size=100, **options) == 250
+    expected = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'claims.csv'), expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'claims.parquet'), expected)
+
+
+def test_rejects_bad_options():
+    with pytest.raises(ValueError):
+        next(generate_claim_chunks(10, severity_mix={'Critical': 1.0}))
+    with pytest.raises(ValueError):
+        next(generate_claim_chunks(10, duplicate_rate=0.7, near_duplicate_rate=0.5))
@@ -0,0 +1,138 @@
+import json
+
+from ingest import IngestDaemon, parse_csv_block
+
+
+class CountingAnalyzer:
+    """Analyzer wrapper recording which claim ids were analyzed"""
+    
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.analyzed = []
+    
+    def analyze_claims(self, texts, batch_size=32, claim_ids=None):
+        self.analyzed.extend(claim_ids)
+        return self.analyzer.analyze_claims(texts, batch_size=batch_size, claim_ids=claim_ids)
+
+
+def make_daemon(tmp_path, analyzer, **kwargs):
+    watch_dir = tmp_path / 'incoming'
+    watch_dir.mkdir(exist_ok=True)
+    return IngestDaemon(str(watch_dir), str(tmp_path / 'ingest.sqlite'), analyzer=analyzer, **kwargs), watch_dir
+
+
+def test_partial_quoted_record_waits_for_the_rest():
+    data = b'claim_id,description\nCLM1,"Hail damage\non the roof"\nCLM2,"Cracked'
+    header, records, consumed = parse_csv_block(data)
+    
+    assert header == ['claim_id', 'description']
+    assert [fields for fields, _ in records] == [['CLM1', 'Hail damage\non the roof']]
+    assert consumed == data.index(b'CLM2')
+
+
+def test_appended_rows_are_analyzed_once(tmp_path, analyzer):
+    counting = CountingAnalyzer(analyzer)
+    daemon, watch_dir = make_daemon(tmp_path, counting, chunk_size=2)
+    claims = watch_dir / 'claims.csv'
+    claims.write_text(
+        'claim_id,description\nCLM1,Minor scratch on the bumper.\nCLM2,Car stolen from driveway.\nCLM3,Par'
+    )
+    (watch_dir / 'upload.csv.tmp').write_text('claim_id,description\nTMP1,Not finished\n')
+    
+    assert daemon.poll_once() == {str(claims): 2}
+    with claims.open('a') as f:
+        f.write('tial write\nCLM4,Severe fire damage.\n')
+    assert daemon.poll_once() == {str(claims): 2}
+    assert daemon.poll_once() == {}
+    
+    assert counting.analyzed == ['CLM1', 'CLM2', 'CLM3', 'CLM4']
+    assert daemon.result('CLM3')['word_count'] == 2
+    assert daemon.result('TMP1') is None
+
+
+def test_restart_and_replaced_file_skip_analyzed_claims(tmp_path, analyzer):
+    counting = CountingAnalyzer(analyzer)
+    daemon, watch_dir = make_daemon(tmp_path, counting)
+    claims = watch_dir / 'claims.csv'
+    claims.write_text('claim_id,description\nCLM1,Minor scratch on the bumper.\n')
+    daemon.poll_once()
+    daemon.close()
+    
+    daemon, _ = make_daemon(tmp_path, counting)
+    assert daemon.poll_once() == {}
+    # A rewritten file is read from the start, but only the new claim is analyzed
+    claims.unlink()
+    claims.write_text('claim_id,description\nCLM1,Minor scratch on the bumper.\nCLM2,Car stolen.\n')
+    assert daemon.poll_once() == {str(claims): 1}
+    
+    assert counting.analyzed == ['CLM1', 'CLM2']
+    assert daemon.count() == 2
+
+
+def test_jsonl_without_ids_and_bad_lines(tmp_path, analyzer):
+    daemon, watch_dir = make_daemon(tmp_path, analyzer, block_bytes=16)
+    lines = [
+        json.dumps({'description': 'Minor scratch on the bumper.'}),
+        'not json',
+        json.dumps({'claim_id': 'CLM9', 'description': 'Car stolen.'}),
+    ]
+    (watch_dir / 'claims.jsonl').write_text('\n'.join(lines) + '\n')
+    
+    assert daemon.poll_once() == {str(watch_dir / 'claims.jsonl'): 2}
+    assert daemon.result('claims.jsonl:1')['word_count'] == 5
+    assert daemon.result('CLM9') is not None
+
+
+def test_row_ids_count_lines_skipped_after_the_last_claim(tmp_path, analyzer):
+    daemon, watch_dir = make_daemon(tmp_path, analyzer)
+    claims = watch_dir / 'claims.jsonl'
+    claims.write_text(json.dumps({'description': 'Minor scratch.'}) + '\nnot json\n' + json.dumps({'id': 7}) + '\n')
+    daemon.poll_once()
+    with claims.open('a') as f:
+        f.write(json.dumps({'description': 'Car stolen.'}) + '\n')
+    
+    assert daemon.poll_once() == {str(claims): 1}
+    assert daemon.result('claims.jsonl:4')['word_count'] == 2
+    assert daemon.file_status(str(claims)) == {'rows': 4, 'skipped': 2, 'error': None}
+
+
+def test_csv_without_description_column_is_marked_failed(tmp_path, analyzer):
+    counting = CountingAnalyzer(analyzer)
+    daemon, watch_dir = make_daemon(tmp_path, counting)
+    claims = watch_dir / 'claims.csv'
+    claims.write_text('claim_id,text\nCLM1,Minor scratch.\n')
+    
+    assert daemon.poll_once() == {}
+    with claims.open('a') as f:
+        f.write('CLM2,Car stolen.\n')
+    assert daemon.poll_once() == {}
+    
+    assert counting.analyzed == []
+    assert "'description'" in daemon.file_status(str(claims))['error']
+    assert list(daemon.failed_files()) == [str(claims)]
+    # A corrected replacement is read again
+    claims.unlink()
+    claims.write_text('claim_id,description\nCLM1,Minor scratch.\nCLM2\n')
+    assert daemon.poll_once() == {str(claims): 1}
+    assert daemon.file_status(str(claims)) == {'rows': 2, 'skipped': 1, 'error': None}
+
+
+def test_stop_takes_effect_after_the_chunk_in_flight(tmp_path, analyzer):
+    class StoppingAnalyzer(CountingAnalyzer):
+        def analyze_claims(self, texts, batch_size=32, claim_ids=None):
+            daemon.stop()
+            return super().analyze_claims(texts, batch_size=batch_size, claim_ids=claim_ids)
+    
+    counting = StoppingAnalyzer(analyzer)
+    daemon, watch_dir = make_daemon(tmp_path, counting, chunk_size=2)
+    claims = watch_dir / 'claims.csv'
+    claims.write_text('claim_id,description\n' + ''.join(f'CLM{i},Minor scratch {i}.\n' for i in range(1, 6)))
+    
+    assert daemon.poll_once() == {str(claims): 2}
+    assert daemon.file_status(str(claims))['rows'] == 2
+    daemon.close()
+    
+    # The rest of the block is picked up from the checkpoint by the next run
+    daemon, _ = make_daemon(tmp_path, CountingAnalyzer(analyzer), chunk_size=2)
+    assert daemon.poll_once() == {str(claims): 3}
+    assert counting.analyzed + daemon.analyzer.analyzed == [f'CLM{i}' for i in range(1, 6)]
@@ -0,0 +1,86 @@
+import threading
+
+from dedup import DuplicateIndex
+from jobs import JobManager, job_id_for
+from model import ClaimsAnalyzer
+
+
+CLAIMS = [
+    "Minor scratch on rear bumper in Boston. No injuries.",
+    "Severe damage, vehicle destroyed in a fire.",
+    "Small dent on the door after a parking lot bump.",
+]
+
+
+class BlockingAnalyzer:
+    """Analyzer stand-in that holds each chunk until released"""
+    
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.release = threading.Event()
+        self.calls = 0
+    
+    def analyze_claims(self, texts, batch_size=32, claim_ids=None):
+        self.calls += 1
+        self.release.wait(5)
+        return self.analyzer.analyze_claims(texts, batch_size=batch_size, claim_ids=claim_ids)
+
+
+def test_job_id_tracks_file_and_version():
+    assert job_id_for(b"a,b\n", "v1") == job_id_for(b"a,b\n", "v1")
+    assert job_id_for(b"a,b\n", "v1") != job_id_for(b"a,c\n", "v1")
+    assert job_id_for(b"a,b\n", "v1") != job_id_for(b"a,b\n", "v2")
+
+
+def test_job_runs_in_chunks_and_keeps_claim_ids(test_models):
+    manager = JobManager(ClaimsAnalyzer(), chunk_size=2)
+    job = manager.submit('job', ['CLM001', 'CLM002', 'CLM003'], CLAIMS)
+    job.wait(5)
+    
+    assert job.status == 'done'
+    assert job.progress == 1.0
+    assert job.snapshot().column('claim_id').to_pylist() == ['CLM001', 'CLM002', 'CLM003']
+    # Eager sentiment runs once per chunk
+    assert test_models.get('sentiment:transformers').calls == 2
+
+
+def test_jobs_reusing_claim_ids_are_deduplicated_separately(test_models):
+    index = DuplicateIndex(threshold=0.7)
+    manager = JobManager(ClaimsAnalyzer(duplicate_index=index), chunk_size=2)
+    manager.submit('first', ['CLM001', 'CLM002', 'CLM003'], CLAIMS).wait(5)
+    recycled = [CLAIMS[1].replace("fire", "fire."), "Hail cracked the windshield overnight."]
+    job = manager.submit('second', ['CLM001', 'CLM002'], recycled, source='upload.csv')
+    job.wait(5)
+    
+    assert len(index) == 5
+    indicators = job.table.to_arrow().column('fraud_indicators').to_pylist()
+    assert any(i.startswith("Near-duplicate of earlier claim first:CLM002") for i in indicators[0])
+    assert not any('Near-duplicate' in i for i in indicators[1])
+
+
+def test_resubmitting_reuses_running_and_finished_jobs(analyzer):
+    analyzer = BlockingAnalyzer(analyzer)
+    manager = JobManager(analyzer, chunk_size=2)
+    job = manager.submit('job', ['a', 'b', 'c'], CLAIMS)
+    
+    assert manager.submit('job', ['a', 'b', 'c'], CLAIMS) is job
+    analyzer.release.set()
+    job.wait(5)
+    
+    assert job.status == 'done'
+    assert manager.get('job') is job
+    assert analyzer.calls == 2
+
+
+def test_failed_job_reports_error_and_can_be_retried():
+    class Broken:
+        def analyze_claims(self, texts, batch_size=32, claim_ids=None):
+            raise RuntimeError("model unavailable")
+    
+    manager = JobManager(Broken())
+    job = manager.submit('job', ['a'], CLAIMS[:1])
+    job.wait(5)
+    
+    assert job.status == 'failed'
+    assert 'model unavailable' in job.error
+    assert manager.submit('job', ['a'], CLAIMS[:1]) is not job
@@ -0,0 +1,64 @@
+import json
+
+from keywords import KeywordHit, KeywordMatcher
+from model import ClaimsAnalyzer
+
+
+def test_matcher_respects_word_boundaries():
+    matcher = KeywordMatcher({'low': ['chip'], 'high': ['major']})
+    assert matcher.find("Chipped paint; the majority of the panel is fine.") == []
+    assert matcher.find("Small chip, major dent") == [
+        KeywordHit('chip', 'low', 6, 10),
+        KeywordHit('major', 'high', 12, 17),
+    ]
+
+
+def test_matcher_reports_every_category_for_shared_keywords():
+    matcher = KeywordMatcher({'severity_high': ['urgent'], 'urgency': ['urgent', 'asap']})
+    hits = matcher.find("URGENT: respond ASAP")
+    assert [(hit.keyword, hit.category) for hit in hits] == [
+        ('urgent', 'severity_high'),
+        ('urgent', 'urgency'),
+        ('asap', 'urgency'),
+    ]
+
+
+def test_matcher_handles_multiword_keywords():
+    matcher = KeywordMatcher({'high': ['total loss']})
+    assert matcher.find("Vehicle is a TOTAL  loss") == [KeywordHit('total loss', 'high', 13, 24)]
+
+
+def test_keyword_rules_use_matcher():
+    analyzer = ClaimsAnalyzer()
+    risk, indicators, score = analyzer.detect_fraud_indicators(
+        "Reported stolen but it was a mistake, the car was missing for an hour."
+    )
+    assert indicators[:3] == [
+        "Contains keyword: 'stolen'",
+        "Contains keyword: 'missing'",
+        "Contains keyword: 'mistake'",
+    ]
+    assert "Claim retraction mentioned" in indicators
+    assert risk == 'High'
+
+
+def test_keywords_load_from_config_and_recompile_on_change(tmp_path):
+    config = tmp_path / "keywords.json"
+    config.write_text(json.dumps({"fraud": ["staged"], "severity": {"low": ["cosmetic"]}}))
+    
+    analyzer = ClaimsAnalyzer(keyword_config=config)
+    assert analyzer.fraud_keywords == ["staged"]
+    assert analyzer.severity_keywords['low'] == ["cosmetic"]
+    assert analyzer.severity_keywords['high'][0] == 'total loss'
+    
+    matcher = analyzer.keyword_matcher
+    assert analyzer.keyword_matcher is matcher
+    
+    analyzer.fraud_keywords.append('forged')
+    assert analyzer.keyword_matcher is not matcher
+    assert analyzer.keyword_matcher.find("forged receipt")[0].category == 'fraud'
+
+
+def test_case_folded_spellings_map_to_configured_keyword():
+    matcher = KeywordMatcher({'fraud': ['stolen']})
+    assert [hit.keyword for hit in matcher.find("STOLEN, then ſtolen again")] == ['stolen', 'stolen']
@@ -0,0 +1,53 @@
+from longdoc import aggregate_sentiment, count_words, pack_windows, sentence_spans, windowed_sentiment
+from model import ClaimsAnalyzer
+
+
+def test_windows_are_sentence_aligned_and_cover_the_text():
+    text = "Car hit in Boston. " * 30 + "word " * 120 + "\n\nTowed to Quincy! Done."
+    windows = list(pack_windows(text, 200))
+    
+    assert ''.join(text[start:end] for start, end, _ in windows) == text
+    assert all(size == end - start <= 200 for start, end, size in windows)
+    sentence_ends = {end for _, end in sentence_spans(text)}
+    # Only the 600-character run-on sentence is split mid-sentence, into four pieces
+    assert sum(end not in sentence_ends for _, end, _ in windows) == 3
+
+
+def test_aggregate_weights_windows_by_length():
+    results = [{'label': 'POSITIVE', 'score': 0.9}, {'label': 'NEGATIVE', 'score': 0.8}]
+    
+    assert aggregate_sentiment(results, [10, 490])['label'] == 'NEGATIVE'
+    assert aggregate_sentiment(results, [490, 10])['label'] == 'POSITIVE'
+    assert aggregate_sentiment(results, [1, 1]) == {'label': 'POSITIVE', 'score': 0.55}
+
+
+def test_windowed_sentiment_batches_every_window():
+    from test_sentiment import WordSentiment
+    
+    model = WordSentiment(max_length=52)
+    text = "The adjuster was kind and helpful. " * 40
+    windowed_sentiment(text, model, batch_size=4)
+    
+    # Six-word sentences, eight to a 50-token window, sent four windows at a time
+    assert [len(batch) for batch in model.batches] == [4, 1]
+    assert {length for batch in model.batches for length in batch} == {48}
+
+
+def test_long_claim_uses_every_window(test_models):
+    text = (
+        "My 2019 Honda Civic was parked in Boston. The staff were kind and helpful. " * 60
+        + "Later the garage caught fire and the car was destroyed near Quincy. " * 120
+    )
+    analyzer = ClaimsAnalyzer(long_document_chars=2000)
+    result = analyzer.analyze_claim(text)
+    
+    assert result['entities']['locations'] == ['Boston'] * 60 + ['Quincy'] * 120
+    assert result['entities']['vehicles'] == ['2019 Honda Civic'] * 60
+    assert result['summary'] == "My 2019 Honda Civic was parked in Boston."
+    assert result['word_count'] == count_words(text) == len(text.split())
+    # The fire takes up most of the claim, so it outweighs the calm opening windows
+    assert result['sentiment']['label'] == 'NEGATIVE'
+    # Only windows went through spaCy, never the whole claim
+    assert test_models.get('nlp:full').calls == 0
+    # Every mention is kept, the same as for a claim parsed as one Doc
+    assert result['entities'] == ClaimsAnalyzer(long_document_chars=None).extract_entities(text)
@@ -0,0 +1,59 @@
+from cache import ResultCache
+from metrics import MetricsRegistry
+from model import ClaimsAnalyzer
+
+
+CLAIM = "Severe accident near Boston. Major damage to the front bumper."
+STAGES = {
+    'spacy_parse', 'sentiment', 'extract_entities', 'classify_severity',
+    'detect_fraud_indicators', 'generate_summary',
+}
+
+
+def test_analyze_claim_records_stage_timings(test_models):
+    metrics = MetricsRegistry()
+    analyzer = ClaimsAnalyzer(metrics=metrics, cache=ResultCache())
+    analyzer.analyze_claim(CLAIM)
+    
+    timings = analyzer.last_timings
+    assert set(timings) == STAGES | {'input_chars', 'batch_size'}
+    assert timings['input_chars'] == len(CLAIM)
+    
+    stages = {h['labels']['stage'] for h in metrics.to_json()['histograms'] if h['name'] == 'stage_seconds'}
+    assert stages == STAGES
+    
+    analyzer.analyze_claim(CLAIM)
+    assert analyzer.last_timings is None
+    assert 'claims_analyzer_cache_hits_total 1' in metrics.to_prometheus()
+
+
+def test_batch_records_batch_stages(test_models):
+    metrics = MetricsRegistry()
+    analyzer = ClaimsAnalyzer(metrics=metrics)
+    list(analyzer.analyze_claims([CLAIM] * 5, batch_size=4))
+    
+    assert analyzer.last_timings['batch_size'] == 1
+    text = metrics.to_prometheus()
+    assert 'claims_analyzer_claims_analyzed_total 5' in text
+    assert 'claims_analyzer_stage_seconds_count{stage="spacy_pipe"} 2' in text
+    assert 'claims_analyzer_batch_size_bucket{le="4"} 2' in text
+
+
+def test_disabled_metrics_leave_no_timings(analyzer):
+    analyzer.analyze_claim(CLAIM)
+    assert analyzer.last_timings is None
+
+
+def test_prometheus_histogram_is_cumulative():
+    metrics = MetricsRegistry(prefix='test')
+    for value in (0.002, 0.02, 20):
+        metrics.observe('latency', value, buckets=(0.01, 0.1), stage='x')
+    
+    assert metrics.to_prometheus().splitlines() == [
+        '# TYPE test_latency histogram',
+        'test_latency_bucket{stage="x",le="0.01"} 1',
+        'test_latency_bucket{stage="x",le="0.1"} 2',
+        'test_latency_bucket{stage="x",le="+Inf"} 3',
+        'test_latency_sum{stage="x"} 20.022',
+        'test_latency_count{stage="x"} 3',
+    ]
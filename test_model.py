@@ -0,0 +1,146 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import model
+from conftest import CallCounter
+from model import ClaimContext, ModelRegistry
+from sentiment import LazySentiment
+
+
+CLAIM = (
+    "Severe accident on highway near Boston on 03/15/2024. "
+    "Major damage to front bumper. Estimated repair cost $3,500."
+)
+
+
+def test_analyze_claim_parses_once(analyzer, test_models):
+    analyzer.analyze_claim(CLAIM)
+    assert test_models.get('nlp:full').calls == 1
+    
+    analyzer.analyze_claim("Minor scratch on rear bumper. No injuries.")
+    assert test_models.get('nlp:full').calls == 2
+
+
+def test_stage_methods_accept_text(analyzer, test_models):
+    assert analyzer.extract_entities(CLAIM)['locations'] == ['Boston']
+    assert analyzer.generate_summary(CLAIM).startswith("Severe accident")
+    assert analyzer.classify_severity(CLAIM)[0] == 'High'
+    assert test_models.get('nlp:full').calls == 2
+
+
+def test_stages_share_context(analyzer, test_models):
+    context = ClaimContext(CLAIM)
+    analyzer.extract_entities(context)
+    analyzer.generate_summary(context)
+    assert test_models.get('nlp:full').calls == 1
+
+
+def test_analyze_claims_matches_single_results(analyzer, test_models):
+    claims = [
+        CLAIM,
+        "Minor scratch on rear bumper. No injuries.",
+        "Claimed stolen vehicle but it was a false alarm. URGENT, need help immediately.",
+    ]
+    expected = [analyzer.analyze_claim(text) for text in claims]
+    test_models.get('nlp:full').calls = 0
+    test_models.get('sentiment:transformers').calls = 0
+    
+    results = list(analyzer.analyze_claims(iter(claims), batch_size=2))
+    
+    assert results == expected
+    # Batches go through nlp.pipe and one sentiment call per chunk
+    assert test_models.get('nlp:full').calls == 0
+    assert test_models.get('sentiment:transformers').calls == 2
+
+
+def test_import_does_not_load_models():
+    code = (
+        "import sys, model\n"
+        "analyzer = model.ClaimsAnalyzer()\n"
+        "print(analyzer.detect_fraud_indicators('My car was stolen, urgent, please respond immediately.'))\n"
+        "assert not model.models.is_loaded('nlp:full')\n"
+        "assert not any(name in sys.modules for name in ('spacy', 'torch', 'transformers'))\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+
+def test_registry_loads_once_across_threads():
+    loads = []
+    
+    def slow_loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+    
+    registry = ModelRegistry()
+    registry.register('slow', slow_loader)
+    seen = []
+    threads = [
+        threading.Thread(target=lambda: seen.append(registry.get('slow')))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(loads) == 1
+    assert len(set(map(id, seen))) == 1
+
+
+def test_nlp_profile_selects_pipeline(test_models, test_nlp):
+    fast_nlp = CallCounter(test_nlp)
+    test_models.set('nlp:fast', fast_nlp)
+    
+    fast = model.ClaimsAnalyzer(nlp_profile='fast')
+    fast.analyze_claim(CLAIM)
+    list(fast.analyze_claims([CLAIM]))
+    
+    assert fast_nlp.calls == 1
+    assert test_models.get('nlp:full').calls == 0
+    assert fast.version != model.ClaimsAnalyzer().version
+
+
+def test_unknown_nlp_profile_is_rejected():
+    with pytest.raises(ValueError):
+        model.ClaimsAnalyzer(nlp_profile='turbo')
+
+
+def test_lazy_sentiment_matches_eager_decisions(test_models):
+    import pandas as pd
+    
+    texts = pd.read_csv('claims_small_100.csv')['description'].tolist()
+    eager = list(model.ClaimsAnalyzer().analyze_claims(texts))
+    sentiment_model = test_models.get('sentiment:transformers')
+    sentiment_model.calls = 0
+    
+    lazy_analyzer = model.ClaimsAnalyzer(sentiment_mode='lazy')
+    lazy = list(lazy_analyzer.analyze_claims(texts, batch_size=100))
+    
+    assert [r['severity'] for r in lazy] == [r['severity'] for r in eager]
+    assert [r['severity_confidence'] for r in lazy] == [r['severity_confidence'] for r in eager]
+    assert lazy_analyzer.sentiment_stats['skipped'] > 0
+    assert sentiment_model.calls == 1
+    
+    # Reading a skipped sentiment runs the model on demand
+    skipped = next(r for r in lazy if isinstance(r['sentiment'], LazySentiment))
+    assert not skipped['sentiment'].evaluated
+    index = lazy.index(skipped)
+    assert dict(skipped['sentiment']) == eager[index]['sentiment']
+    assert sentiment_model.calls == 2
+
+
+def test_lazy_sentiment_is_serialized_as_null(test_models):
+    import json
+    from sentiment import json_default
+    
+    analyzer = model.ClaimsAnalyzer(sentiment_mode='lazy')
+    result = analyzer.analyze_claim("Minor scratch and small dent on the door.")
+    
+    assert analyzer.sentiment_stats == {'required': 0, 'skipped': 1}
+    assert json.loads(json.dumps(result, default=json_default))['sentiment'] is None
+    assert test_models.get('sentiment:transformers').calls == 0
@@ -0,0 +1,43 @@
+from conftest import install_test_models
+from parallel import ParallelAnalyzer, throughput_curve
+
+
+CLAIMS = [
+    f"Minor scratch on rear bumper at Boston mall, claim {i}. No injuries."
+    if i % 3 else
+    f"Severe accident near Quincy, vehicle {i} destroyed. Airbags deployed."
+    for i in range(40)
+]
+
+
+def test_parallel_results_match_serial_order(analyzer):
+    expected = list(analyzer.analyze_claims(CLAIMS))
+    with ParallelAnalyzer(workers=2, chunk_size=7, worker_setup=install_test_models) as engine:
+        assert list(engine.analyze_claims(CLAIMS)) == expected
+
+
+def test_lazy_sentiment_survives_the_pool(test_models):
+    import model
+    expected = list(model.ClaimsAnalyzer(sentiment_mode='lazy').analyze_claims(CLAIMS))
+    with ParallelAnalyzer(workers=2, chunk_size=7, worker_setup=install_test_models,
+                          analyzer_kwargs={'sentiment_mode': 'lazy'}) as engine:
+        results = list(engine.analyze_claims(CLAIMS))
+    
+    assert 'error' not in results[0]
+    assert results == expected
+
+
+def test_bad_row_is_isolated():
+    claims = ["Minor scratch on door.", None, "Severe damage, vehicle destroyed."]
+    with ParallelAnalyzer(workers=1, chunk_size=3, worker_setup=install_test_models) as engine:
+        results = list(engine.analyze_claims(claims))
+    
+    assert results[0]['severity'] == 'Low'
+    assert 'error' in results[1]
+    assert results[2]['severity'] == 'High'
+
+
+def test_throughput_curve_reports_each_worker_count():
+    curve = throughput_curve(CLAIMS, [1, 2], chunk_size=10, worker_setup=install_test_models)
+    assert [point['workers'] for point in curve] == [1, 2]
+    assert all(point['claims_per_sec'] > 0 for point in curve)
@@ -0,0 +1,68 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from results import ResultTable
+
+
+CLAIMS = [
+    "Minor scratch on door in Boston.",
+    "Severe accident near Quincy, vehicle destroyed.",
+    "Small chip and a tiny dent on the hood in Boston.",
+]
+
+
+def build_table(analyzer, batch_rows=2):
+    results = list(analyzer.analyze_claims(CLAIMS))
+    return ResultTable.from_results(['CLM001', 'CLM002', 'CLM003'], results, batch_rows=batch_rows), results
+
+
+def test_columns_are_typed(analyzer):
+    table, results = build_table(analyzer)
+    arrow = table.to_arrow()
+    
+    assert len(table) == 3
+    assert arrow.schema.field('fraud_score').type == pa.int32()
+    assert arrow.schema.field('severity_confidence').type == pa.float64()
+    assert arrow.column('locations').to_pylist()[0] == ['Boston']
+    assert arrow.column('fraud_indicators').to_pylist() == [r['fraud_indicators'] for r in results]
+    
+    df = table.to_pandas()
+    assert isinstance(df['severity'].dtype, pd.CategoricalDtype)
+    assert list(df['severity'].cat.categories) == ['Low', 'Medium', 'High']
+    assert df['severity'].tolist() == [r['severity'] for r in results]
+
+
+def test_group_counts_follow_category_order(analyzer):
+    table, results = build_table(analyzer)
+    counts = table.group_counts('severity')
+    
+    expected = pd.Series([r['severity'] for r in results]).value_counts()
+    assert dict(zip(counts['severity'], counts['count'])) == expected.to_dict()
+    order = ['Low', 'Medium', 'High']
+    assert list(counts['severity']) == sorted(counts['severity'], key=order.index)
+
+
+def test_exports_round_trip(analyzer):
+    table, _ = build_table(analyzer)
+    
+    parquet = pq.read_table(io.BytesIO(table.to_bytes('parquet')))
+    assert parquet.equals(table.to_arrow())
+    
+    arrow = pa.ipc.open_file(pa.BufferReader(table.to_bytes('arrow'))).read_all()
+    assert arrow.equals(table.to_arrow())
+    
+    csv = pd.read_csv(io.BytesIO(table.to_bytes('csv')))
+    assert csv['claim_id'].tolist() == ['CLM001', 'CLM002', 'CLM003']
+    assert csv['locations'].iloc[0] == 'Boston'
+
+
+def test_error_rows_keep_their_claim_id():
+    table = ResultTable.from_results([7], [{'error': "ValueError: bad row"}])
+    row = table.to_arrow().to_pylist()[0]
+    
+    assert row['claim_id'] == '7'
+    assert row['error'] == "ValueError: bad row"
+    assert row['severity'] is None
@@ -0,0 +1,79 @@
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from conftest import fake_sentiment
+from model import ClaimsAnalyzer
+from rules import resolve_severity
+
+BUNDLED_CSVS = [
+    'sample_claims.csv', 'claims_small_100.csv', 'claims_medium_500.csv',
+    'claims_large_1000.csv', 'claims_xlarge_2000.csv',
+]
+
+
+def per_claim_rules(analyzer, texts):
+    rows = []
+    for text in texts:
+        fraud_risk, indicators, fraud_score = analyzer.detect_fraud_indicators(text)
+        severity, confidence, _ = analyzer.classify_severity(text)
+        rows.append((fraud_risk, indicators, fraud_score, severity, confidence, len(text.split())))
+    return rows
+
+
+def assert_matches_per_claim(analyzer, texts):
+    rules = analyzer.evaluate_rules(texts)
+    labels = [result['label'] for result in fake_sentiment(texts)]
+    final = resolve_severity(rules, labels)
+    
+    expected = per_claim_rules(analyzer, texts)
+    assert rules['fraud_risk'].tolist() == [row[0] for row in expected]
+    assert rules['fraud_indicators'].tolist() == [row[1] for row in expected]
+    assert rules['fraud_score'].tolist() == [row[2] for row in expected]
+    assert final['severity'].tolist() == [row[3] for row in expected]
+    assert final['severity_confidence'].tolist() == [row[4] for row in expected]
+    assert rules['word_count'].tolist() == [row[5] for row in expected]
+    assert rules['sentiment_required'].tolist() == [
+        analyzer.sentiment_required(*analyzer.severity_counts(text)[::2]) for text in texts
+    ]
+    
+    # Pre-decisions never disagree with the final severity
+    decided = ~rules['sentiment_required']
+    assert (rules.loc[decided, 'severity'] == final.loc[decided, 'severity']).all()
+    assert rules.loc[~decided, 'severity'].isna().all()
+
+
+@pytest.mark.parametrize('path', BUNDLED_CSVS)
+def test_batch_rules_match_per_claim_methods(analyzer, path):
+    texts = pd.read_csv(path)['description']
+    assert_matches_per_claim(analyzer, texts.tolist())
+
+
+def test_overlapping_and_duplicate_keywords(test_models, tmp_path):
+    config = tmp_path / "keywords.json"
+    config.write_text(json.dumps({
+        'fraud': ['false alarm', 'alarm', 'stolen', 'stolen'],
+        'urgency': ['urgent', 'asap'],
+    }))
+    analyzer = ClaimsAnalyzer(keyword_config=str(config))
+    texts = [
+        "It was a FALSE   alarm, nothing was stolen. Urgent, ASAP!",
+        "The alarm went off and the car was stolen.",
+        "",
+        # Non-ASCII claims keep case-insensitive matching ('ſ' folds to 's')
+        "Le véhicule a été ſtolen; URGENT, asap.",
+        "Severe and major damage, minor scratch. " * 3,
+    ]
+    assert_matches_per_claim(analyzer, texts)
+
+
+def test_accepts_arrow_and_keeps_series_index(analyzer):
+    texts = ["Minor scratch on door.", "Vehicle stolen, urgent, asap!"]
+    from_arrow = analyzer.evaluate_rules(pa.chunked_array([texts]), indicators=False)
+    from_series = analyzer.evaluate_rules(pd.Series(texts, index=[10, 20]), indicators=False)
+    
+    assert list(from_series.index) == [10, 20]
+    assert from_arrow['fraud_score'].tolist() == from_series['fraud_score'].tolist()
+    assert 'fraud_indicators' not in from_arrow
@@ -0,0 +1,66 @@
+from sentiment import BatchedSentiment, SentimentScheduler, naive_batches, padded_tokens
+
+
+class WordSentiment(BatchedSentiment):
+    """Whitespace-tokenized stand-in that records the batches it receives"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+    
+    def encode(self, texts):
+        return [text.split()[:self.max_length] for text in texts]
+    
+    def predict_encoded(self, encodings):
+        self.batches.append([len(ids) for ids in encodings])
+        return [{'label': 'POSITIVE', 'score': len(ids)} for ids in encodings]
+
+
+def test_plan_respects_token_budget_and_covers_every_claim():
+    lengths = [500, 12, 40, 15, 480, 30, 14, 200]
+    batches = SentimentScheduler(token_budget=1000, max_batch_size=4).plan(lengths)
+    
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 1000
+    
+    bucketed = padded_tokens(lengths, batches)
+    naive = padded_tokens(lengths, naive_batches(len(lengths), 4))
+    assert bucketed < naive
+
+
+def test_results_come_back_in_input_order_and_truncated():
+    model = WordSentiment(max_length=50, token_budget=100, max_batch_size=8)
+    texts = ["word " * 80, "short claim", "a slightly longer claim here", "tiny"]
+    
+    results = model(texts)
+    
+    assert [r['score'] for r in results] == [50, 2, 5, 1]
+    # Shortest claims share a batch; the long one is padded alone
+    assert model.batches == [[1, 2, 5], [50]]
+
+
+def test_single_text_and_naive_mode():
+    model = WordSentiment(bucketed=False)
+    assert model("just one claim") == [{'label': 'POSITIVE', 'score': 3}]
+    model(["a b c", "a", "a b"], batch_size=2)
+    assert model.batches[1:] == [[3, 1], [2]]
+
+
+def test_analyzer_uses_configured_backend(test_models):
+    import pytest
+    import model
+    from conftest import CallCounter, fake_sentiment
+    
+    onnx = CallCounter(fake_sentiment)
+    test_models.set('sentiment:onnx', onnx)
+    
+    analyzer = model.ClaimsAnalyzer(sentiment_backend='onnx')
+    result = analyzer.analyze_claim("Severe accident, car destroyed.")
+    
+    assert result['sentiment'] == {'label': 'NEGATIVE', 'score': 0.98}
+    assert onnx.calls == 1
+    assert test_models.get('sentiment:transformers').calls == 0
+    with pytest.raises(ValueError):
+        model.ClaimsAnalyzer(sentiment_backend='tensorrt')
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+
+from model import ClaimsAnalyzer
+from server import MAX_BODY_BYTES, ClaimsServer
+
+
+async def request(port, method, path, payload=None, content_length=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    content_length = len(body) if content_length is None else content_length
+    return await raw_request(
+        port,
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+        f"Content-Length: {content_length}\r\n\r\n".encode() + body
+    )
+
+
+async def raw_request(port, data):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    return status, json.loads(body) if body.startswith((b'{', b'[')) else body.decode()
+
+
+def run_with_server(scenario, **kwargs):
+    async def main():
+        server = ClaimsServer(analyzer=kwargs.pop('analyzer', None), **kwargs)
+        _, port = await server.start('127.0.0.1', 0)
+        try:
+            await server._warmup_task
+            return await scenario(server, port)
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_are_micro_batched(test_models):
+    claims = [f"Minor scratch on door number {i} in Boston." for i in range(12)]
+    
+    async def scenario(server, port):
+        responses = await asyncio.gather(*[
+            request(port, 'POST', '/analyze', {'text': text}) for text in claims
+        ])
+        return server, responses
+    
+    server, responses = run_with_server(scenario, analyzer=ClaimsAnalyzer(), max_batch_size=8, max_wait=0.05)
+    
+    assert [status for status, _ in responses] == [200] * 12
+    assert all(body['severity'] == 'Low' for _, body in responses)
+    assert server.batcher.batches < 12
+    assert test_models.get('sentiment:transformers').calls == server.batcher.batches
+
+
+def test_batch_endpoint_health_and_errors(test_models):
+    async def scenario(server, port):
+        return (
+            await request(port, 'GET', '/health'),
+            await request(port, 'POST', '/analyze_batch', {'texts': ["Severe damage, car destroyed.", "Tiny chip."]}),
+            await request(port, 'POST', '/analyze', {'text': ''}),
+            await request(port, 'GET', '/missing'),
+            await request(port, 'GET', '/metrics'),
+        )
+    
+    health, batch, bad, missing, metrics = run_with_server(scenario)
+    
+    assert health[0] == 200 and health[1]['status'] == 'ready'
+    assert [r['severity'] for r in batch[1]['results']] == ['High', 'Low']
+    assert bad[0] == 400
+    assert missing[0] == 404
+    assert 'claims_analyzer_claims_analyzed_total 2' in metrics[1]
+
+
+def test_full_queue_returns_503(test_models):
+    async def scenario(server, port):
+        # Occupy the analyzer thread so queued claims pile up
+        blocker = asyncio.get_running_loop().create_task(
+            server.batcher.run_in_worker(lambda: __import__('time').sleep(0.3))
+        )
+        await asyncio.sleep(0.01)
+        responses = await asyncio.gather(*[
+            request(port, 'POST', '/analyze', {'text': f"Minor scratch {i}."}) for i in range(6)
+        ])
+        await blocker
+        return responses
+    
+    responses = run_with_server(scenario, max_batch_size=1, max_wait=0, max_queue=2)
+    statuses = sorted(status for status, _ in responses)
+    assert 503 in statuses and 200 in statuses
+
+
+
+def test_batch_requests_share_the_bounded_queue(test_models):
+    async def scenario(server, port):
+        blocker = asyncio.get_running_loop().create_task(server.batcher.run_in_worker(time.sleep, 0.3))
+        await asyncio.sleep(0.01)
+        fits = asyncio.get_running_loop().create_task(
+            request(port, 'POST', '/analyze_batch', {'texts': ["Severe damage, car destroyed.", "Tiny chip."]})
+        )
+        await asyncio.sleep(0.05)
+        no_room = await request(port, 'POST', '/analyze_batch', {'texts': ["Tiny chip.", "Dent.", "Scratch."]})
+        never_fits = await request(port, 'POST', '/analyze_batch', {'texts': ["Dent."] * 4})
+        fits, _ = await asyncio.gather(fits, blocker)
+        return no_room, never_fits, fits
+    
+    no_room, never_fits, fits = run_with_server(scenario, max_batch_size=1, max_wait=0, max_queue=3)
+    
+    # Room frees up once the queued batch runs, but a batch over the queue size never fits
+    assert no_room[0] == 503
+    assert never_fits[0] == 413
+    assert fits[0] == 200 and [r['severity'] for r in fits[1]['results']] == ['High', 'Low']
+
+
+def test_malformed_and_oversized_requests(test_models):
+    async def scenario(server, port):
+        return (
+            await request(port, 'POST', '/analyze', {'text': "Dent."}, content_length='12abc'),
+            await request(port, 'POST', '/analyze', content_length=MAX_BODY_BYTES + 1),
+        )
+    
+    bad_length, too_large = run_with_server(scenario)
+    
+    assert bad_length[0] == 400 and 'Content-Length' in bad_length[1]['error']
+    assert too_large[0] == 413
+
+
+def test_failed_warmup_is_reported(test_models):
+    analyzer = ClaimsAnalyzer()
+    
+    def warmup():
+        raise OSError("model files missing")
+    analyzer.warmup = warmup
+    
+    status, health = run_with_server(lambda server, port: request(port, 'GET', '/health'), analyzer=analyzer)
+    
+    assert status == 503
+    assert health['status'] == 'failed'
+    assert health['error'] == "OSError: model files missing"
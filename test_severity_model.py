@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from model import ClaimsAnalyzer
+from severity_model import (
+    DATASETS, HashingSeverityModel, evaluate, held_out, load_labeled, train_model, train_test_split,
+)
+
+
+@pytest.fixture(scope="module")
+def trained():
+    texts, labels = load_labeled(DATASETS)
+    train_texts, train_labels, test_texts, test_labels = train_test_split(texts, labels, 0.2, seed=0)
+    model = HashingSeverityModel(n_features=2 ** 16).fit(train_texts, train_labels)
+    return model, test_texts, test_labels
+
+
+def test_predictions_are_calibrated_probabilities(trained):
+    model, texts, labels = trained
+    probabilities = model.predict_proba(texts)
+    
+    assert model.classes == ['High', 'Low', 'Medium']
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    # The single-claim fast path hashes exactly like HashingVectorizer
+    np.testing.assert_allclose(model.predict_proba(texts[0]), probabilities[:1], atol=1e-6)
+    
+    report = evaluate(model, texts, labels)
+    assert report['hashing']['accuracy'] > 0.9
+    assert report['hashing']['calibration_error'] < 0.1
+
+
+def test_save_and_load_round_trip(trained, tmp_path):
+    model, texts, _ = trained
+    path = str(tmp_path / 'severity.joblib')
+    model.save(path)
+    loaded = HashingSeverityModel.load(path)
+    
+    assert loaded.predict(texts[:5]) == model.predict(texts[:5])
+    assert len(loaded.fingerprint) == 16
+
+
+def test_saved_model_evaluates_on_its_held_out_rows(tmp_path):
+    model, test_texts, test_labels = train_model(DATASETS[:1], test_size=0.25, seed=3, n_features=2 ** 12)
+    path = str(tmp_path / 'severity.joblib')
+    model.save(path)
+    
+    texts, labels = held_out(HashingSeverityModel.load(path))
+    
+    assert (texts, labels) == (test_texts, test_labels)
+    assert len(texts) == 25
+    with pytest.raises(ValueError):
+        held_out(HashingSeverityModel())
+
+
+def test_analyzer_hashing_backend_skips_sentiment(trained, tmp_path, test_models):
+    model, texts, _ = trained
+    path = str(tmp_path / 'severity.joblib')
+    model.save(path)
+    analyzer = ClaimsAnalyzer(severity_backend='hashing', severity_model_path=path)
+    
+    results = list(analyzer.analyze_claims(texts[:10], batch_size=4))
+    single = analyzer.analyze_claim(texts[0])
+    
+    assert [(r['severity'], r['severity_confidence']) for r in results] == model.predict(texts[:10])
+    assert (single['severity'], single['severity_confidence']) == model.predict(texts[0])[0]
+    assert test_models.get('sentiment:transformers').calls == 0
+    assert analyzer.version != ClaimsAnalyzer().version
+    with pytest.raises(ValueError):
+        ClaimsAnalyzer(severity_backend='bert')
+
+
+def test_hashing_backend_runs_in_worker_processes(trained, tmp_path):
+    from conftest import install_test_models
+    from parallel import ParallelAnalyzer
+    
+    model, texts, _ = trained
+    path = str(tmp_path / 'severity.joblib')
+    model.save(path)
+    kwargs = {'severity_backend': 'hashing', 'severity_model_path': path}
+    with ParallelAnalyzer(workers=2, chunk_size=4, worker_setup=install_test_models,
+                          analyzer_kwargs=kwargs) as engine:
+        results = list(engine.analyze_claims(texts[:10]))
+    
+    # Every result carries unevaluated sentiment, which has to pickle back from the workers
+    assert [(r['severity'], r['severity_confidence']) for r in results] == model.predict(texts[:10])
+
+
+def test_evaluate_compares_rules_path(trained, analyzer):
+    model, texts, labels = trained
+    report = evaluate(model, texts[:50], labels[:50], analyzer)
+    
+    assert 0 <= report['rules']['accuracy'] <= 1
+    assert sum(sum(row.values()) for row in report['rules']['confusion'].values()) == 50
@@ -0,0 +1,58 @@
+import pytest
+
+from store import ClaimStore, fts_query
+
+
+CLAIMS = {
+    'CLM001': "Severe accident in Boston on 03/15/2024. My 2021 Tesla Model 3 was destroyed. Car stolen later.",
+    'CLM002': "Minor scratch on rear bumper of my 2019 Honda Accord in Boston. No injuries.",
+    'CLM003': "Hail damage to my Tesla Model Y parked in Cambridge. Fire department report filed.",
+}
+
+
+@pytest.fixture
+def store(analyzer):
+    store = ClaimStore(':memory:')
+    claim_ids, texts = list(CLAIMS), list(CLAIMS.values())
+    store.insert_results(claim_ids, texts, analyzer.analyze_claims(texts, claim_ids=claim_ids))
+    yield store
+    store.close()
+
+
+def test_filters_combine_entities_vehicles_and_text(store):
+    assert len(store) == 3
+    assert store.search(location='boston')['claim_id'].tolist() == ['CLM002', 'CLM001']
+    assert store.search(vehicle_make='Tesla', order_by='fraud_score')['claim_id'].tolist() == ['CLM001', 'CLM003']
+    assert store.search(vehicle_make='tesla', vehicle_model='Model Y')['claim_id'].tolist() == ['CLM003']
+    assert store.search(vehicle_model='model y')['claim_id'].tolist() == ['CLM003']
+    assert store.count(vehicle_model='Camry') == 0
+    assert store.count(severity='High', location='Boston', vehicle_make='Tesla', min_fraud_score=2) == 1
+    assert store.count(text='tesla hail') == 1
+    assert store.count(indicator="Contains keyword: 'stolen'") == 1
+    assert store.facets('vehicle_make') == ['Tesla', 'Honda']
+
+
+def test_reinserting_replaces_previous_analysis(store, analyzer):
+    text = "Small dent on the door of my Honda Civic in Newton."
+    store.insert_results(['CLM001'], [text], analyzer.analyze_claims([text]))
+    record = store.get('CLM001')
+    
+    assert len(store) == 3
+    assert record['description'] == text
+    assert record['locations'] == ['Newton']
+    assert record['parsed_vehicles'] == [{'year': None, 'make': 'Honda', 'model': 'Civic'}]
+    # The old description is gone from the full-text index too
+    assert store.count(text='destroyed') == 0
+    assert store.count(location='Boston') == 1
+
+
+def test_insert_table_and_query_syntax_is_escaped(store, analyzer):
+    from results import ResultTable
+    texts = ['Windshield "chip" AND crack near Quincy.']
+    table = ResultTable.from_results(['CLM010'], analyzer.analyze_claims(texts))
+    store.insert_table(table, texts)
+    
+    assert fts_query('chip" OR') == '"chip""" AND "OR"'
+    assert store.search(text='"chip" AND')['claim_id'].tolist() == ['CLM010']
+    with pytest.raises(ValueError):
+        store.search(order_by='claim_id')
@@ -0,0 +1,107 @@
+import json
+
+import pandas as pd
+import pytest
+
+import stream
+from dedup import DuplicateIndex
+from model import ClaimsAnalyzer
+from stream import stream_analyze
+
+
+@pytest.fixture
+def claims_csv(tmp_path):
+    path = tmp_path / "claims.csv"
+    pd.DataFrame({
+        'claim_id': [f'CLM{i:03d}' for i in range(1, 8)],
+        'description': [
+            f"Minor scratch on door in Boston, case {i}." if i % 2 else
+            f"Severe accident near Quincy, vehicle {i} destroyed."
+            for i in range(1, 8)
+        ],
+    }).to_csv(path, index=False)
+    return path
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_stream_to_jsonl_matches_analyze_claim(analyzer, claims_csv, tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=3) == 7
+    
+    records = read_jsonl(output)
+    assert [r['claim_id'] for r in records] == [f'CLM{i:03d}' for i in range(1, 8)]
+    expected = analyzer.analyze_claim(pd.read_csv(claims_csv)['description'][0])
+    assert {k: v for k, v in records[0].items() if k != 'claim_id'} == expected
+
+
+def test_interrupted_run_resumes_from_checkpoint(analyzer, claims_csv, tmp_path, monkeypatch):
+    output = tmp_path / "results.csv"
+    original = stream._CsvWriter.write
+    calls = []
+    
+    def failing_write(self, claim_ids, results, start_row):
+        calls.append(start_row)
+        original(self, claim_ids, results, start_row)
+        if len(calls) == 2:
+            # Simulate dying after rows hit the file but before the checkpoint
+            self.flush()
+            raise KeyboardInterrupt
+    
+    monkeypatch.setattr(stream._CsvWriter, 'write', failing_write)
+    with pytest.raises(KeyboardInterrupt):
+        stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=3)
+    
+    monkeypatch.setattr(stream._CsvWriter, 'write', original)
+    assert stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=3) == 7
+    
+    df = pd.read_csv(output)
+    assert df['claim_id'].tolist() == [f'CLM{i:03d}' for i in range(1, 8)]
+    assert df['locations'].iloc[0] == 'Boston'
+
+
+def test_resumed_rows_are_not_duplicates_of_later_rows(test_models, tmp_path, monkeypatch):
+    claim = ("Rear-ended at a red light on Main Street in Boston on 03/15/2024. "
+             "2019 Honda Accord has a damaged bumper and trunk. Other driver admitted fault.")
+    descriptions = [f"Minor scratch on door {i} in Quincy." for i in range(3)] + [
+        claim, claim.replace("03/15/2024", "04/02/2024"), "Hail cracked the windshield.",
+    ]
+    claims_csv = tmp_path / "claims.csv"
+    pd.DataFrame({'claim_id': [f'CLM{i}' for i in range(1, 7)], 'description': descriptions}).to_csv(
+        claims_csv, index=False
+    )
+    output, index_path = tmp_path / "results.jsonl", str(tmp_path / "index.npz")
+    original = stream._JsonlWriter.write
+    
+    def failing_write(self, claim_ids, results, start_row):
+        original(self, claim_ids, results, start_row)
+        if start_row == 3:
+            raise KeyboardInterrupt
+    
+    monkeypatch.setattr(stream._JsonlWriter, 'write', failing_write)
+    analyzer = ClaimsAnalyzer(duplicate_index=DuplicateIndex.open(index_path, threshold=0.7))
+    with pytest.raises(KeyboardInterrupt):
+        stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=3)
+    # The interrupted chunk was indexed and saved, though not checkpointed
+    assert len(DuplicateIndex.open(index_path)) == 6
+    
+    monkeypatch.setattr(stream._JsonlWriter, 'write', original)
+    analyzer = ClaimsAnalyzer(duplicate_index=DuplicateIndex.open(index_path))
+    stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=3)
+    
+    flagged = [[i for i in r['fraud_indicators'] if 'Near-duplicate' in i] for r in read_jsonl(output)]
+    assert flagged[3] == []
+    assert flagged[4][0].startswith("Near-duplicate of earlier claim CLM4")
+    assert len(DuplicateIndex.open(index_path)) == 6
+
+
+def test_stream_to_parquet_parts(analyzer, claims_csv, tmp_path):
+    output = tmp_path / "results.parquet"
+    stream_analyze(str(claims_csv), str(output), analyzer=analyzer, chunk_size=4)
+    
+    df = pd.read_parquet(output)
+    assert len(df) == 7
+    assert list(df['locations'].iloc[0]) == ['Boston']
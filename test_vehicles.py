@@ -0,0 +1,23 @@
+from vehicles import vehicles_in
+
+
+def test_vehicles_become_entities_with_fields(test_nlp):
+    doc = test_nlp("My chevy silverado hit a 2018 Ford F-150 and a 2022 Mercedes-Benz C-Class in Boston.")
+    
+    assert [ent.text for ent in doc.ents if ent.label_ == 'VEHICLE'] == [
+        'chevy silverado', '2018 Ford F-150', '2022 Mercedes-Benz C-Class',
+    ]
+    assert vehicles_in(doc) == [
+        {'year': None, 'make': 'Chevrolet', 'model': 'Silverado'},
+        {'year': 2018, 'make': 'Ford', 'model': 'F-150'},
+        {'year': 2022, 'make': 'Mercedes-Benz', 'model': 'C-Class'},
+    ]
+    assert [ent.text for ent in doc.ents if ent.label_ == 'GPE'] == ['Boston']
+
+
+def test_extract_entities_returns_whole_vehicle(analyzer):
+    entities = analyzer.extract_entities("Windshield cracked on 03/01/2024. 2021 Tesla Model 3. Needs replacement.")
+    
+    assert entities['vehicles'] == ['2021 Tesla Model 3']
+    # The year belongs to the vehicle, not to a date entity
+    assert entities['dates'] == ['03/01/2024']
@@ -0,0 +1,127 @@
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Span
+from spacy.util import filter_spans
+
+# Make -> models recognized after it. Multi-token models ("Model 3", "C-Class")
+# are fine; patterns are tokenized with the pipeline's own tokenizer.
+VEHICLE_MODELS = {
+    'Acura': ['MDX', 'RDX', 'TLX', 'ILX', 'Integra'],
+    'Audi': ['A3', 'A4', 'A6', 'Q3', 'Q5', 'Q7', 'e-tron'],
+    'BMW': ['3 Series', '5 Series', 'X1', 'X3', 'X5', 'X7', 'M3'],
+    'Buick': ['Enclave', 'Encore', 'LaCrosse'],
+    'Cadillac': ['Escalade', 'CT5', 'XT5'],
+    'Chevrolet': ['Silverado', 'Malibu', 'Equinox', 'Tahoe', 'Camaro', 'Corvette', 'Impala', 'Traverse', 'Bolt'],
+    'Chrysler': ['Pacifica', '300'],
+    'Dodge': ['Ram', 'Charger', 'Challenger', 'Durango', 'Grand Caravan'],
+    'Ford': ['F-150', 'F-250', 'Mustang', 'Explorer', 'Escape', 'Focus', 'Fusion', 'Edge', 'Ranger', 'Bronco'],
+    'GMC': ['Sierra', 'Acadia', 'Yukon', 'Terrain'],
+    'Honda': ['Accord', 'Civic', 'CR-V', 'Pilot', 'Odyssey', 'Fit', 'HR-V'],
+    'Hyundai': ['Elantra', 'Sonata', 'Tucson', 'Santa Fe', 'Kona'],
+    'Infiniti': ['Q50', 'Q60', 'QX60'],
+    'Jeep': ['Wrangler', 'Grand Cherokee', 'Cherokee', 'Compass'],
+    'Kia': ['Sorento', 'Sportage', 'Optima', 'Soul', 'Telluride', 'Forte'],
+    'Lexus': ['RX', 'ES', 'IS', 'NX', 'GX'],
+    'Mazda': ['CX-5', 'CX-9', 'Mazda3', 'MX-5 Miata'],
+    'Mercedes-Benz': ['C-Class', 'E-Class', 'S-Class', 'GLC', 'GLE'],
+    'Nissan': ['Altima', 'Sentra', 'Rogue', 'Maxima', 'Pathfinder', 'Leaf'],
+    'Ram': ['1500', '2500'],
+    'Subaru': ['Outback', 'Forester', 'Impreza', 'Crosstrek', 'Legacy'],
+    'Tesla': ['Model 3', 'Model S', 'Model X', 'Model Y', 'Cybertruck'],
+    'Toyota': ['Camry', 'Corolla', 'RAV4', 'Highlander', 'Tacoma', 'Tundra', 'Prius', 'Sienna'],
+    'Volkswagen': ['Jetta', 'Passat', 'Golf', 'Tiguan', 'Atlas'],
+    'Volvo': ['XC90', 'XC60', 'S60', 'V60'],
+}
+
+# Other spellings of a make that claimants use
+MAKE_ALIASES = {
+    'Chevy': 'Chevrolet',
+    'Mercedes': 'Mercedes-Benz',
+    'VW': 'Volkswagen',
+}
+
+
+def _is_year(token):
+    return len(token.text) == 4 and token.text.isdigit() and token.text[:2] in ('19', '20')
+
+
+def vehicle_fields(span):
+    """{'year', 'make', 'model'} for a VEHICLE span (year is None when not mentioned)"""
+    if span.label_ != 'VEHICLE' or not span.kb_id_:
+        return None
+    make, model = span.kb_id_.split('|', 1)
+    year = int(span[0].text) if _is_year(span[0]) else None
+    return {'year': year, 'make': make, 'model': model}
+
+
+if not Span.has_extension('vehicle'):
+    Span.set_extension('vehicle', getter=vehicle_fields)
+
+
+class VehicleRecognizer:
+    """Pipeline component tagging '[year] make model' mentions as VEHICLE entities
+
+    The make/model gazetteer is compiled into a PhraseMatcher once, when the
+    pipeline is built. Canonical make and model are stored in the span's
+    kb_id as 'make|model'; read them with span._.vehicle.
+    """
+
+    def __init__(self, nlp, models=VEHICLE_MODELS, aliases=MAKE_ALIASES):
+        self.matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        for make, make_models in models.items():
+            names = [make] + [alias for alias, canonical in aliases.items() if canonical == make]
+            for model in make_models:
+                phrases = [f'{name} {model}' for name in names]
+                self.matcher.add(f'{make}|{model}', list(nlp.tokenizer.pipe(phrases)))
+
+    def __call__(self, doc):
+        spans = []
+        for match_id, start, end in self.matcher(doc):
+            if start > 0 and _is_year(doc[start - 1]):
+                start -= 1
+            spans.append(Span(doc, start, end, label='VEHICLE', kb_id=doc.vocab.strings[match_id]))
+        if not spans:
+            return doc
+
+        spans = filter_spans(spans)
+        # Vehicles win over overlapping NER guesses such as DATE '2019' or ORG 'Honda'
+        covered = {i for span in spans for i in range(span.start, span.end)}
+        kept = [ent for ent in doc.ents if covered.isdisjoint(range(ent.start, ent.end))]
+        doc.ents = sorted(kept + spans, key=lambda span: span.start)
+        return doc
+
+
+@Language.factory('vehicle_recognizer')
+def create_vehicle_recognizer(nlp, name):
+    return VehicleRecognizer(nlp)
+
+
+def _make_names(models=VEHICLE_MODELS, aliases=MAKE_ALIASES):
+    names = {make.lower(): make for make in models}
+    names.update((alias.lower(), make) for alias, make in aliases.items())
+    # Longest first so 'Mercedes-Benz' wins over 'Mercedes'
+    return sorted(names.items(), key=lambda item: -len(item[0]))
+
+
+_MAKE_NAMES = _make_names()
+
+
+def parse_vehicle(text):
+    """{'year', 'make', 'model'} from the text of a VEHICLE entity, e.g. '2021 Tesla Model 3'
+
+    For results that only kept the entity text; make is canonical, model is
+    as written. None if the text doesn't start with a known make.
+    """
+    year, _, rest = text.strip().partition(' ')
+    if not (len(year) == 4 and year.isdigit() and year[:2] in ('19', '20')):
+        year, rest = None, text.strip()
+    lowered = rest.lower()
+    for name, make in _MAKE_NAMES:
+        if lowered.startswith(name + ' '):
+            return {'year': int(year) if year else None, 'make': make, 'model': rest[len(name):].strip()}
+    return None
+
+
+def vehicles_in(doc):
+    """Structured year/make/model of every vehicle mentioned in a parsed claim"""
+    return [ent._.vehicle for ent in doc.ents if ent.label_ == 'VEHICLE']